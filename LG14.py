@@ -0,0 +1,539 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+##
+## LG14.py
+##
+## Anatomical data of the model of (Lienard & Girard, 2014): neuron counts, connection
+## probabilities, numbers of contacts, distances and delays, and the in-degree computations
+## derived from them.
+## The table of the LG14 solutions is compiled from solutions_simple_unique.csv into a .npy
+## structured array (one field per ALPHA/DIST/THETA column), see `loadLG14store`.
+## This module depends neither on nest nor on modelParams, so that the size of a network
+## can be computed before running it (see memoryEstimate.py)
+
+import csv
+import os
+import socket
+import numpy as np
+from math import sqrt, cosh, exp
+
+LG14Stores = {} # compiled solution tables already loaded, by file name, see `loadLG14store`
+
+#-------------------------------------------------------------------------------
+# Reads the file with the Lienard solutions
+# Returns the list of parameterizations (dictionaries indexed by the column names)
+#-------------------------------------------------------------------------------
+def readLG14solutions(fileName="solutions_simple_unique.csv"):
+  LG14SolutionsReader = csv.DictReader(open(fileName),delimiter=';')
+  LG14Solutions = []
+  for row in LG14SolutionsReader:
+    LG14Solutions.append(row)
+  return LG14Solutions
+
+#-------------------------------------------------------------------------------
+# Saves a table of solutions as a .npy structured array, with one float field per column
+# names: column names (ALPHA_<src>_<tgt>, DIST_<src>_<tgt>, THETA_<nucleus>...)
+# values: 2D array, one row per parameterization
+#-------------------------------------------------------------------------------
+def saveLG14store(names, values, fileName="solutions_simple_unique.npy"):
+  values = np.asarray(values, dtype=float).reshape(-1, len(names))
+  store = np.zeros(len(values), dtype=[(n, 'f8') for n in names])
+  for i, n in enumerate(names):
+    store[n] = values[:,i]
+  # written aside under a name of its own, as several processes (e.g. the runs of an array job) may compile it at once
+  tmpName = fileName[:-len('.npy')]+'.tmp.'+socket.gethostname()+'.'+str(os.getpid())+'.npy'
+  np.save(tmpName, store)
+  os.rename(tmpName, fileName) # a partially written table is never read
+  return store
+
+#-------------------------------------------------------------------------------
+# Compiles the .csv file of the Lienard solutions into a .npy structured array
+#-------------------------------------------------------------------------------
+def compileLG14solutions(csvName="solutions_simple_unique.csv", npyName="solutions_simple_unique.npy"):
+  rows = readLG14solutions(csvName)
+  names = csv.reader(open(csvName), delimiter=';').next()
+  return saveLG14store([n.strip() for n in names], [[float(row[n]) for n in names] for row in rows], npyName)
+
+#-------------------------------------------------------------------------------
+# Loads the compiled table of the Lienard solutions: a structured array where
+# store[ID] is a parameterization and store['ALPHA_CSN_MSN'] a column over all the parameterizations
+# The table is compiled from the .csv file when it is missing or older, and kept in memory afterwards
+#-------------------------------------------------------------------------------
+def loadLG14store(csvName="solutions_simple_unique.csv"):
+  npyName = csvName[:-len('.csv')]+'.npy'
+  if csvName in LG14Stores:
+    return LG14Stores[csvName]
+  if os.path.exists(npyName) and (not os.path.exists(csvName) or os.path.getmtime(npyName) >= os.path.getmtime(csvName)):
+    store = np.load(npyName)
+  else:
+    store = compileLG14solutions(csvName, npyName)
+  LG14Stores[csvName] = store
+  return store
+
+#-------------------------------------------------------------------------------
+# Column of the solution table holding the parameter `prefix` (ALPHA, DIST or THETA)
+# of a connection 'src->tgt' or of a nucleus; Arky and Prot share the parameters of the GPe
+#-------------------------------------------------------------------------------
+def LG14column(prefix, key):
+  return prefix+'_'+key.replace('->','_').replace('Arky','GPe').replace('Prot','GPe')
+
+#-------------------------------------------------------------------------------
+# Parameters `prefix` (ALPHA, DIST or THETA) of the keys of `keys`, for all or some parameterizations
+# IDs: None for all the parameterizations, an ID, or a list of IDs
+# Returns a 2D array (one row per parameterization, one column per key) - 1D for a single ID
+#-------------------------------------------------------------------------------
+def LG14vectors(prefix, keys, IDs=None, store=None):
+  if store is None:
+    store = loadLG14store()
+  if IDs is None:
+    rows = store
+  else:
+    rows = np.atleast_1d(store[IDs])
+  vectors = np.column_stack([rows[LG14column(prefix, k)] for k in keys])
+  if IDs is not None and np.ndim(IDs) == 0:
+    return vectors[0]
+  return vectors
+
+#-------------------------------------------------------------------------------
+# Loads the alpha and p values of a given LG14 model parameterization
+# ID must be in [0,14]
+#-------------------------------------------------------------------------------
+def loadLG14alpha(ID, LG14Solutions=None):
+  if LG14Solutions is None:
+    LG14Solutions = loadLG14store()
+
+  for k,v in alpha.iteritems():
+    if LG14column('ALPHA', k) in LG14Solutions.dtype.names:
+      alpha[k] = round(float(LG14Solutions[ID][LG14column('ALPHA', k)]),0)
+    else:
+      print('Could not find LG14 parameters for connection `'+k+'`, trying to run anyway.')
+
+  for k,v in p.iteritems():
+    if LG14column('DIST', k) in LG14Solutions.dtype.names:
+      p[k] = round(float(LG14Solutions[ID][LG14column('DIST', k)]),2)
+    else:
+      print('Could not find LG14 parameters for connection `'+k+'`, trying to run anyway.')
+
+#-------------------------------------------------------------------------------
+# returns the minimal & maximal numbers of distinct input neurons for one connection
+#-------------------------------------------------------------------------------
+def get_input_range(nameSrc, nameTgt, cntSrc, cntTgt, verbose=False):
+  if nameSrc=='CSN' or nameSrc=='PTN':
+    nu = alpha[nameSrc+'->'+nameTgt]
+    nu0 = 0
+    if verbose:
+      print('\tMaximal number of distinct input neurons (nu): '+str(nu))
+      print('\tMinimal number of distinct input neurons     : unknown (set to 0)')
+  else:
+    nu = cntSrc / float(cntTgt) * P[nameSrc+'->'+nameTgt] * alpha[nameSrc+'->'+nameTgt]
+    nu0 = cntSrc / float(cntTgt) * P[nameSrc+'->'+nameTgt]
+    if verbose:
+      print('\tMaximal number of distinct input neurons (nu): '+str(nu))
+      print('\tMinimal number of distinct input neurons     : '+str(nu0))
+  return [nu0, nu]
+
+#-------------------------------------------------------------------------------
+# computes the inDegree as a fraction of maximal possible inDegree
+# FractionalOutDegree: outDegree, expressed as a fraction
+#-------------------------------------------------------------------------------
+def get_frac(FractionalOutDegree, nameSrc, nameTgt, cntSrc, cntTgt, useMin=False, verbose=False):
+  if useMin == False:
+    # 'FractionalOutDegree' is taken to be relative to the maximal number of axo-dendritic contacts
+    inDegree = get_input_range(nameSrc, nameTgt, cntSrc, cntTgt, verbose=verbose)[1] * FractionalOutDegree
+  else:
+    # 'FractionalOutDegree' is taken to be relative to the maximal number of axo-dendritic contacts and their minimal number
+    r = get_input_range(nameSrc, nameTgt, cntSrc, cntTgt, verbose=verbose)
+    inDegree = (r[1] - r[0]) * FractionalOutDegree + r[0]
+  if verbose:
+    print('\tConverting the fractional outDegree of '+nameSrc+' -> '+nameTgt+' from '+str(FractionalOutDegree)+' to inDegree neuron count: '+str(round(inDegree, 2))+' (relative to minimal value possible? '+str(useMin)+')')
+  return inDegree
+
+#-------------------------------------------------------------------------------
+# computes the inDegree of a connection from its redundancy (see `prepare_connection` in LGneurons.py)
+# nbSrc: number of simulated neurons in (each channel of) the source population
+# nbSrcChannels: None for a single-channel connexion, or the number of source channels
+#-------------------------------------------------------------------------------
+def get_indegree(nameSrc, nameTgt, redundancy, RedundancyType, nbSrc, projType='', nbSrcChannels=None, verbose=False):
+
+  def printv(text):
+    if verbose:
+      print(text)
+
+  if RedundancyType == 'inDegreeAbs':
+    # inDegree is already provided in the right form
+    inDegree = float(redundancy)
+  elif RedundancyType == 'outDegreeAbs':
+    #### fractional outDegree is expressed as a fraction of max axo-dendritic contacts
+    inDegree = get_frac(1./redundancy, nameSrc, nameTgt, neuronCounts[nameSrc], neuronCounts[nameTgt], verbose=verbose)
+  elif RedundancyType == 'outDegreeCons':
+    #### fractional outDegree is expressed as a ratio of min/max axo-dendritic contacts
+    inDegree = get_frac(redundancy, nameSrc, nameTgt, neuronCounts[nameSrc], neuronCounts[nameTgt], useMin=True, verbose=verbose)
+  else:
+    raise KeyError('`RedundancyType` should be one of `inDegreeAbs`, `outDegreeAbs`, or `outDegreeCons`.')
+
+  # check if in degree acceptable (not larger than number of neurons in the source nucleus)
+  if nbSrcChannels == None:
+    if inDegree  > nbSrc:
+      printv("/!\ WARNING: required 'in degree' ("+str(inDegree)+") larger than number of neurons in the source population ("+str(nbSrc)+"), thus reduced to the latter value")
+      inDegree = nbSrc
+  else:
+    if projType == 'focused' and inDegree > nbSrc:
+      printv("/!\ WARNING: required 'in degree' ("+str(inDegree)+") larger than number of neurons in individual source channels ("+str(nbSrc)+"), thus reduced to the latter value")
+      inDegree = nbSrc
+    if projType == 'diffuse' and inDegree  > nbSrc*nbSrcChannels:
+      printv("/!\ WARNING: required 'in degree' ("+str(inDegree)+") larger than number of neurons in the overall source population ("+str(nbSrc*nbSrcChannels)+"), thus reduced to the latter value")
+      inDegree = nbSrc*nbSrcChannels
+
+  return inDegree
+
+#-------------------------------------------------------------------------------
+# computes the weight of a connection, based on LG14 parameters
+#-------------------------------------------------------------------------------
+def computeW(listRecType, nameSrc, nameTgt, inDegree, gain=1.,verbose=False):
+  nu = get_input_range(nameSrc, nameTgt, neuronCounts[nameSrc], neuronCounts[nameTgt], verbose=verbose)[1]
+  if verbose:
+    print '\tCompare with the effective chosen inDegree   :',str(inDegree)
+
+  # attenuation due to the distance from the receptors to the soma of tgt:
+  attenuation = cosh(LX[nameTgt]*(1-p[nameSrc+'->'+nameTgt])) / cosh(LX[nameTgt])
+
+  w={}
+  for r in listRecType:
+    w[r] = nu / float(inDegree) * attenuation * wPSP[recType[r]-1] * gain
+
+  return w
+
+#-------------------------------------------------------------------------------
+# alpha and p values of the connections `keys` ('src->tgt'), rounded as in `loadLG14alpha`,
+# for the LG14 model IDs of the array `IDs`
+# Returns two arrays of shape (len(IDs), len(keys))
+#-------------------------------------------------------------------------------
+def LG14alpha_p(keys, IDs):
+  store = loadLG14store()
+  alphas = np.zeros((len(store), len(keys)))
+  ps = np.zeros((len(store), len(keys)))
+  for ID in np.unique(IDs):
+    for j, k in enumerate(keys):
+      alphas[ID,j] = round(float(store[ID][LG14column('ALPHA', k)]),0)
+      ps[ID,j] = round(float(store[ID][LG14column('DIST', k)]),2)
+  return alphas[IDs], ps[IDs]
+
+#-------------------------------------------------------------------------------
+# Computes the inDegree and the weights of a list of projections for a batch of parameterizations
+# at once, with exactly the same arithmetic as `get_indegree`, `prepare_connection` and `computeW`
+# projections: list of the J projections {'type', 'src', 'tgt', 'projType', 'source_channels'}
+#              (see projections.projection_table, with alpha=None to get all the possible projections)
+# redundancy, gain: arrays of shape (B, J), or (J,) for values shared by all the parameterizations
+# RedundancyType: see function `connect` in LGneurons.py
+# nbSim: numbers of simulated neurons (per channel) of each population, scalars or arrays of shape (B,)
+# IDs: LG14 model ID of each parameterization (array of shape (B,)), or None to use the current alpha & p
+# nbCh: number of channels (1 for single-channel connexions)
+# nbChannels: number of channels of the source populations that do not have nbCh channels (e.g. {'CSN': nbCh+nbCues});
+#             the projections without source_channels come from the first nbCh channels only
+# Returns the inDegree (B, J) and a dictionary {'AMPA', 'NMDA', 'GABA': weights (B, J)}
+# The inDegree and weights of the projections that would not be created are 0, as well as the
+# weights of the receptors not used by a projection
+#-------------------------------------------------------------------------------
+def batch_connectivity(projections, redundancy, gain, RedundancyType, nbSim, IDs=None, nbCh=1, nbChannels={}):
+  srcs = [row['src'].replace('Fake_','') for row in projections] # the fake recurrent sources share the LG14 data of their nucleus
+  tgts = [row['tgt'] for row in projections]
+  keys = [srcs[j]+'->'+tgts[j] for j in range(len(projections))]
+
+  redundancy = np.atleast_2d(np.asarray(redundancy, dtype=float))
+  gain = np.atleast_2d(np.asarray(gain, dtype=float))
+  if IDs is None:
+    alphas = np.array([[alpha[k] for k in keys]], dtype=float)
+    ps = np.array([[p[k] for k in keys]], dtype=float)
+  else:
+    alphas, ps = LG14alpha_p(keys, np.atleast_1d(IDs))
+  nbSrc = np.column_stack(np.broadcast_arrays(*[np.atleast_1d(np.asarray(nbSim.get(row['src'], nbSim[srcs[j]]), dtype=float)) for j, row in enumerate(projections)]))
+
+  # minimal & maximal numbers of distinct input neurons (get_input_range)
+  cortical = np.array([src in ['CSN','PTN'] for src in srcs])
+  ratioP = np.array([0. if cortical[j] else neuronCounts[srcs[j]] / float(neuronCounts[tgts[j]]) * P[keys[j]] for j in range(len(keys))])
+  nu = np.where(cortical, alphas, ratioP * alphas)
+  nu0 = np.where(cortical, 0., ratioP)
+
+  # inDegree (get_frac & get_indegree)
+  if RedundancyType == 'inDegreeAbs':
+    inDegree = redundancy * np.ones_like(nu)
+  elif RedundancyType == 'outDegreeAbs':
+    inDegree = nu * (1./redundancy)
+  elif RedundancyType == 'outDegreeCons':
+    inDegree = (nu - nu0) * redundancy + nu0
+  else:
+    raise KeyError('`RedundancyType` should be one of `inDegreeAbs`, `outDegreeAbs`, or `outDegreeCons`.')
+
+  # largest inDegree, as a number of source populations (channels), and share of the source channels used
+  nbSrcLimit = np.ones(len(projections))
+  scale = np.ones(len(projections))
+  for j, row in enumerate(projections):
+    if nbCh == 1:
+      continue
+    totalChannels = nbChannels.get(row['src'], nbCh)
+    usedChannels = nbCh if row['source_channels'] == None else len(row['source_channels'])
+    if row['projType'] == 'diffuse':
+      nbSrcLimit[j] = usedChannels
+    elif row['projType'] != 'focused':
+      nbSrcLimit[j] = np.inf
+    scale[j] = float(usedChannels) / float(totalChannels)
+  limit = np.where(np.isinf(nbSrcLimit), np.inf, nbSrc * nbSrcLimit)
+  inDegree = np.where(inDegree > limit, limit, inDegree)
+  absent = (inDegree == 0.)
+  if nbCh != 1:
+    inDegree = inDegree * scale
+
+  # weights (computeW)
+  LXtgt = np.array([LX[tgt] for tgt in tgts])
+  attenuation = np.cosh(LXtgt*(1-ps)) / np.cosh(LXtgt)
+  receptorsOf = {'ex': ['AMPA','NMDA'], 'AMPA': ['AMPA'], 'NMDA': ['NMDA'], 'in': ['GABA']}
+  W = {}
+  with np.errstate(divide='ignore', invalid='ignore'):
+    for r in ['AMPA','NMDA','GABA']:
+      used = np.array([r in receptorsOf[row['type']] for row in projections])
+      W[r] = np.where(used & ~absent, nu / inDegree * attenuation * wPSP[recType[r]-1] * gain, 0.)
+  return np.where(absent, 0., inDegree), W
+
+#-------------------------------------------------------------------------------
+
+# Number of neurons in the real macaque brain
+# one hemisphere only, based on Hardman et al. 2002 paper, except for striatum & CM/Pf
+neuronCounts={'MSN': 26448.0E3,
+              'FSI':   532.0E3,
+              'STN':    77.0E3,
+              'GPe':   251.0E3,
+              'Arky':  251.0E3,
+              'Prot':  251.0E3,
+              'GPi':   143.0E3,
+              'CMPf':   86.0E3,
+              'CSN': None, 'PTN': None # prevents key error
+             }
+
+# P(X->Y): probability that a given neuron from X projects to at least neuron of Y
+P = {'MSN->GPe': 1.,
+     'MSN->Arky': 1.,
+     'MSN->Prot': 1.,
+     'MSN->GPi': 0.82,
+     'MSN->MSN': 1.,
+     
+     'FSI->MSN': 1.,
+     'FSI->FSI': 1.,
+     
+     'STN->GPe':  0.83,
+     'STN->Arky': 0.83,
+     'STN->Prot': 0.83,
+     'STN->GPi':  0.72,
+     'STN->MSN':  0.17,
+     'STN->FSI':  0.17,
+     
+     'GPe->STN': 1.,
+     'GPe->GPe': 0.84,
+     'GPe->GPi': 0.84,
+     'GPe->MSN': 0.16,
+     'GPe->FSI': 0.16,
+
+     'Arky->Arky': 0.84,
+     'Arky->Prot': 0.84,
+     'Arky->MSN': 0.16,
+     'Arky->FSI': 0.16,
+     
+     'Prot->STN': 1.,
+     'Prot->Arky': 0.84,
+     'Prot->Prot': 0.84,
+     'Prot->GPi': 0.84,
+     
+     'CSN->MSN': 1.,
+     'CSN->FSI': 1.,
+     
+     'PTN->MSN': 1.,
+     'PTN->FSI': 1.,
+     'PTN->STN': 1.,
+     
+     'CMPf->STN': 1.,
+     'CMPf->MSN': 1.,
+     'CMPf->FSI': 1.,
+     'CMPf->GPe': 1.,
+     'CMPf->Arky': 1.,
+     'CMPf->Prot': 1.,
+     'CMPf->GPi': 1.,}
+
+# alpha X->Y: average number of synaptic contacts made by one neuron of X to one neuron of Y, when there is a connexion
+# for the moment set from one specific parameterization, should be read from Jean's solution file
+alpha = {'MSN->GPe':   171,
+         'MSN->Arky':   171,
+         'MSN->Prot':   171,
+         'MSN->GPi':   210,
+         'MSN->MSN':   210,
+         
+         'FSI->MSN':  4362,
+         'FSI->FSI':   116,
+         
+         'STN->GPe':   428,
+         'STN->Arky':   428,
+         'STN->Prot':   428,
+         'STN->GPi':   233,
+         'STN->MSN':     0,
+         'STN->FSI':    91,
+         
+         'GPe->STN':    19,
+         'GPe->GPe':    38,
+         'GPe->GPi':    16,
+         'GPe->MSN':     0,
+         'GPe->FSI':   353,
+
+         'Arky->Arky':    38,
+         'Arky->Prot':    38,
+         'Arky->MSN':     0,
+         'Arky->FSI':   353,
+         
+         'Prot->STN':    19,
+         'Prot->Arky':    38,
+         'Prot->Prot':    38,
+         'Prot->GPi':    16,
+         
+         'CSN->MSN':   342, # here, represents directly \nu
+         'CSN->FSI':   250, # here, represents directly \nu
+         
+         'PTN->MSN':     5, # here, represents directly \nu
+         'PTN->FSI':     5, # here, represents directly \nu
+         'PTN->STN':   259, # here, represents directly \nu
+         
+         'CMPf->MSN': 4965,
+         'CMPf->FSI': 1053,
+         'CMPf->STN':   76,
+         'CMPf->GPe':   79,
+         'CMPf->Arky':   79,
+         'CMPf->Prot':   79,
+         'CMPf->GPi':  131,}
+
+# p(X->Y): relative distance on the dendrite from the soma, where neurons rom X projects to neurons of Y
+# Warning: p is not P!
+p = {'MSN->GPe':  0.48,
+     'MSN->Arky':  0.48,
+     'MSN->Prot':  0.48,
+     'MSN->GPi':  0.59,
+     'MSN->MSN':  0.77,
+     
+     'FSI->MSN':  0.19,
+     'FSI->FSI':  0.16,
+     
+     'STN->GPe':  0.30,
+     'STN->Prot':  0.30,
+     'STN->Arky':  0.30,
+     'STN->GPi':  0.59,
+     'STN->MSN':  0.16,
+     'STN->FSI':  0.41,
+     
+     'GPe->STN':  0.58,
+     'GPe->GPe':  0.01,
+     'GPe->GPi':  0.13,
+     'GPe->MSN':  0.06,
+     'GPe->FSI':  0.58,
+
+     'Arky->Arky':  0.01,
+     'Arky->Prot':  0.01,
+     'Arky->MSN':  0.06,
+     'Arky->FSI':  0.58,
+     
+     'Prot->STN':  0.58,
+     'Prot->Arky':  0.01,
+     'Prot->Prot':  0.01,
+     'Prot->GPi':  0.13,
+     
+     'CSN->MSN':  0.95,
+     'CSN->FSI':  0.82,
+     
+     'PTN->MSN':  0.98,
+     'PTN->FSI':  0.70,
+     'PTN->STN':  0.97,
+     
+     'CMPf->STN': 0.46,
+     'CMPf->MSN': 0.27,
+     'CMPf->FSI': 0.06,
+     'CMPf->GPe': 0.00,
+     'CMPf->Arky': 0.00,
+     'CMPf->Prot': 0.00,
+     'CMPf->GPi': 0.48,}
+
+# dendritic diameters and lengths, used to compute the electrotonic constant L:
+dx={'MSN':1.E-6,'FSI':1.5E-6,'STN':1.5E-6,'GPe':1.7E-6,'Arky':1.7E-6,'Prot':1.7E-6,'GPi':1.2E-6}
+lx={'MSN':619E-6,'FSI':961E-6,'STN':750E-6,'GPe':865E-6,'Arky':865E-6,'Prot':865E-6,'GPi':1132E-6}
+# tau: communication delays
+tau = {'MSN->GPe':    7.,
+       'MSN->Arky':    7.,
+       'MSN->Prot':    7.,
+       'MSN->GPi':   11.,
+       'MSN->MSN':    1.,
+       
+       'FSI->MSN':    1.,
+       'FSI->FSI':    1.,
+       
+       'STN->GPe':    3.,
+       'STN->Arky':    3.,
+       'STN->Prot':    3.,
+       'STN->GPi':    3.,
+       'STN->MSN':    3.,
+       'STN->FSI':    3.,
+       
+       'GPe->STN':   10.,
+       'GPe->GPe':    1.,
+       'GPe->GPi':    3.,
+       'GPe->MSN':    3.,
+       'GPe->FSI':    3.,
+       
+       'Arky->Arky':    1.,
+       'Arky->Prot':    1.,
+       'Arky->MSN':    3.,
+       'Arky->FSI':    3.,
+       
+       'Prot->STN':   10.,
+       'Prot->Arky':    1.,
+       'Prot->Prot':    1.,
+       'Prot->GPi':    3.,
+       
+       'CSN->MSN':    7.,
+       'CSN->FSI':    7.,
+       
+       'PTN->MSN':    3.,
+       'PTN->FSI':    3.,
+       'PTN->STN':    3.,
+       
+       'CMPf->MSN':   7.,
+       'CMPf->FSI':   7.,
+       'CMPf->STN':   7.,#4
+       'CMPf->GPe':   7.,#5
+       'CMPf->Arky':   7.,#5
+       'CMPf->Prot':   7.,#5
+       'CMPf->GPi':   7.,#6
+       }
+
+# Acceptable firing rate ranges (FRR) in normal conditions, extracted from LG14 Table 5
+# (those of the deactivation experiments are in LGneurons.py)
+FRRNormal = {'MSN': [0,1],
+             'FSI': [7.8,14.0], # the refined constraint of 10.9 +/- 3.1 Hz was extracted from the following papers: Adler et al., 2016; Yamada et al., 2016 (summarizing date from three different experiments); and Marche and Apicella, 2017
+             'STN': [15.2,22.8],
+             'GPe': [55.7,74.5],
+             'Arky': [55.7,74.5],
+             'Prot': [55.7,74.5],
+             'GPi': [59.1,79.5],
+             }
+
+# fixed parameters
+A_GABA=-0.25 # mV
+A_AMPA= 1.
+A_NMDA= 0.025
+D_GABA=5./exp(1)   # ms ; /e because Dn is peak half-time in LG14, while it is supposed to be tau_peak in NEST
+D_AMPA=5./exp(1)
+D_NMDA=100./exp(1)
+Ri=200.E-2   # Ohms.m
+Rm=20000.E-4 # Ohms.m^2
+
+# electrotonic constant L computation:
+LX={}
+for n in lx.keys():
+    LX[n]=lx[n]*sqrt((4*Ri)/(dx[n]*Rm))
+
+# receptor types (input ports of the neurons), and PSP amplitude (mV) of each ; A in LG14 notation
+recType = {'AMPA':1,'NMDA':2,'GABA':3}
+wPSP = [A_AMPA, A_NMDA, A_GABA]
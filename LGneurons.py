@@ -6,110 +6,46 @@ interactive = False # avoid loading X dependent things
 storeGDF = True # unless overriden by run.py, keep spike rasters
 
 import nstrand
+from mpiTools import *
 
 import pandas as pd
 import pylab
-from modelParams import *
+try:
+  from modelParams import *
+except ImportError:
+  # no parameter file generated by run.py: the defaults, the parameters being passed explicitly
+  # to instantiate_BG, createBG, connectBG... (see iniBG.py)
+  from baseParams import params
+from LG14 import *
+from projections import get_nuclei
 import nest
 import numpy as np
 import numpy.random as rnd
 import csv
+import os
+import zlib
+from multiprocessing.pool import ThreadPool
 from math import sqrt, cosh, exp, pi
 
 AMPASynapseCounter = 0 # counter variable for the fast connect
+HomogeneousModelCounter = 0 # counter variable for the names of the synapse models of `homogeneous_model`
 
 #-------------------------------------------------------------------------------
 # Loads a given LG14 model parameterization
 # ID must be in [0,14]
 #-------------------------------------------------------------------------------
 def loadLG14params(ID):
-  # Load the file with the Lienard solutions:
-  LG14SolutionsReader = csv.DictReader(open("solutions_simple_unique.csv"),delimiter=';')
-  LG14Solutions = []
-  for row in LG14SolutionsReader:
-    LG14Solutions.append(row)
+  # Load the compiled table of the Lienard solutions:
+  LG14Solutions = loadLG14store()
 
   print '### Parameterization #'+str(ID)+' from (Lienard & Girard, 2014) is used. ###'
 
-  for k,v in alpha.iteritems():
-    try:
-      if k == 'Arky->MSN':
-        alpha[k] = round(float(LG14Solutions[ID]['ALPHA_GPe_MSN']),0)
-      elif k == 'Arky->FSI':
-        alpha[k] = round(float(LG14Solutions[ID]['ALPHA_GPe_FSI']),0)
-      elif k == 'CMPf->Arky':
-        alpha[k] = round(float(LG14Solutions[ID]['ALPHA_CMPf_GPe']),0)
-      elif k == 'CMPf->Prot':
-        alpha[k] = round(float(LG14Solutions[ID]['ALPHA_CMPf_GPe']),0)
-      elif k == 'MSN->Arky':
-        alpha[k] = round(float(LG14Solutions[ID]['ALPHA_MSN_GPe']),0)
-      elif k == 'MSN->Prot':
-        alpha[k] = round(float(LG14Solutions[ID]['ALPHA_MSN_GPe']),0)
-      elif k == 'Prot->STN':
-        alpha[k] = round(float(LG14Solutions[ID]['ALPHA_GPe_STN']),0)
-      elif k == 'STN->Arky':
-        alpha[k] = round(float(LG14Solutions[ID]['ALPHA_STN_GPe']),0)
-      elif k == 'STN->Prot':
-        alpha[k] = round(float(LG14Solutions[ID]['ALPHA_STN_GPe']),0)
-      elif k == 'Arky->Arky':
-        alpha[k] = round(float(LG14Solutions[ID]['ALPHA_GPe_GPe']),0)
-      elif k == 'Arky->Prot':
-        alpha[k] = round(float(LG14Solutions[ID]['ALPHA_GPe_GPe']),0)
-      elif k == 'Prot->Arky':
-        alpha[k] = round(float(LG14Solutions[ID]['ALPHA_GPe_GPe']),0)
-      elif k == 'Prot->Prot':
-        alpha[k] = round(float(LG14Solutions[ID]['ALPHA_GPe_GPe']),0)
-      elif k == 'Prot->GPi':
-        alpha[k] = round(float(LG14Solutions[ID]['ALPHA_GPe_GPi']),0)
-      else:
-        alpha[k] = round(float(LG14Solutions[ID]['ALPHA_'+k.replace('->','_')]),0) 
-    except:
-      print('Could not find LG14 parameters for connection `'+k+'`, trying to run anyway.')
-
-  for k,v in p.iteritems():
-      try:
-        if k == 'Arky->MSN':
-          p[k] = round(float(LG14Solutions[ID]['DIST_GPe_MSN']),2)
-        elif k == 'Arky->FSI':
-          p[k] = round(float(LG14Solutions[ID]['DIST_GPe_FSI']),2)
-        elif k == 'CMPf->Arky':
-          p[k] = round(float(LG14Solutions[ID]['DIST_CMPf_GPe']),2)
-        elif k == 'CMPf->Prot':
-          p[k] = round(float(LG14Solutions[ID]['DIST_CMPf_GPe']),2)
-        elif k == 'MSN->Arky':
-          p[k] = round(float(LG14Solutions[ID]['DIST_MSN_GPe']),2)
-        elif k == 'MSN->Prot':
-          p[k] = round(float(LG14Solutions[ID]['DIST_MSN_GPe']),2)
-        elif k == 'Prot->STN':
-          p[k] = round(float(LG14Solutions[ID]['DIST_GPe_STN']),2)
-        elif k == 'STN->Arky':
-          p[k] = round(float(LG14Solutions[ID]['DIST_STN_GPe']),2)
-        elif k == 'STN->Prot':
-          p[k] = round(float(LG14Solutions[ID]['DIST_STN_GPe']),2)
-        elif k == 'Arky->Arky':
-          p[k] = round(float(LG14Solutions[ID]['DIST_GPe_GPe']),2)
-        elif k == 'Arky->Prot':
-          p[k] = round(float(LG14Solutions[ID]['DIST_GPe_GPe']),2)
-        elif k == 'Prot->Arky':
-          p[k] = round(float(LG14Solutions[ID]['DIST_GPe_GPe']),2)
-        elif k == 'Prot->Prot':
-          p[k] = round(float(LG14Solutions[ID]['DIST_GPe_GPe']),2)
-        elif k == 'Prot->GPi':
-          p[k] = round(float(LG14Solutions[ID]['DIST_GPe_GPi']),2)
-        else:
-          p[k] = round(float(LG14Solutions[ID]['DIST_'+k.replace('->','_')]),2) 
-      except:
-        print('Could not find LG14 parameters for connection `'+k+'`, trying to run anyway.')
+  loadLG14alpha(ID, LG14Solutions)
 
   for k,v in BGparams.iteritems():
-    try:
-      if k == 'Arky':
-          BGparams[k]['V_th'] = round(float(LG14Solutions[ID]['THETA_GPe']),1)
-      elif k == 'Prot':
-          BGparams[k]['V_th'] = round(float(LG14Solutions[ID]['THETA_GPe']),1)
-      else:
-          BGparams[k]['V_th'] = round(float(LG14Solutions[ID]['THETA_'+k]),1)
-    except:
+    if LG14column('THETA', k) in LG14Solutions.dtype.names:
+      BGparams[k]['V_th'] = round(float(LG14Solutions[ID][LG14column('THETA', k)]),1)
+    else:
       print('Could not find LG14 parameters for connection `'+k+'`, trying to run anyway.')
 
 
@@ -131,25 +67,117 @@ def loadThetaFromCustomparams(params):
 def initNeurons():
   nest.SetDefaults("iaf_psc_alpha_multisynapse", CommonParams)
 
+#-------------------------------------------------------------------------------
+# Pre-generates Poisson spike trains for the `nb` neurons of an input population
+# The trains only depend on the population name and on the seed, so that they can
+# be replayed identically across conditions (rest & antagonist experiments)
+# duration: length of the trains, in ms
+# cachePath: if provided, the trains are stored there as .npy files, and memory-mapped
+#            when they are requested again
+# Returns the concatenated spike times (sorted per neuron) and the offsets of each neuron
+#-------------------------------------------------------------------------------
+def pregenerate_spike_trains(name, nb, rate, duration, seed, cachePath=None):
+  resolution = nest.GetKernelStatus('resolution')
+  if cachePath != None:
+    fileRoot = os.path.join(cachePath, '%s_%d_%d_%g_%g_%g' % (name, seed, nb, rate, duration, resolution))
+    if os.path.isfile(fileRoot+'_times.npy') and os.path.isfile(fileRoot+'_offsets.npy'):
+      return np.load(fileRoot+'_times.npy', mmap_mode='r'), np.load(fileRoot+'_offsets.npy')
+
+  rng = rnd.RandomState([seed, zlib.crc32(name) & 0xffffffff])
+  counts = rng.poisson(rate * duration / 1000., nb)
+  owners = np.repeat(np.arange(nb), counts)
+  times = rng.uniform(0., duration, counts.sum())
+  # spike times must lie on the simulation grid, strictly after the origin
+  times = np.maximum(np.ceil(times / resolution), 1) * resolution
+  times = times[np.lexsort((times, owners))]
+  offsets = np.concatenate(([0], np.cumsum(counts)))
+
+  if cachePath != None:
+    if not os.path.isdir(cachePath):
+      os.makedirs(cachePath)
+    np.save(fileRoot+'_times.npy', times)
+    np.save(fileRoot+'_offsets.npy', offsets)
+  return times, offsets
+
+#-------------------------------------------------------------------------------
+# Creates `nb` spike generators replaying pre-generated Poisson spike trains
+# (see `pregenerate_spike_trains`) instead of poisson_generator -> parrot_neuron pairs
+# A spike generator sends the same spikes to all its targets, so it plays the role of the parrot neuron
+# channel: in the multi-channel case, each channel gets its own spike trains
+#-------------------------------------------------------------------------------
+def create_replay(name, nb, replay, channel=None):
+  trainName = name if channel == None else name+'_ch'+str(channel)
+  times, offsets = pregenerate_spike_trains(trainName, nb, rate[name], replay['duration'], replay['seed'], replay.get('cachePath'))
+  gens = nest.Create('spike_generator', nb)
+  nest.SetStatus(gens, [{'spike_times': times[offsets[i]:offsets[i+1]].tolist()} for i in range(nb)])
+  Replayed.append(gens)
+  return gens
+
+#-------------------------------------------------------------------------------
+# Replays the pre-generated input spike trains from the start, at the current time
+# To be called at the beginning of each simulated condition, after nest.ResetNetwork()
+#-------------------------------------------------------------------------------
+def rewind_inputs():
+  now = nest.GetKernelStatus('time')
+  for gens in Replayed:
+    nest.SetStatus(gens, {'origin': now})
+
+#-------------------------------------------------------------------------------
+# Warm start: captures the state of the neurons `gids` at the end of the stabilization offset,
+# so that the following conditions start from it instead of warming up from scratch (see checkAvgFR)
+# NEST 2 only lets the membrane potentials be read and set back: the synaptic currents, refractory
+# counters and spikes in flight are rebuilt during the shorter offset params['warmStartOffset']
+# With MPI, each process keeps the state of its local neurons
+#-------------------------------------------------------------------------------
+def capture_state(gids):
+  local = [gid for gid, isLocal in zip(gids, nest.GetStatus(gids, 'local')) if isLocal]
+  WarmState['gids'] = local
+  WarmState['V_m'] = nest.GetStatus(local, 'V_m')
+
+#-------------------------------------------------------------------------------
+# Restores the state captured by `capture_state`, after nest.ResetNetwork()
+# Returns False if there is no state to restore
+#-------------------------------------------------------------------------------
+def restore_state():
+  if len(WarmState) == 0:
+    return False
+  nest.SetStatus(WarmState['gids'], [{'V_m': v} for v in WarmState['V_m']])
+  return True
+
 #-------------------------------------------------------------------------------
 # Creates a population of neurons
 # name: string naming the population, as defined in NUCLEI list
 # fake: if fake is True, the neurons will be replaced by Poisson generators, firing
 #       at the rate indicated in the "rate" dictionary
 # parrot: do we use parrot neurons or not? If not, there will be no correlations in the inputs, and a waste of computation power...
+# replay: if provided (with fake=True), a dictionary {'seed': ..., 'duration': ..., 'cachePath': ...}
+#         and the Poisson spike trains are pre-generated and replayed with spike generators,
+#         identically in each condition (the rate can not be changed during the simulation)
+# shared: if True (with fake=True and parrot=True), a single Poisson generator feeds all the parrot neurons
+#         NEST draws an independent spike train for each target of a poisson_generator, so the
+#         inputs are statistically identical to one generator per parrot neuron, with half the nodes
 #-------------------------------------------------------------------------------
-def create(name,fake=False,parrot=True):
+def create(name,fake=False,parrot=True,replay=None,shared=False):
   if nbSim[name] == 0:
     print 'ERROR: create(): nbSim['+name+'] = 0'
     exit()
   if fake:
     if rate[name] == 0:
       print 'ERROR: create(): rate['+name+'] = 0 Hz'
+    if replay != None:
+      print '* '+name+'(fake):',nbSim[name],'spike generators replaying Poisson spike trains with avg rate:',rate[name]
+      Pop[name] = create_replay(name, int(nbSim[name]), replay)
+      return
     print '* '+name+'(fake):',nbSim[name],'Poisson generators with avg rate:',rate[name]
     if not parrot:
       print "/!\ /!\ /!\ /!\ \nWARNING: parrot neurons not used, no correlations in inputs\n"
       Pop[name]  = nest.Create('poisson_generator',int(nbSim[name]))
       nest.SetStatus(Pop[name],{'rate':rate[name]})
+    elif shared:
+      Fake[name]  = nest.Create('poisson_generator',1)
+      nest.SetStatus(Fake[name],{'rate':rate[name]})
+      Pop[name]  = nest.Create('parrot_neuron',int(nbSim[name]))
+      nest.Connect(pre=Fake[name],post=Pop[name],conn_spec={'rule':'all_to_all'})
     else:
       Fake[name]  = nest.Create('poisson_generator',int(nbSim[name]))
       nest.SetStatus(Fake[name],{'rate':rate[name]})
@@ -168,8 +196,10 @@ def create(name,fake=False,parrot=True):
 # fake: if fake is True, the neurons will be replaced by Poisson generators, firing
 #       at the rate indicated in the "rate" dictionary
 # parrot: do we use parrot neurons or not? If not, there will be no correlations in the inputs, and a waste of computation power...
+# replay: pre-generated spike trains replayed in each condition - see function `create` for details
+# shared: a single Poisson generator per channel feeds its parrot neurons - see function `create` for details
 #-------------------------------------------------------------------------------
-def createMC(name,nbCh,fake=False,parrot=True):
+def createMC(name,nbCh,fake=False,parrot=True,replay=None,shared=False):
   if nbSim[name] == 0:
     print 'ERROR: create(): nbSim['+name+'] = 0'
     exit()
@@ -180,12 +210,23 @@ def createMC(name,nbCh,fake=False,parrot=True):
     Fake[name]=[]
     if rate[name] == 0:
       print 'ERROR: create(): rate['+name+'] = 0 Hz'
+    if replay != None:
+      print '* '+name+'(fake):',nbSim[name]*nbCh,'spike generators (divided in',nbCh,'channels) replaying Poisson spike trains with avg rate:',rate[name]
+      for i in range(nbCh):
+        Pop[name].append(create_replay(name, int(nbSim[name]), replay, channel=i))
+      return
     print '* '+name+'(fake):',nbSim[name]*nbCh,'Poisson generators (divided in',nbCh,'channels) with avg rate:',rate[name]
     if not parrot:
       print "/!\ /!\ /!\ /!\ \nWARNING: parrot neurons not used, no correlations in inputs\n"
       for i in range(nbCh):
         Pop[name].append(nest.Create('poisson_generator',int(nbSim[name])))
         nest.SetStatus(Pop[name][i],{'rate':rate[name]})
+    elif shared:
+      for i in range(nbCh):
+        Fake[name].append(nest.Create('poisson_generator',1))
+        nest.SetStatus(Fake[name][i],{'rate':rate[name]})
+        Pop[name].append(nest.Create('parrot_neuron',int(nbSim[name])))
+        nest.Connect(pre=Fake[name][i],post=Pop[name][i],conn_spec={'rule':'all_to_all'})
     else:
       for i in range(nbCh):
         Fake[name].append(nest.Create('poisson_generator',int(nbSim[name])))
@@ -199,14 +240,44 @@ def createMC(name,nbCh,fake=False,parrot=True):
       Pop[name].append(nest.Create("iaf_psc_alpha_multisynapse",int(nbSim[name]),params=BGparams[name]))
 
 
+#------------------------------------------------------------------------------
+# Synapse specification of a connexion: `static_synapse_lbl` tagged with `synapse_label`,
+# or, if `slim` is True and the connexion is not to be found by its label afterwards
+# (synapse_label = 0), the plain `static_synapse`, which does not store a label in each synapse
+#------------------------------------------------------------------------------
+def synapse_spec(synapse_label, slim=False):
+  if slim and synapse_label == 0:
+    return {'model': 'static_synapse'}
+  return {'model': 'static_synapse_lbl', 'synapse_label': synapse_label}
+
+#------------------------------------------------------------------------------
+# Creates a copy of `static_synapse_hom_w` holding the weight of receptor `rec` of a connexion
+# prepared by `prepare_connection`: the weight is stored once for all the synapses of the
+# projection instead of once per synapse, and can be changed at once with nest.SetDefaults
+# (see `alter_connection` in iniBG.py)
+# Returns the name of the new synapse model
+#------------------------------------------------------------------------------
+def homogeneous_model(conn, rec):
+  global HomogeneousModelCounter
+  models = HomogeneousModels.setdefault((conn['src'], conn['tgt'], rec), [])
+  # the counter keeps the names unique in the kernel, even when several BG instances share it (see ensembleBG.py)
+  HomogeneousModelCounter += 1
+  name = 'hom_w_'+conn['src']+'_'+conn['tgt']+'_'+rec+'_'+str(HomogeneousModelCounter)
+  nest.CopyModel('static_synapse_hom_w', name, {'weight': conn['W'][rec]})
+  models.append(name)
+  return name
+
 #------------------------------------------------------------------------------
 # Routine to perform the fast connection using nest built-in `connect` function
 # - `source` & `dest` are lists defining Nest IDs of source & target population
 # - `synapse_label` is used to tag connections and be able to find them quickly
 #   with function `mass_mirror`, that adds NMDA on top of AMPA connections
 # - `inDegree`, `receptor_type`, `weight`, `delay` are Nest connection params
+# - `slim`: see function `synapse_spec`
+# - `synapse_model`: if provided, a synapse model created by `homogeneous_model`, which holds the weight
+#   (`synapse_label`, `weight` and `slim` are then ignored)
 #------------------------------------------------------------------------------
-def mass_connect(source, dest, synapse_label, inDegree, receptor_type, weight, delay, stochastic_delays=None, verbose=False):
+def mass_connect(source, dest, synapse_label, inDegree, receptor_type, weight, delay, stochastic_delays=None, verbose=False, slim=False, synapse_model=None):
   def printv(text):
     if verbose:
       print(text)
@@ -219,6 +290,12 @@ def mass_connect(source, dest, synapse_label, inDegree, receptor_type, weight, d
     sigma = delay * stochastic_delays
     delay =  {'distribution': 'normal_clipped', 'low': low, 'high': high, 'mu': delay, 'sigma': sigma}
 
+  if synapse_model == None:
+    syn_spec = synapse_spec(synapse_label, slim)
+    syn_spec.update({'receptor_type': receptor_type, 'weight': weight, 'delay':delay})
+  else:
+    syn_spec = {'model': synapse_model, 'receptor_type': receptor_type, 'delay':delay}
+
   # The first `fixed_indegree` connection ensures that all neurons in `dest`
   # are targeted by the same number of axons (an integer number)
   integer_inDegree = np.floor(inDegree)
@@ -227,7 +304,7 @@ def mass_connect(source, dest, synapse_label, inDegree, receptor_type, weight, d
     nest.Connect(source,
                  dest,
                  {'rule': 'fixed_indegree', 'indegree': int(integer_inDegree)},
-                 {'model': 'static_synapse_lbl', 'synapse_label': synapse_label, 'receptor_type': receptor_type, 'weight': weight, 'delay':delay})
+                 syn_spec)
 
   # The second `fixed_total_number` connection distributes remaining axonal
   # contacts at random (i.e. the remaining fractional part after the first step)
@@ -238,7 +315,7 @@ def mass_connect(source, dest, synapse_label, inDegree, receptor_type, weight, d
     nest.Connect(source,
                  dest,
                  {'rule': 'fixed_total_number', 'N': int(remaining_connections)},
-                 {'model': 'static_synapse_lbl', 'synapse_label': synapse_label, 'receptor_type': receptor_type, 'weight': weight, 'delay':delay})
+                 syn_spec)
 
 #------------------------------------------------------------------------------
 # Routine to duplicate a connection made with a specific receptor, with another
@@ -246,15 +323,23 @@ def mass_connect(source, dest, synapse_label, inDegree, receptor_type, weight, d
 # - `source` & `synapse_label` should uniquely define the connections of
 #   interest - typically, they are the same as in the call to `mass_connect`
 # - `receptor_type`, `weight`, `delay` are Nest connection params
+# - `slim`: if True, the mirrored connections are not labelled (see function `synapse_spec`)
+# - `synapse_model`, `source_model`: if provided, the synapse models created by `homogeneous_model`
+#   for the new connections and for the connections to mirror, which are then found with
+#   `source` & `source_model` instead of `synapse_label`
 #------------------------------------------------------------------------------
-def mass_mirror(source, synapse_label, receptor_type, weight, delay, stochastic_delays, verbose=False):
+def mass_mirror(source, synapse_label, receptor_type, weight, delay, stochastic_delays, verbose=False, slim=False, synapse_model=None, source_model=None):
   def printv(text):
     if verbose:
       print(text)
 
   # find all AMPA connections for the given projection type
+  # with MPI, only the local connections are found, and mirrored on the same (local) targets
   printv('looking for AMPA connections to mirror with NMDA...\n')
-  ampa_conns = nest.GetConnections(source=source, synapse_label=synapse_label)
+  if source_model == None:
+    ampa_conns = nest.GetConnections(source=source, synapse_label=synapse_label)
+  else:
+    ampa_conns = nest.GetConnections(source=source, synapse_model=source_model)
   # in rare cases, there may be no connections, guard against that
   if ampa_conns:
     # extract just source and target GID lists, all other information is irrelevant here
@@ -263,270 +348,358 @@ def mass_mirror(source, synapse_label, receptor_type, weight, delay, stochastic_
       printv('Using stochastic delays in mass-miror')
       delay = np.array(nest.GetStatus(ampa_conns, keys=['delay'])).flatten()
     src, tgt, _, _, _ = zip(*ampa_conns)
-    nest.Connect(src, tgt, 'one_to_one',
-                 {'model': 'static_synapse_lbl',
-                  'synapse_label': synapse_label, # tag with the same number (doesn't matter)
-                  'receptor_type': receptor_type, 'weight': weight, 'delay':delay})
+    if synapse_model == None:
+      syn_spec = synapse_spec(0 if slim else synapse_label, slim) # tag with the same number (doesn't matter)
+      syn_spec.update({'receptor_type': receptor_type, 'weight': weight, 'delay':delay})
+    else:
+      syn_spec = {'model': synapse_model, 'receptor_type': receptor_type, 'delay':delay}
+    nest.Connect(src, tgt, 'one_to_one', syn_spec)
 
 #-------------------------------------------------------------------------------
-# Establishes a connexion between two populations, following the results of LG14
-# type : a string 'ex' or 'in', defining whether it is excitatory or inhibitory
-# nameTgt, nameSrc : strings naming the populations, as defined in NUCLEI list
-# redundancy : value that characterizes the number of repeated axonal contacts from one neuron of Src to one neuron of Tgt (see RedundancyType for interpretation of this value)
-# RedundancyType : string
-#   if 'inDegreeAbs': `redundancy` is the number of neurons from Src that project to a single Tgt neuron
-#   if 'outDegreeAbs': `redundancy` is number of axonal contacts between each neuron from Src onto a single Tgt neuron
-#   if 'outDegreeCons': `redundancy` is a scaled proportion of axonal contacts between each neuron from Src onto a single Tgt neuron given arithmetical constraints, ranging from 0 (minimal number of contacts to achieve required axonal bouton counts) to 1 (maximal number of contacts with respect to population numbers)
-# LCGDelays: shall we use the delays obtained by (Liénard, Cos, Girard, in prep) or not (default = True)
-# gain : allows to amplify the weight normally deduced from LG14
+# Computes the parameters of a connexion between two populations, following the results of LG14,
+# without creating it (see functions `connect` and `connectMC` for the meaning of the arguments)
+# source_channels: None for a single-channel connexion, or the list of source channels in the multi-channel case
+# Returns a dictionary describing the connexion, to be created with `wire_connection`,
+# or None if the connexion does not exist
 #-------------------------------------------------------------------------------
-def connect(type, nameSrc, nameTgt, redundancy, RedundancyType, LCGDelays=True, gain=1., stochastic_delays=None, verbose=False, projType=''):
+def prepare_connection(type, nameSrc, nameTgt, redundancy, RedundancyType, LCGDelays=True, gain=1., projType='', source_channels=None, verbose=False):
 
   def printv(text):
     if verbose:
       print(text)
 
-  printv("* connecting "+nameSrc+" -> "+nameTgt+" with "+type+" connection")
-
-  if RedundancyType == 'inDegreeAbs':
-    # inDegree is already provided in the right form
-    inDegree = float(redundancy)
-  elif RedundancyType == 'outDegreeAbs':
-    #### fractional outDegree is expressed as a fraction of max axo-dendritic contacts
-    inDegree = get_frac(1./redundancy, nameSrc, nameTgt, neuronCounts[nameSrc], neuronCounts[nameTgt], verbose=verbose)
-  elif RedundancyType == 'outDegreeCons':
-    #### fractional outDegree is expressed as a ratio of min/max axo-dendritic contacts
-    inDegree = get_frac(redundancy, nameSrc, nameTgt, neuronCounts[nameSrc], neuronCounts[nameTgt], useMin=True, verbose=verbose)
-  else:
-    raise KeyError('`RedundancyType` should be one of `inDegreeAbs`, `outDegreeAbs`, or `outDegreeCons`.')
+  printv("* connecting "+nameSrc+" -> "+nameTgt+" with "+projType+" "+type+" connection")
 
-  # check if in degree acceptable (not larger than number of neurons in the source nucleus)
-  if inDegree  > nbSim[nameSrc]:
-    printv("/!\ WARNING: required 'in degree' ("+str(inDegree)+") larger than number of neurons in the source population ("+str(nbSim[nameSrc])+"), thus reduced to the latter value")
-    inDegree = nbSim[nameSrc]
+  if source_channels == None:
+    inDegree = get_indegree(nameSrc, nameTgt, redundancy, RedundancyType, nbSim[nameSrc], verbose=verbose)
+  else:
+    inDegree = get_indegree(nameSrc, nameTgt, redundancy, RedundancyType, nbSim[nameSrc], projType=projType, nbSrcChannels=len(source_channels), verbose=verbose)
 
   if inDegree == 0.:
     printv("/!\ WARNING: non-existent connection strength, will skip")
-    return
+    return None
 
-  global AMPASynapseCounter
+  if source_channels != None:
+    inDegree = inDegree * (float(len(source_channels)) / float(len(Pop[nameSrc])))
 
   # process receptor types
   if type == 'ex':
-    lRecType = ['AMPA','NMDA']
-    AMPASynapseCounter = AMPASynapseCounter + 1
-    lbl = AMPASynapseCounter # needs to add NMDA later
+    lRecType = ['AMPA','NMDA'] # NMDA is added later on top of AMPA
   elif type == 'AMPA':
     lRecType = ['AMPA']
-    lbl = 0
   elif type == 'NMDA':
     lRecType = ['NMDA']
-    lbl = 0
   elif type == 'in':
     lRecType = ['GABA']
-    lbl = 0
   else:
     raise KeyError('Undefined connexion type: '+type)
 
+  # compute the global weight of the connection, for each receptor type:
   W = computeW(lRecType, nameSrc, nameTgt, inDegree, gain, verbose=False)
 
   printv("  W="+str(W)+" and inDegree="+str(inDegree))
 
-  #if nameSrc+'->'+nameTgt in ConnectMap:
-  #  loadConnectMap = True
-  #else:
-  #  loadConnectMap = False
-  #  ConnectMap[nameSrc+'->'+nameTgt] = []
-
   # determine which transmission delay to use:
   if LCGDelays:
-    delay= tau[nameSrc+'->'+nameTgt]
+    delay = tau[nameSrc+'->'+nameTgt]
   else:
-    delay= 1.
-
-  mass_connect(Pop[nameSrc], Pop[nameTgt], lbl, inDegree, recType[lRecType[0]], W[lRecType[0]], delay, stochastic_delays = stochastic_delays)
-  if type == 'ex':
-    # mirror the AMPA connection with similarly connected NMDA connections
-    mass_mirror(Pop[nameSrc], lbl, recType['NMDA'], W['NMDA'], delay, stochastic_delays = stochastic_delays)
-
-  return W
+    delay = 1.
 
+  return {'type': type, 'src': nameSrc, 'tgt': nameTgt, 'projType': projType, 'source_channels': source_channels,
+          'inDegree': inDegree, 'lRecType': lRecType, 'W': W, 'delay': delay}
 
 #-------------------------------------------------------------------------------
-# Establishes a connexion between two populations, following the results of LG14, in a MultiChannel context
-# type : a string 'ex' or 'in', defining whether it is excitatory or inhibitory
-# nameTgt, nameSrc : strings naming the populations, as defined in NUCLEI list
-# projType : type of projections. For the moment: 'focused' (only channel-to-channel connection) and
-#            'diffuse' (all-to-one with uniform distribution)
-# redundancy, RedundancyType : contrains the inDegree - see function `connect` for details
-# LCGDelays : shall we use the delays obtained by (Liénard, Cos, Girard, in prep) or not (default = True)
-# gain : allows to amplify the weight normally deduced from LG14
-# source_channels : By default with `source_channels=None`, the connection is implemented using all source channels
-#                   Specify a custom list of channels to implement connections only from these channels
-#                   For example, calling successively `connectMC(...,projType='focused',source_channels=[0])` and then `connectMC(...,projType='diffuse',source_channels=[1])` would implement first a focused projection using only source channel 0 and then a diffuse connection using only source channel 1:
-#                   Src channels:   (0) (1)
-#                                    | / |
-#                   Tgt channels:   (0) (1)
+# Decomposes a connexion prepared by `prepare_connection` into `mass_connect` calls
+# diffuseMode: how diffuse multi-channel projections are decomposed
+#   'pairwise': one call per pair of source & target channels, with inDegree/nbTgtChannels
+#   'concatenated': a single call from all the source channels to all the target channels,
+#                   with the same expected in-degree per target neuron
+# Returns the list of (source GIDs, target GIDs, inDegree) of each call, and the list of
+# source GIDs to be used to mirror AMPA connections with NMDA ones
 #-------------------------------------------------------------------------------
-def connectMC(type, nameSrc, nameTgt, projType, redundancy, RedundancyType, LCGDelays=True, gain=1., source_channels = None, stochastic_delays=None, verbose=False):
-
-  def printv(text):
-    if verbose:
-      print(text)
-
-  printv("* connecting "+nameSrc+" -> "+nameTgt+" with "+projType+" "+type+" connection")
+def connection_blocks(conn, diffuseMode='pairwise'):
+  nameSrc = conn['src']
+  nameTgt = conn['tgt']
+  inDegree = conn['inDegree']
+  source_channels = conn['source_channels']
 
   if source_channels == None:
-    # if not specified, assume that the connection originates from all channels
-    source_channels = range(len(Pop[nameSrc]))
-
-  if RedundancyType == 'inDegreeAbs':
-    # inDegree is already provided in the right form
-    inDegree = float(redundancy)
-  elif RedundancyType == 'outDegreeAbs':
-    #### fractional outDegree is expressed as a fraction of max axo-dendritic contacts
-    inDegree = get_frac(1./redundancy, nameSrc, nameTgt, neuronCounts[nameSrc], neuronCounts[nameTgt], verbose=verbose)
-  elif RedundancyType == 'outDegreeCons':
-    #### fractional outDegree is expressed as a ratio of min/max axo-dendritic contacts
-    inDegree = get_frac(redundancy, nameSrc, nameTgt, neuronCounts[nameSrc], neuronCounts[nameTgt], useMin=True, verbose=verbose)
+    return [(Pop[nameSrc], Pop[nameTgt], inDegree)], [Pop[nameSrc]]
+
+  mirrorSources = [Pop[nameSrc][src_channel] for src_channel in source_channels]
+  if conn['projType'] == 'focused': # if projections focused, input come only from the same channel as tgtChannel
+    blocks = [(Pop[nameSrc][src_channel], Pop[nameTgt][src_channel-source_channels[0]], inDegree) for src_channel in source_channels]
+  elif conn['projType'] == 'diffuse' and diffuseMode == 'concatenated':
+    # all the channels are drawn at once: each target neuron receives inDegree/nbTgtChannels inputs from each source channel on average
+    allSources = tuple(gid for src_channel in source_channels for gid in Pop[nameSrc][src_channel])
+    allTargets = tuple(gid for tgt_channel in range(len(Pop[nameTgt])) for gid in Pop[nameTgt][tgt_channel])
+    blocks = [(allSources, allTargets, inDegree * len(source_channels) / len(Pop[nameTgt]))]
+    mirrorSources = [allSources]
+  elif conn['projType'] == 'diffuse': # if projections diffused, input connections are shared among each possible input channel equally
+    blocks = [(Pop[nameSrc][src_channel], Pop[nameTgt][tgt_channel], inDegree/len(Pop[nameTgt])) for src_channel in source_channels for tgt_channel in range(len(Pop[nameTgt]))]
   else:
-    raise KeyError('`RedundancyType` should be one of `inDegreeAbs`, `outDegreeAbs`, or `outDegreeCons`.')
-
-  # check if in degree acceptable (not larger than number of neurons in the source nucleus)
-  if projType == 'focused' and inDegree > nbSim[nameSrc]:
-    printv("/!\ WARNING: required 'in degree' ("+str(inDegree)+") larger than number of neurons in individual source channels ("+str(nbSim[nameSrc])+"), thus reduced to the latter value")
-    inDegree = nbSim[nameSrc]
-  if projType == 'diffuse' and inDegree  > nbSim[nameSrc]*len(source_channels):
-    printv("/!\ WARNING: required 'in degree' ("+str(inDegree)+") larger than number of neurons in the overall source population ("+str(nbSim[nameSrc]*len(source_channels))+"), thus reduced to the latter value")
-    inDegree = nbSim[nameSrc]*len(source_channels)
-
-  if inDegree == 0.:
-    printv("/!\ WARNING: non-existent connection strength, will skip")
-    return
+    blocks = []
+  return blocks, mirrorSources
 
+#-------------------------------------------------------------------------------
+# Creates a connexion prepared by `prepare_connection`
+# diffuseMode: see function `connection_blocks`
+# slim: if True, only the AMPA synapses to be mirrored with NMDA ones are labelled (see function `synapse_spec`)
+# homogeneous: if True, the weight of each receptor is held by a synapse model of its own (see function `homogeneous_model`)
+#-------------------------------------------------------------------------------
+def wire_connection(conn, stochastic_delays=None, verbose=False, diffuseMode='pairwise', slim=False, homogeneous=False):
   global AMPASynapseCounter
 
-  inDegree = inDegree * (float(len(source_channels)) / float(len(Pop[nameSrc])))
-
-  # prepare receptor type lists:
-  if type == 'ex':
-    lRecType = ['AMPA','NMDA']
+  if conn['type'] == 'ex':
     AMPASynapseCounter = AMPASynapseCounter + 1
     lbl = AMPASynapseCounter # needs to add NMDA later
-  elif type == 'AMPA':
-    lRecType = ['AMPA']
-    lbl = 0
-  elif type == 'NMDA':
-    lRecType = ['NMDA']
-    lbl = 0
-  elif type == 'in':
-    lRecType = ['GABA']
-    lbl = 0
   else:
-    raise KeyError('Undefined connexion type: '+type)
+    lbl = 0
 
-  # compute the global weight of the connection, for each receptor type:
-  W = computeW(lRecType, nameSrc, nameTgt, inDegree, gain, verbose=False)
+  rec = conn['lRecType'][0]
+  W = conn['W']
+  delay = conn['delay']
+  models = {}
+  if homogeneous:
+    for r in conn['lRecType']:
+      models[r] = homogeneous_model(conn, r)
 
-  printv("  W="+str(W)+" and inDegree="+str(inDegree))
+  blocks, mirrorSources = connection_blocks(conn, diffuseMode)
+  for srcGIDs, tgtGIDs, inDegree in blocks:
+    mass_connect(srcGIDs, tgtGIDs, lbl, inDegree, recType[rec], W[rec], delay, stochastic_delays = stochastic_delays, slim = slim, synapse_model = models.get(rec))
 
-  ## check whether a connection map has already been drawn or not:
-  #if nameSrc+'->'+nameTgt in ConnectMap:
-  #  #print "Using existing connection map"
-  #  loadConnectMap = True
-  #else:
-  #  #print "Will create a connection map"
-  #  loadConnectMap = False
-  #  ConnectMap[nameSrc+'->'+nameTgt] = [[] for i in range(len(Pop[nameTgt]))]
+  if conn['type'] == 'ex':
+    # mirror the AMPA connection with similarly connected NMDA connections
+    for srcGIDs in mirrorSources:
+      mass_mirror(srcGIDs, lbl, recType['NMDA'], W['NMDA'], delay, stochastic_delays = stochastic_delays, slim = slim, synapse_model = models.get('NMDA'), source_model = models.get('AMPA'))
 
-  # determine which transmission delay to use:
-  if LCGDelays:
-    delay = tau[nameSrc+'->'+nameTgt]
-  else:
-    delay = 1.
+#-------------------------------------------------------------------------------
+# Draws the connections of one `mass_connect` call with numpy, with the same semantics:
+# - each of the `nbTgt` targets receives floor(inDegree) inputs (rule `fixed_indegree`)
+# - the remaining round(frac(inDegree) * nbTgt) inputs are distributed at random (rule `fixed_total_number`)
+# sources are drawn with replacement, as nest does by default (multapses & autapses allowed)
+# Returns the arrays of source and target indices
+#-------------------------------------------------------------------------------
+def draw_indegree(nbSrc, nbTgt, inDegree, rng):
+  integer_inDegree = int(np.floor(inDegree))
+  remaining_connections = int(np.round((inDegree - integer_inDegree) * nbTgt))
+  srcIdx = rng.randint(nbSrc, size=integer_inDegree * nbTgt + remaining_connections)
+  tgtIdx = np.concatenate((np.repeat(np.arange(nbTgt), integer_inDegree), rng.randint(nbTgt, size=remaining_connections)))
+  return srcIdx, tgtIdx
 
-  if projType == 'focused': # if projections focused, input come only from the same channel as tgtChannel
-     for src_channel in source_channels: # for each relevant channel of the Source nucleus
-       mass_connect(Pop[nameSrc][src_channel], Pop[nameTgt][src_channel-source_channels[0]], lbl, inDegree, recType[lRecType[0]], W[lRecType[0]], delay, stochastic_delays = stochastic_delays)
-  elif projType == 'diffuse': # if projections diffused, input connections are shared among each possible input channel equally
-    for src_channel in source_channels: # for each relevant channel of the Source nucleus
-      for tgt_channel in range(len(Pop[nameTgt])): # for each channel of the Target nucleus
-        mass_connect(Pop[nameSrc][src_channel], Pop[nameTgt][tgt_channel], lbl, inDegree/len(Pop[nameTgt]), recType[lRecType[0]], W[lRecType[0]], delay, stochastic_delays = stochastic_delays)
+#-------------------------------------------------------------------------------
+# Draws the delays of `nb` connections: constant, or following the clipped gaussian
+# distribution used by `mass_connect` with stochastic delays
+#-------------------------------------------------------------------------------
+def draw_delays(nb, delay, stochastic_delays, rng):
+  if stochastic_delays == None or delay <= 0:
+    return np.ones(nb) * delay
+  delays = rng.normal(delay, delay * stochastic_delays, size=nb)
+  outside = np.flatnonzero((delays < delay * 0.5) | (delays > delay * 1.5))
+  while len(outside) > 0:
+    # clipped by redrawing, as nest's `normal_clipped`
+    delays[outside] = rng.normal(delay, delay * stochastic_delays, size=len(outside))
+    outside = outside[(delays[outside] < delay * 0.5) | (delays[outside] > delay * 1.5)]
+  return delays
 
-  if type == 'ex':
-    # mirror the AMPA connection with similarly connected NMDA connections
-    for src_channel in source_channels: # for each relevant channel of the Source nucleus
-      mass_mirror(Pop[nameSrc][src_channel], lbl, recType['NMDA'], W['NMDA'], delay, stochastic_delays = stochastic_delays)
+#-------------------------------------------------------------------------------
+# Draws all the synapses of a connexion prepared by `prepare_connection`
+# diffuseMode: see function `connection_blocks`
+# Returns a dictionary {receptor: [sources, targets, weights, delays]} of numpy arrays
+# The NMDA synapses of 'ex' connexions use the same sources, targets & delays as the AMPA ones
+#-------------------------------------------------------------------------------
+def draw_connection(conn, rng, stochastic_delays=None, diffuseMode='pairwise'):
+  blocks, _ = connection_blocks(conn, diffuseMode)
+
+  sources = []
+  targets = []
+  for srcGIDs, tgtGIDs, inDegree in blocks:
+    srcIdx, tgtIdx = draw_indegree(len(srcGIDs), len(tgtGIDs), inDegree, rng)
+    sources.append(np.asarray(srcGIDs)[srcIdx])
+    targets.append(np.asarray(tgtGIDs)[tgtIdx])
+  sources = np.concatenate(sources + [np.zeros(0, dtype=int)])
+  targets = np.concatenate(targets + [np.zeros(0, dtype=int)])
+  delays = draw_delays(len(sources), conn['delay'], stochastic_delays, rng)
+
+  synapses = {}
+  for r in conn['lRecType']:
+    synapses[r] = [sources, targets, np.ones(len(sources)) * conn['W'][r], delays]
+  return synapses
+
+#-------------------------------------------------------------------------------
+# Virtual processes of this MPI process, and VP owning each neuron of `gids`
+# (nest distributes the neurons round-robin over the virtual processes)
+#-------------------------------------------------------------------------------
+def local_vps():
+  nbVP = nest.GetKernelStatus('total_num_virtual_procs')
+  return [vp for vp in range(nbVP) if vp % nest.NumProcesses() == nest.Rank()]
 
-  return W
+def vp_of(gids):
+  return np.asarray(gids) % nest.GetKernelStatus('total_num_virtual_procs')
 
 #-------------------------------------------------------------------------------
-# returns the minimal & maximal numbers of distinct input neurons for one connection
+# Same as `draw_connection`, but the inputs of each target neuron are drawn with the
+# random generator of the virtual process owning that neuron (nstrand.pyRngs), and only
+# for the targets local to this MPI process; the virtual processes are handled in parallel
+# by the threads of `pool`
+# The fractional part of the in-degree is split among all the virtual processes with
+# nstrand.pyMasterRng, identically in all MPI processes
+# The connectivity does not depend on the number of threads used to draw it, but it does
+# depend on the number of virtual processes
 #-------------------------------------------------------------------------------
-def get_input_range(nameSrc, nameTgt, cntSrc, cntTgt, verbose=False):
-  if nameSrc=='CSN' or nameSrc=='PTN':
-    nu = alpha[nameSrc+'->'+nameTgt]
-    nu0 = 0
-    if verbose:
-      print('\tMaximal number of distinct input neurons (nu): '+str(nu))
-      print('\tMinimal number of distinct input neurons     : unknown (set to 0)')
-  else:
-    nu = cntSrc / float(cntTgt) * P[nameSrc+'->'+nameTgt] * alpha[nameSrc+'->'+nameTgt]
-    nu0 = cntSrc / float(cntTgt) * P[nameSrc+'->'+nameTgt]
-    if verbose:
-      print('\tMaximal number of distinct input neurons (nu): '+str(nu))
-      print('\tMinimal number of distinct input neurons     : '+str(nu0))
-  return [nu0, nu]
+def draw_connection_vp(conn, pool, stochastic_delays=None, diffuseMode='pairwise'):
+  blocks, _ = connection_blocks(conn, diffuseMode)
+  nbVP = nest.GetKernelStatus('total_num_virtual_procs')
+
+  jobs = []
+  for srcGIDs, tgtGIDs, inDegree in blocks:
+    tgtGIDs = np.asarray(tgtGIDs)
+    owner = vp_of(tgtGIDs)
+    integer_inDegree = int(np.floor(inDegree))
+    remaining_connections = int(np.round((inDegree - integer_inDegree) * len(tgtGIDs)))
+    split = nstrand.pyMasterRng.multinomial(remaining_connections, np.bincount(owner, minlength=nbVP) / float(len(tgtGIDs)))
+    jobs.append((np.asarray(srcGIDs), tgtGIDs, owner, integer_inDegree, split))
+
+  def draw(vp):
+    rng = nstrand.pyRngs[vp]
+    sources = [np.zeros(0, dtype=int)]
+    targets = [np.zeros(0, dtype=int)]
+    for srcGIDs, tgtGIDs, owner, integer_inDegree, split in jobs:
+      local = tgtGIDs[owner == vp]
+      if len(local) == 0:
+        continue
+      sources.append(srcGIDs[rng.randint(len(srcGIDs), size=integer_inDegree * len(local) + split[vp])])
+      targets.append(np.concatenate((np.repeat(local, integer_inDegree), local[rng.randint(len(local), size=split[vp])])))
+    sources = np.concatenate(sources)
+    return sources, np.concatenate(targets), draw_delays(len(sources), conn['delay'], stochastic_delays, rng)
+
+  drawn = pool.map(draw, local_vps())
+  sources = np.concatenate([d[0] for d in drawn])
+  targets = np.concatenate([d[1] for d in drawn])
+  delays = np.concatenate([d[2] for d in drawn])
+
+  synapses = {}
+  for r in conn['lRecType']:
+    synapses[r] = [sources, targets, np.ones(len(sources)) * conn['W'][r], delays]
+  return synapses
 
 #-------------------------------------------------------------------------------
-# computes the inDegree as a fraction of maximal possible inDegree
-# FractionalOutDegree: outDegree, expressed as a fraction
+# Creates connexions prepared by `prepare_connection` with numpy-drawn connectivity:
+# all the synapses of a target population are created with one array-based
+# `one_to_one` nest.Connect call per receptor
+# rng: numpy RandomState used to draw the connectivity (default: nstrand.pyMasterRng)
+# diffuseMode: see function `connection_blocks`
+# perVP: if True, the connectivity of the local targets is drawn in parallel with the random generators
+#        of their virtual processes (see function `draw_connection_vp`), and `rng` is not used
+# slim: if True, the synapses are not labelled, as they are never mirrored (see function `synapse_spec`)
+# homogeneous: if True, the weight of each receptor of each connexion is held by a synapse model of its own
+#              (see function `homogeneous_model`), and one nest.Connect call is made per connexion and receptor
 #-------------------------------------------------------------------------------
-def get_frac(FractionalOutDegree, nameSrc, nameTgt, cntSrc, cntTgt, useMin=False, verbose=False):
-  if useMin == False:
-    # 'FractionalOutDegree' is taken to be relative to the maximal number of axo-dendritic contacts
-    inDegree = get_input_range(nameSrc, nameTgt, cntSrc, cntTgt, verbose=verbose)[1] * FractionalOutDegree
-  else:
-    # 'FractionalOutDegree' is taken to be relative to the maximal number of axo-dendritic contacts and their minimal number
-    r = get_input_range(nameSrc, nameTgt, cntSrc, cntTgt, verbose=verbose)
-    inDegree = (r[1] - r[0]) * FractionalOutDegree + r[0]
-  if verbose:
-    print('\tConverting the fractional outDegree of '+nameSrc+' -> '+nameTgt+' from '+str(FractionalOutDegree)+' to inDegree neuron count: '+str(round(inDegree, 2))+' (relative to minimal value possible? '+str(useMin)+')')
-  return inDegree
+def wire_connections_bulk(conns, stochastic_delays=None, rng=None, verbose=False, diffuseMode='pairwise', perVP=False, slim=False, homogeneous=False):
+  if rng == None:
+    rng = nstrand.pyMasterRng
+  if perVP:
+    pool = ThreadPool(len(local_vps()))
+
+  targets = []
+  for conn in conns:
+    if conn['tgt'] not in targets:
+      targets.append(conn['tgt'])
+
+  for nameTgt in targets:
+    print '* '+nameTgt+' Inputs'
+    synapses = {}
+    for conn in conns:
+      if conn['tgt'] != nameTgt:
+        continue
+      if perVP:
+        drawn = draw_connection_vp(conn, pool, stochastic_delays, diffuseMode)
+      else:
+        drawn = draw_connection(conn, rng, stochastic_delays, diffuseMode)
+      for r, syn in drawn.iteritems():
+        key = (r, homogeneous_model(conn, r) if homogeneous else None)
+        if key not in synapses:
+          synapses[key] = [[], [], [], []]
+        for i in range(4):
+          synapses[key][i].append(syn[i])
+    for r, model in sorted(synapses.keys()):
+      sources, targetGIDs, weights, delays = [np.concatenate(a) for a in synapses[(r, model)]]
+      if not perVP and nest.NumProcesses() > 1:
+        # all MPI processes draw the same connectivity, but each one only creates the synapses of its local targets
+        local = np.in1d(vp_of(targetGIDs), local_vps())
+        sources, targetGIDs, weights, delays = sources[local], targetGIDs[local], weights[local], delays[local]
+      if len(sources) == 0:
+        continue
+      if verbose:
+        print '  '+str(len(sources))+' '+r+' synapses'
+      if model == None:
+        syn_spec = synapse_spec(0, slim)
+        syn_spec.update({'receptor_type': recType[r], 'weight': weights, 'delay': delays})
+      else:
+        syn_spec = {'model': model, 'receptor_type': recType[r], 'delay': delays}
+      nest.Connect(sources.tolist(), targetGIDs.tolist(), 'one_to_one', syn_spec)
+
+  if perVP:
+    pool.close()
+    pool.join()
 
 #-------------------------------------------------------------------------------
-# computes the weight of a connection, based on LG14 parameters
+# Establishes a connexion between two populations, following the results of LG14
+# type : a string 'ex' or 'in', defining whether it is excitatory or inhibitory
+# nameTgt, nameSrc : strings naming the populations, as defined in NUCLEI list
+# redundancy : value that characterizes the number of repeated axonal contacts from one neuron of Src to one neuron of Tgt (see RedundancyType for interpretation of this value)
+# RedundancyType : string
+#   if 'inDegreeAbs': `redundancy` is the number of neurons from Src that project to a single Tgt neuron
+#   if 'outDegreeAbs': `redundancy` is number of axonal contacts between each neuron from Src onto a single Tgt neuron
+#   if 'outDegreeCons': `redundancy` is a scaled proportion of axonal contacts between each neuron from Src onto a single Tgt neuron given arithmetical constraints, ranging from 0 (minimal number of contacts to achieve required axonal bouton counts) to 1 (maximal number of contacts with respect to population numbers)
+# LCGDelays: shall we use the delays obtained by (Liénard, Cos, Girard, in prep) or not (default = True)
+# gain : allows to amplify the weight normally deduced from LG14
+# slim : if True, the synapses that need no label use the plain static_synapse - see function `synapse_spec`
 #-------------------------------------------------------------------------------
-def computeW(listRecType, nameSrc, nameTgt, inDegree, gain=1.,verbose=False):
-  nu = get_input_range(nameSrc, nameTgt, neuronCounts[nameSrc], neuronCounts[nameTgt], verbose=verbose)[1]
-  if verbose:
-    print '\tCompare with the effective chosen inDegree   :',str(inDegree)
+def connect(type, nameSrc, nameTgt, redundancy, RedundancyType, LCGDelays=True, gain=1., stochastic_delays=None, verbose=False, projType='', slim=False):
+  conn = prepare_connection(type, nameSrc, nameTgt, redundancy, RedundancyType, LCGDelays=LCGDelays, gain=gain, verbose=verbose)
+  if conn == None:
+    return
+  wire_connection(conn, stochastic_delays=stochastic_delays, verbose=verbose, slim=slim)
+  return conn['W']
 
-  # attenuation due to the distance from the receptors to the soma of tgt:
-  attenuation = cosh(LX[nameTgt]*(1-p[nameSrc+'->'+nameTgt])) / cosh(LX[nameTgt])
 
-  w={}
-  for r in listRecType:
-    w[r] = nu / float(inDegree) * attenuation * wPSP[recType[r]-1] * gain
+#-------------------------------------------------------------------------------
+# Establishes a connexion between two populations, following the results of LG14, in a MultiChannel context
+# type : a string 'ex' or 'in', defining whether it is excitatory or inhibitory
+# nameTgt, nameSrc : strings naming the populations, as defined in NUCLEI list
+# projType : type of projections. For the moment: 'focused' (only channel-to-channel connection) and
+#            'diffuse' (all-to-one with uniform distribution)
+# redundancy, RedundancyType : contrains the inDegree - see function `connect` for details
+# LCGDelays : shall we use the delays obtained by (Liénard, Cos, Girard, in prep) or not (default = True)
+# gain : allows to amplify the weight normally deduced from LG14
+# source_channels : By default with `source_channels=None`, the connection is implemented using all source channels
+#                   Specify a custom list of channels to implement connections only from these channels
+#                   For example, calling successively `connectMC(...,projType='focused',source_channels=[0])` and then `connectMC(...,projType='diffuse',source_channels=[1])` would implement first a focused projection using only source channel 0 and then a diffuse connection using only source channel 1:
+#                   Src channels:   (0) (1)
+#                                    | / |
+#                   Tgt channels:   (0) (1)
+# diffuseMode : 'pairwise' (default) or 'concatenated' - see function `connection_blocks` for details
+# slim : if True, the synapses that need no label use the plain static_synapse - see function `synapse_spec`
+#-------------------------------------------------------------------------------
+def connectMC(type, nameSrc, nameTgt, projType, redundancy, RedundancyType, LCGDelays=True, gain=1., source_channels = None, stochastic_delays=None, verbose=False, diffuseMode='pairwise', slim=False):
+  if source_channels == None:
+    # if not specified, assume that the connection originates from all channels
+    source_channels = range(len(Pop[nameSrc]))
 
-  return w
+  conn = prepare_connection(type, nameSrc, nameTgt, redundancy, RedundancyType, LCGDelays=LCGDelays, gain=gain, projType=projType, source_channels=source_channels, verbose=verbose)
+  if conn == None:
+    return
+  wire_connection(conn, stochastic_delays=stochastic_delays, verbose=verbose, diffuseMode=diffuseMode, slim=slim)
+  return conn['W']
 
 #-------------------------------------------------------------------------------
 
 dt = 0.01 # ms
 simDuration = 10000. # in ms
 
-# Acceptable firing rate ranges (FRR) in normal and deactivation experiments
-# extracted from LG14 Table 5
-
-FRRNormal = {'MSN': [0,1],
-             'FSI': [7.8,14.0], # the refined constraint of 10.9 +/- 3.1 Hz was extracted from the following papers: Adler et al., 2016; Yamada et al., 2016 (summarizing date from three different experiments); and Marche and Apicella, 2017
-             'STN': [15.2,22.8],
-             'GPe': [55.7,74.5],
-             'Arky': [55.7,74.5],
-             'Prot': [55.7,74.5],
-             'GPi': [59.1,79.5],
-             }
+# Acceptable firing rate ranges (FRR) in deactivation experiments
+# extracted from LG14 Table 5 (FRRNormal, in normal conditions, is defined in LG14.py)
 
 FRRGPi = {'AMPA+NMDA+GABAA':[53.4,96.8],
           'NMDA':[27.2451,78.6255],
@@ -543,39 +716,12 @@ FRRGPe = {'AMPA':[4.2889,58.7805],
 
 FRRAnt = {'Arky':FRRGPe,'Prot':FRRGPe,'GPe':FRRGPe,'GPi':FRRGPi}
 
-# imported from Chadoeuf "connexweights"
-# All the parameters needed to replicate Lienard model
-#
+# All the parameters needed to replicate Lienard model (imported from Chadoeuf "connexweights")
+# are defined in LG14.py
 #-------------------------
 
-
-# fixed parameters
-A_GABA=-0.25 # mV
-A_AMPA= 1.
-A_NMDA= 0.025
-D_GABA=5./exp(1)   # ms ; /e because Dn is peak half-time in LG14, while it is supposed to be tau_peak in NEST
-D_AMPA=5./exp(1)
-D_NMDA=100./exp(1)
-Ri=200.E-2   # Ohms.m
-Rm=20000.E-4 # Ohms.m^2
-
-if params['splitGPe']:
-  NUCLEI=['MSN','FSI','STN','Arky','Prot','GPi']
-else:
-  NUCLEI=['MSN','FSI','STN','GPe','GPi']
-
-# Number of neurons in the real macaque brain
-# one hemisphere only, based on Hardman et al. 2002 paper, except for striatum & CM/Pf
-neuronCounts={'MSN': 26448.0E3,
-              'FSI':   532.0E3,
-              'STN':    77.0E3,
-              'GPe':   251.0E3,
-              'Arky':  251.0E3,
-              'Prot':  251.0E3,
-              'GPi':   143.0E3,
-              'CMPf':   86.0E3,
-              'CSN': None, 'PTN': None # prevents key error
-             }
+# nuclei of the last BG instantiated (updated in place by instantiate_BG), prefer get_nuclei(params)
+NUCLEI = get_nuclei(params)
 
 # Number of neurons that will be simulated
 nbSim = {'MSN': 0.,
@@ -589,216 +735,11 @@ nbSim = {'MSN': 0.,
          'CSN': 0.,
          'PTN': 0.,}
 
-# P(X->Y): probability that a given neuron from X projects to at least neuron of Y
-P = {'MSN->GPe': 1.,
-     'MSN->Arky': 1.,
-     'MSN->Prot': 1.,
-     'MSN->GPi': 0.82,
-     'MSN->MSN': 1.,
-     
-     'FSI->MSN': 1.,
-     'FSI->FSI': 1.,
-     
-     'STN->GPe':  0.83,
-     'STN->Arky': 0.83,
-     'STN->Prot': 0.83,
-     'STN->GPi':  0.72,
-     'STN->MSN':  0.17,
-     'STN->FSI':  0.17,
-     
-     'GPe->STN': 1.,
-     'GPe->GPe': 0.84,
-     'GPe->GPi': 0.84,
-     'GPe->MSN': 0.16,
-     'GPe->FSI': 0.16,
-
-     'Arky->Arky': 0.84,
-     'Arky->Prot': 0.84,
-     'Arky->MSN': 0.16,
-     'Arky->FSI': 0.16,
-     
-     'Prot->STN': 1.,
-     'Prot->Arky': 0.84,
-     'Prot->Prot': 0.84,
-     'Prot->GPi': 0.84,
-     
-     'CSN->MSN': 1.,
-     'CSN->FSI': 1.,
-     
-     'PTN->MSN': 1.,
-     'PTN->FSI': 1.,
-     'PTN->STN': 1.,
-     
-     'CMPf->STN': 1.,
-     'CMPf->MSN': 1.,
-     'CMPf->FSI': 1.,
-     'CMPf->GPe': 1.,
-     'CMPf->Arky': 1.,
-     'CMPf->Prot': 1.,
-     'CMPf->GPi': 1.,}
-
-# alpha X->Y: average number of synaptic contacts made by one neuron of X to one neuron of Y, when there is a connexion
-# for the moment set from one specific parameterization, should be read from Jean's solution file
-alpha = {'MSN->GPe':   171,
-         'MSN->Arky':   171,
-         'MSN->Prot':   171,
-         'MSN->GPi':   210,
-         'MSN->MSN':   210,
-         
-         'FSI->MSN':  4362,
-         'FSI->FSI':   116,
-         
-         'STN->GPe':   428,
-         'STN->Arky':   428,
-         'STN->Prot':   428,
-         'STN->GPi':   233,
-         'STN->MSN':     0,
-         'STN->FSI':    91,
-         
-         'GPe->STN':    19,
-         'GPe->GPe':    38,
-         'GPe->GPi':    16,
-         'GPe->MSN':     0,
-         'GPe->FSI':   353,
-
-         'Arky->Arky':    38,
-         'Arky->Prot':    38,
-         'Arky->MSN':     0,
-         'Arky->FSI':   353,
-         
-         'Prot->STN':    19,
-         'Prot->Arky':    38,
-         'Prot->Prot':    38,
-         'Prot->GPi':    16,
-         
-         'CSN->MSN':   342, # here, represents directly \nu
-         'CSN->FSI':   250, # here, represents directly \nu
-         
-         'PTN->MSN':     5, # here, represents directly \nu
-         'PTN->FSI':     5, # here, represents directly \nu
-         'PTN->STN':   259, # here, represents directly \nu
-         
-         'CMPf->MSN': 4965,
-         'CMPf->FSI': 1053,
-         'CMPf->STN':   76,
-         'CMPf->GPe':   79,
-         'CMPf->Arky':   79,
-         'CMPf->Prot':   79,
-         'CMPf->GPi':  131,}
-
-# p(X->Y): relative distance on the dendrite from the soma, where neurons rom X projects to neurons of Y
-# Warning: p is not P!
-p = {'MSN->GPe':  0.48,
-     'MSN->Arky':  0.48,
-     'MSN->Prot':  0.48,
-     'MSN->GPi':  0.59,
-     'MSN->MSN':  0.77,
-     
-     'FSI->MSN':  0.19,
-     'FSI->FSI':  0.16,
-     
-     'STN->GPe':  0.30,
-     'STN->Prot':  0.30,
-     'STN->Arky':  0.30,
-     'STN->GPi':  0.59,
-     'STN->MSN':  0.16,
-     'STN->FSI':  0.41,
-     
-     'GPe->STN':  0.58,
-     'GPe->GPe':  0.01,
-     'GPe->GPi':  0.13,
-     'GPe->MSN':  0.06,
-     'GPe->FSI':  0.58,
-
-     'Arky->Arky':  0.01,
-     'Arky->Prot':  0.01,
-     'Arky->MSN':  0.06,
-     'Arky->FSI':  0.58,
-     
-     'Prot->STN':  0.58,
-     'Prot->Arky':  0.01,
-     'Prot->Prot':  0.01,
-     'Prot->GPi':  0.13,
-     
-     'CSN->MSN':  0.95,
-     'CSN->FSI':  0.82,
-     
-     'PTN->MSN':  0.98,
-     'PTN->FSI':  0.70,
-     'PTN->STN':  0.97,
-     
-     'CMPf->STN': 0.46,
-     'CMPf->MSN': 0.27,
-     'CMPf->FSI': 0.06,
-     'CMPf->GPe': 0.00,
-     'CMPf->Arky': 0.00,
-     'CMPf->Prot': 0.00,
-     'CMPf->GPi': 0.48,}
-
-# electrotonic constant L computation:
-dx={'MSN':1.E-6,'FSI':1.5E-6,'STN':1.5E-6,'GPe':1.7E-6,'Arky':1.7E-6,'Prot':1.7E-6,'GPi':1.2E-6}
-lx={'MSN':619E-6,'FSI':961E-6,'STN':750E-6,'GPe':865E-6,'Arky':865E-6,'Prot':865E-6,'GPi':1132E-6}
-LX={}
-for n in NUCLEI:
-    LX[n]=lx[n]*sqrt((4*Ri)/(dx[n]*Rm))
-
-# tau: communication delays
-tau = {'MSN->GPe':    7.,
-       'MSN->Arky':    7.,
-       'MSN->Prot':    7.,
-       'MSN->GPi':   11.,
-       'MSN->MSN':    1.,
-       
-       'FSI->MSN':    1.,
-       'FSI->FSI':    1.,
-       
-       'STN->GPe':    3.,
-       'STN->Arky':    3.,
-       'STN->Prot':    3.,
-       'STN->GPi':    3.,
-       'STN->MSN':    3.,
-       'STN->FSI':    3.,
-       
-       'GPe->STN':   10.,
-       'GPe->GPe':    1.,
-       'GPe->GPi':    3.,
-       'GPe->MSN':    3.,
-       'GPe->FSI':    3.,
-       
-       'Arky->Arky':    1.,
-       'Arky->Prot':    1.,
-       'Arky->MSN':    3.,
-       'Arky->FSI':    3.,
-       
-       'Prot->STN':   10.,
-       'Prot->Arky':    1.,
-       'Prot->Prot':    1.,
-       'Prot->GPi':    3.,
-       
-       'CSN->MSN':    7.,
-       'CSN->FSI':    7.,
-       
-       'PTN->MSN':    3.,
-       'PTN->FSI':    3.,
-       'PTN->STN':    3.,
-       
-       'CMPf->MSN':   7.,
-       'CMPf->FSI':   7.,
-       'CMPf->STN':   7.,#4
-       'CMPf->GPe':   7.,#5
-       'CMPf->Arky':   7.,#5
-       'CMPf->Prot':   7.,#5
-       'CMPf->GPi':   7.,#6
-       }
-
-
 # setting the 3 input ports for AMPA, NMDA and GABA receptor types
 #-------------------------
 
 nbPorts = 3
-recType = {'AMPA':1,'NMDA':2,'GABA':3}
 tau_syn = [D_AMPA, D_NMDA, D_GABA]
-wPSP = [A_AMPA, A_NMDA, A_GABA]  # PSP amplitude (mV) ; A in LG14 notation
 
 # parameterization of each neuronal type
 #-------------------------
@@ -862,7 +803,10 @@ BGparams = {'MSN':MSNparams,
 
 Pop = {}
 Fake= {} # Fake contains the Poisson Generators, that will feed the parrot_neurons, stored in Pop
+Replayed = [] # spike generators replaying pre-generated input spike trains, see `create_replay`
 ConnectMap = {} # when connections are drawn, in "create()", they are stored here so as to be re-usable
+HomogeneousModels = {} # (source, target, receptor): names of the synapse models holding the weights of the projections, see `homogeneous_model`
+WarmState = {} # state of the neurons after the stabilization offset, see `capture_state`
 
 # the dictionary used to store the desired discharge rates of the various Poisson generators that will be used as external inputs
 rate = {'CSN':   2.  ,
@@ -172,13 +172,38 @@ params = {
 
 'parrotCMPf' :                True, # Should the CMPf be simulated using parrot neurons?
 'stochastic_delays':          None, # If specified, gives the relative sd of a clipped Gaussian distribution for the delays
+'connectOrder':           'legacy', # Order in which the projections are created: 'legacy' (historical order of connectBG, reproduces previous connection maps) or 'grouped' (by target population and receptor)
+'connectBackend':           'nest', # How the connectivity is drawn: 'nest' (fixed_indegree/fixed_total_number rules, one Connect call per channel pair) 'numpy' (same rules drawn with numpy, one array-based Connect call per target population and receptor) or 'numpyVP' (as 'numpy', drawn in parallel by each virtual process for its local targets)
+'diffuseMode':          'pairwise', # Multi-channel diffuse projections: 'pairwise' (one draw per pair of source & target channels) or 'concatenated' (a single draw over all channels, same expected in-degree)
+'slimSynapses':              False, # Use the plain static_synapse (no per-synapse label) for all the synapses that are not mirrored afterwards: inhibitory and single-receptor projections, NMDA mirrors and the numpy backends
+'homogeneousSynapses':       False, # Create each projection with a copy of static_synapse_hom_w per receptor: the weight is stored once per projection instead of once per synapse, and deactivations change it at once
+'replayInputs':              False, # Pre-generate the CSN/PTN/CMPf spike trains once per nestSeed and replay them identically in every condition (constant input rates only)
+'replayCache':                None, # If specified, directory where the pre-generated spike trains are stored, and memory-mapped from when reused
+'compactInputs':             False, # Feed the CSN/PTN/CMPf parrot neurons with a single Poisson generator per population/channel (statistically equivalent, fewer nodes; refused by the tests activating a part of the inputs, e.g. testGPR01)
+'GeorgopoulosSweep':         False, # testGPR01: rotate the preferred direction of the inputs over all channels of a single network, and write the tuning matrices for polarPlot.py
+'warmStart':                 False, # Capture the membrane potentials after the 1000 ms stabilization offset of the first condition, and start the following conditions from them with a shorter offset
+'warmStartOffset':            100., # ms, stabilization offset of the conditions restored from the warm-start state (synaptic currents and spikes in flight are rebuilt)
+'ensembleSize':                  8, # testEnsemble: number of BG instances (successive nestSeed & pythonSeed values) simulated side by side in a single nest kernel
+'calibrationPoints':             8, # calibrateIe: number of replicas (I_e values) of each nucleus simulated at once per iteration
+'calibrationMaxIter':           12, # calibrateIe: maximal number of iterations of the I_e search
+'restOnly':                  False, # testPlausibility: score the activities at rest only, without the deactivation tests
+'halvingTSimu':              1000., # run.py --halving: time duration of the rest-only simulations of the first rung
+'halvingFraction':            0.25, # run.py --halving: fraction of the candidates promoted to the next rung
+'halvingSeeds':                  3, # run.py --halving: number of additional seeds (nestSeed & pythonSeed) of the candidates of the last rung
+'samplingDesign':           'grid', # run.py: exploration of the parameters given as ranges (min, max): 'lhs' (latin hypercube) or 'sobol' (see samplingDesigns.py); 'grid': lists only
+'nbSamples':                   128, # run.py: number of points of the sampling design (crossed with the list-valued parameters)
+'samplingSeed':                  1, # run.py: seed of the latin hypercube designs
+'runCache':                   None, # run.py: if specified, directory of the results of the runs already simulated, which are not simulated again (see runCache.py)
 # For convenience, a few simulator variables are also set here
 'whichTest':          'testFullBG', # task to be run (default: test the plausibility through deactivation simulations)
 'nestSeed':                     20, # nest seed (affects input poisson spike trains)
 'pythonSeed':                   10, # python seed (affects connection map)
 'nbcpu':                         1, # number of CPUs to be used by nest
 'durationH':                  '08', # max duration of a simulation, used by Sango cluster
-'nbnodes':                     '1', # number of nodes, used by K computer
+'nbnodes':                     '1', # number of nodes, used by K computer, or number of MPI processes started with mpirun on the Local platform
 'tSimu':                     5000., # time duration of one simulation
+'memPerCpuMax':                5000, # MB, largest memory per cpu that can be requested on Sango (--mem-per-cpu), see memoryEstimate.py
+'nbcpuMax':                     24, # largest number of cpus per task on Sango; configurations needing more memory are refused
+'memMargin':                  1.25, # safety factor applied to the memory estimate of memoryEstimate.py
 }
 
@@ -0,0 +1,157 @@
+#!/apps/free/python/2.7.10/bin/python
+#-------------------------------------------------------------------------------
+# Automatic search of the input currents IeMSN..IeGPi which bring the rate of each nucleus inside FRRNormal
+# Each nucleus is simulated alone (see testSinglePop.calibrate), with the inputs it receives in the BG model
+# (same projections, in-degrees and gains), the other nuclei being replaced by fake populations firing at
+# their target rates (see the `rate` dictionary): the currents found are those of the BG at its fixed point
+# At each iteration, params['calibrationPoints'] replicas of each nucleus not calibrated yet are simulated at
+# once, over an I_e bracket refined around the secant estimate of the target rate (middle of FRRNormal)
+# The first iterations use short simulations, the duration doubling at each iteration up to params['tSimu']:
+# a nucleus is calibrated when its rate is inside FRRNormal with the longest simulation
+# The currents found are written, with the parameters differing from baseParams.py, in a file ready to be
+# used with run.py --custom (calibratedIe_LG14_<LG14modelID>.py)
+#
+# usage: python calibrateIe.py [custom.py]
+#   custom.py: file defining the `params` overriding the defaults, as with run.py --custom
+# Only single-channel BG models are calibrated (nbCh and nbCues are ignored)
+#-------------------------------------------------------------------------------
+from testSinglePop import *
+from iniBG import check_params
+from projections import *
+import baseParams
+
+ieHalfRange = 10. # pA, half-width of the initial I_e bracket, around the current value of params['Ie'+N]
+ieMinStep = 0.05 # pA, smallest step between the I_e values of the replicas
+minDuration = 250. # ms, duration of the shortest simulations
+
+#-------------------------------------------------------------------------------
+# Inputs of nucleus N in the BG model `params`, in the format of singlePopSetup (see testSinglePop.py)
+#-------------------------------------------------------------------------------
+def model_setup(params, N):
+  inputs = []
+  gains = {}
+  for row in projection_table(params, alpha):
+    if row['tgt'] != N:
+      continue
+    if row['src'].startswith('Fake_'):
+      raise NotImplementedError('The fake recurrent collaterals of '+N+' can not be calibrated')
+    inDegree = get_indegree(row['src'], N, row['redundancy'], params['RedundancyType'], params['nb'+row['src']])
+    if inDegree == 0.:
+      continue
+    inputs.append((row['type'], row['src'], params['nb'+row['src']], inDegree))
+    gains[row['src']] = row['gain']
+  return {'nbSim': params['nb'+N], 'Ie': params['Ie'+N], 'G': 1., 'inputs': inputs, 'gains': gains}
+
+#-------------------------------------------------------------------------------
+# Durations of the simulations of the successive iterations: doubling up to params['tSimu']
+#-------------------------------------------------------------------------------
+def durations(params):
+  d = [params['tSimu']]
+  while d[0] / 2. >= minDuration:
+    d.insert(0, d[0] / 2.)
+  return d
+
+#-------------------------------------------------------------------------------
+# I_e values of the replicas of the next iteration, from the `rates` obtained with the values `Ie`
+# If the target rate is outside the rates obtained, the bracket is moved towards it (and widened),
+# otherwise it is narrowed to the step between the simulated values, around the secant estimate
+#-------------------------------------------------------------------------------
+def next_points(Ie, rates, target, nbPoints):
+  order = np.argsort(Ie)
+  Ie = np.asarray(Ie, dtype=float)[order]
+  rates = np.asarray(rates, dtype=float)[order]
+  width = Ie[-1] - Ie[0]
+  if rates[-1] < target:
+    return np.linspace(Ie[-1], Ie[-1] + 2*width, nbPoints)
+  if rates[0] > target:
+    return np.linspace(Ie[0] - 2*width, Ie[0], nbPoints)
+  i = min(np.flatnonzero(rates <= target)[-1], len(Ie)-2)
+  if rates[i+1] > rates[i]:
+    estimate = Ie[i] + (target - rates[i]) * (Ie[i+1] - Ie[i]) / (rates[i+1] - rates[i])
+  else:
+    estimate = (Ie[i] + Ie[i+1]) / 2.
+  halfWidth = max(Ie[i+1] - Ie[i], ieMinStep * (nbPoints-1)) / 2.
+  return np.linspace(estimate - halfWidth, estimate + halfWidth, nbPoints)
+
+#-------------------------------------------------------------------------------
+# Searches the input current of each nucleus of the BG model `params`
+# Returns the dictionaries {N: I_e} of the best currents found, {N: rate} of the rates they give
+# with the longest simulation, and the list of the nuclei whose rate is inside FRRNormal
+#-------------------------------------------------------------------------------
+def calibrate_Ie(params):
+  params = dict(params, nbCh=1)
+  params.pop('nbCues', None)
+  check_params(params)
+  loadLG14params(params['LG14modelID'])
+  loadThetaFromCustomparams(params)
+
+  nuclei = get_nuclei(params)
+  setups = dict((N, model_setup(params, N)) for N in nuclei)
+  points = dict((N, np.linspace(params['Ie'+N] - ieHalfRange, params['Ie'+N] + ieHalfRange, params['calibrationPoints'])) for N in nuclei)
+  bestIe = dict((N, params['Ie'+N]) for N in nuclei)
+  bestRate = {}
+  calibrated = []
+  schedule = durations(params)
+
+  for it in range(params['calibrationMaxIter']):
+    simDuration = schedule[min(it, len(schedule)-1)]
+    final = it >= len(schedule)-1
+    for N in [N for N in nuclei if N not in calibrated]:
+      print '\n### Iteration',it+1,':',N,'with I_e in [',points[N][0],',',points[N][-1],'] during',simDuration,'ms ###'
+      rates = calibrate(N, [{'Ie': x} for x in points[N]], simDuration=simDuration, setup=setups[N])
+      FRR = FRRNormal[N]
+      target = (FRR[0] + FRR[1]) / 2.
+      best = int(np.argmin(np.abs(np.asarray(rates) - target)))
+      print '*',N,'- best I_e:',points[N][best],'pA, rate:',rates[best],'Hz (',FRR[0],',',FRR[1],')'
+      if final:
+        bestIe[N] = round(points[N][best], 2)
+        bestRate[N] = rates[best]
+        if FRR[0] <= rates[best] <= FRR[1]:
+          calibrated.append(N)
+          continue
+      points[N] = next_points(points[N], rates, target, params['calibrationPoints'])
+    if len(calibrated) == len(nuclei):
+      break
+
+  return bestIe, bestRate, calibrated
+
+#-------------------------------------------------------------------------------
+# Writes a parameter file for run.py --custom: the parameters of `params` differing from baseParams.py,
+# and the calibrated currents `Ie`
+#-------------------------------------------------------------------------------
+def write_params(fileName, params, Ie, rates):
+  custom = dict((k, v) for k, v in params.iteritems() if k != 'sweepPoints' and baseParams.params.get(k) != v)
+  custom.update(('Ie'+N, i) for N, i in Ie.iteritems())
+  with open(fileName, 'w') as f:
+    f.write('# Input currents calibrated by calibrateIe.py for LG14 parameterization #'+str(params['LG14modelID'])+'\n')
+    f.write('# rates of the isolated nuclei: '+', '.join(N+' %.2f Hz' % (rates[N]) for N in get_nuclei(params) if N in rates)+'\n\n')
+    f.write('params = {\n')
+    for k in sorted(custom.keys()):
+      f.write(('%-30s %s,\n') % ("'"+k+"':", repr(custom[k])))
+    f.write('}\n')
+
+#---------------------------
+def main():
+  nest.set_verbosity("M_WARNING")
+  if len(sys.argv) >= 2:
+    # custom parameters, loaded as run.py does
+    custom = {}
+    exec(open(sys.argv[1]).read(), custom)
+    params.update(custom['params'])
+
+  Ie, rates, calibrated = calibrate_Ie(params)
+
+  print "******************"
+  for N in get_nuclei(params):
+    print '* '+N+': I_e = '+str(Ie[N])+' pA, rate: '+str(rates.get(N))+' Hz -> '+('OK' if N in calibrated else 'NO!')
+  print "******************"
+
+  if not is_root():
+    return # the results are the same in all MPI processes
+  fileName = 'calibratedIe_LG14_'+str(params['LG14modelID'])+'.py'
+  write_params(fileName, params, Ie, rates)
+  print 'Parameters written in',fileName,'(to be used with run.py --custom '+fileName+')'
+
+#---------------------------
+if __name__ == '__main__':
+  main()
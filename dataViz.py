@@ -1,15 +1,17 @@
 #!/apps/free/python/2.7.10/bin/python
 import sys
+import numpy as np
 import nest.raster_plot
+from spikeIO import load_spikes
 
-# This script loads the data in the gdf files produced by nest, 
+# This script loads the data in the gdf files produced by nest,
 # and then uses the raster_plot module to plot the neural activity.
-# first argument : ID of the files, first four digits chosen by nest when saving the gdf files
-#                  example: file MSN-89621-00.gdf => ID = 8962
-# second argument: nb of CPUs used, i.e., number of gdf files
+# first argument : directory of the gdf files (default: log/)
+#                  all the per-VP files of each nucleus are found there, example: MSN-89621-00.gdf, MSN-89621-01.gdf...
+# second argument: optional deactivation experiment to plot, example: GPe_AMPA_ (default: rest)
 
 
-NUCLEI={'MSN':1,'FSI':2,'STN':3,'GPe':4,'GPi':5}
+NUCLEI=['MSN','FSI','STN','GPe','GPi']
 
 deactivationList = []
 for a in ['AMPA','AMPA+GABAA','NMDA','GABAA']:
@@ -17,32 +19,21 @@ for a in ['AMPA','AMPA+GABAA','NMDA','GABAA']:
 for a in ['AMPA+NMDA+GABAA','AMPA','NMDA+AMPA','NMDA','GABAA']:
   deactivationList.append('GPi_'+a+'_')
 
-dataFileNames={'MSN':{},'FSI':{},'STN':{},'GPe':{},'GPi':{}}
-
-nbCPUs = 10
+dataPath = 'log/'
+prefix = ''
 if len(sys.argv) >= 2:
-  fstr = '-'+sys.argv[1]
+  dataPath = sys.argv[1]
   if len(sys.argv) >= 3:
-    nbCPUs = int(sys.argv[2])
-else:
-  print "please provide file ID"
-  exit()
-
-for N,I in NUCLEI.iteritems():
-  dataFileNames[N]['none']=[]
-  for i in range(nbCPUs):
-    dataFileNames[N]['none'].append(N+fstr+str(I)+'-0'+str(i)+'.gdf')
-  print dataFileNames[N]['none']
-
-for d in deactivationList:
-  for N,I in NUCLEI.iteritems():
-    dataFileNames[N][d]=[]
-    for i in range(nbCPUs):
-      dataFileNames[N][d].append(d+N+fstr+str(I)+'-0'+str(i)+'.gdf')
+    prefix = sys.argv[2]
+    if prefix not in deactivationList:
+      print "unknown deactivation experiment",prefix,"- should be one of",deactivationList
+      exit()
 
 #-----------
 
-for N,I in NUCLEI.iteritems():
-  nest.raster_plot.from_file(dataFileNames[N]['none'],hist=True,title=N)
+for N in NUCLEI:
+  gids, times = load_spikes(dataPath, prefix+N)
+  if len(gids) > 0:
+    nest.raster_plot.from_data(np.column_stack((gids, times)),hist=True,title=prefix+N)
 
 nest.raster_plot.show()
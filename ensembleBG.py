@@ -0,0 +1,170 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+##
+## ensembleBG.py
+##
+## Ensemble mode: K independent BG networks (different parameterizations or seeds) are instantiated
+## side by side in a single nest kernel and simulated at once, which uses the threads of a many-core
+## node much better than K separate runs of a few thousand neurons each.
+## Each instance keeps its own Pop/Fake/nbSim dictionaries; a single spike detector per nucleus records
+## all the instances, and the spikes are sent back to their instance according to the GID of the sender.
+## The instances are built one after the other with the usual createBG/connectBG, so the module-level
+## dictionaries of LGneurons hold the last instance built, or the one given to `select_instance`.
+
+from iniBG import *
+
+# parameters that must be the same for all the instances of an ensemble (one kernel, one simulation)
+ensembleCommonParams = ['splitGPe', 'nbcpu', 'tSimu', 'warmStart', 'warmStartOffset']
+
+#------------------------------------------
+# Makes `instance` the current BG network: its populations are copied in the module-level
+# dictionaries, so that functions like `deactivate` or `reactivate` (called with instance['params']) act on it
+#------------------------------------------
+def select_instance(instance):
+  for current, saved in [(Pop, instance['Pop']), (Fake, instance['Fake']),
+                         (nbSim, instance['nbSim']), (HomogeneousModels, instance['HomogeneousModels'])]:
+    saved = dict(saved) # `saved` may be `current` itself
+    current.clear()
+    current.update(saved)
+
+#------------------------------------------
+# Instantiates one BG network per parameter dictionary of `paramsList`, in the same kernel
+# The connection maps of each instance are drawn with its own nestSeed & pythonSeed, but the
+# Poisson inputs are drawn from the kernel generators during the common simulation, so an instance
+# does not reproduce the spikes of the same network simulated alone
+# With params['replayInputs'], the instances sharing a nestSeed receive the same input spike trains
+# Returns the list of the instances {'params', 'Pop', 'Fake', 'nbSim', 'HomogeneousModels', 'base_weights'}
+#------------------------------------------
+def instantiate_ensemble(paramsList, antagInjectionSite='none', antag=''):
+  for p in paramsList:
+    check_params(p)
+    for k in ensembleCommonParams:
+      if p[k] != paramsList[0][k]:
+        raise ValueError('All the instances of an ensemble should have the same `'+k+'`')
+
+  nest.ResetKernel()
+  del Replayed[:]
+  HomogeneousModels.clear()
+  WarmState.clear()
+  nest.SetKernelStatus({'local_num_threads': paramsList[0]['nbcpu'], "data_path": 'log/'})
+  initNeurons()
+  NUCLEI[:] = get_nuclei(paramsList[0])
+
+  instances = []
+  for i, p in enumerate(paramsList):
+    print '\n### Ensemble instance',i+1,'/',len(paramsList),'###'
+    # start from an empty network
+    select_instance({'Pop': {}, 'Fake': {}, 'nbSim': dict((N, 0.) for N in nbSim.keys()), 'HomogeneousModels': {}})
+    nstrand.set_seed(p['nestSeed'], p['pythonSeed'])
+    print '/!\ Using the following LG14 parameterization',p['LG14modelID']
+    loadLG14params(p['LG14modelID'])
+    loadThetaFromCustomparams(p)
+    createBG(p)
+    base_weights = connectBG(p, antagInjectionSite, antag)
+    instances.append({'params': dict(p), 'Pop': dict(Pop), 'Fake': dict(Fake), 'nbSim': dict(nbSim),
+                      'HomogeneousModels': dict(HomogeneousModels), 'base_weights': base_weights})
+  return instances
+
+#------------------------------------------
+# GIDs of the neurons of population N in an instance
+#------------------------------------------
+def instance_gids(instance, N):
+  if instance['params']['nbCh'] == 1:
+    return list(instance['Pop'][N])
+  return [gid for channel in instance['Pop'][N] for gid in channel]
+
+#------------------------------------------
+# Number of spikes of each instance among the spikes sent by `senders` (GIDs of population N)
+#------------------------------------------
+def demux_counts(senders, instances, N):
+  gids = [np.asarray(instance_gids(instance, N)) for instance in instances]
+  first = min(g.min() for g in gids)
+  owner = np.zeros(max(g.max() for g in gids) - first + 1, dtype=int)
+  for i, g in enumerate(gids):
+    owner[g - first] = i
+  return np.bincount(owner[np.asarray(senders, dtype=int) - first], minlength=len(instances))
+
+#------------------------------------------
+# Ensemble version of checkAvgFR (testPlausibility.py): simulates all the instances at once, and
+# scores the firing rates of each instance exactly as checkAvgFR does
+# The rates of each instance are stored in instance['expeRate'] and written in log/firingRates.csv
+# Returns the list of the [score obtained, maximal score] of each instance
+#------------------------------------------
+def checkAvgFR_ensemble(instances, antagInjectionSite='none', antag=''):
+  nest.ResetNetwork()
+  initNeurons()
+  rewind_inputs() # common input spike trains across conditions, when they are replayed
+
+  dataPath='log/'
+  nest.SetKernelStatus({"overwrite_files":True}) # when we redo the simulation, we erase the previous traces
+
+  nstrand.set_seed(instances[0]['params']['nestSeed'], instances[0]['params']['pythonSeed']) # sets the seed for the simulation
+
+  simulationOffset = nest.GetKernelStatus('time')
+  print('Simulation Offset: '+str(simulationOffset))
+  if instances[0]['params']['warmStart'] and restore_state():
+    # starts from the state captured at the end of the stabilization of a previous condition
+    offsetDuration = instances[0]['params']['warmStartOffset']
+  else:
+    offsetDuration = 1000.
+  simDuration = instances[0]['params']['tSimu'] # ms
+  nuclei = get_nuclei(instances[0]['params'])
+
+  antagStr = ''
+  if antagInjectionSite != 'none':
+    antagStr = antagInjectionSite+'_'+antag+'_'
+
+  # a single detector per nucleus, recording in memory the spikes of all the instances
+  spkDetect={}
+  for N in nuclei:
+    spkDetect[N] = nest.Create("spike_detector", params={"withgid": True, "withtime": True, "label": antagStr+N, "to_file": False, "to_memory": True, 'start':offsetDuration+simulationOffset,'stop':offsetDuration+simDuration+simulationOffset})
+    for instance in instances:
+      nest.Connect(instance_gids(instance, N), spkDetect[N])
+
+  if instances[0]['params']['warmStart'] and len(WarmState) == 0:
+    nest.Simulate(offsetDuration)
+    capture_state([gid for instance in instances for N in nuclei for gid in instance_gids(instance, N)])
+    nest.Simulate(simDuration)
+  else:
+    nest.Simulate(simDuration+offsetDuration)
+
+  counts = dict((N, demux_counts(gather_events(spkDetect[N], 'senders'), instances, N)) for N in nuclei)
+
+  scores = []
+  lines = []
+  for i, instance in enumerate(instances):
+    p = instance['params']
+    expeRate = {}
+    score = 0
+    frstr = "#" + str(p['LG14modelID'])+ " , " + antagInjectionSite + ', ' + (antag if antagInjectionSite != 'none' else 'none') + ' , '
+    print '----- RESULTS of instance',i,'(LG14modelID',p['LG14modelID'],', nestSeed',p['nestSeed'],', pythonSeed',p['pythonSeed'],') -----'
+    for N in nuclei:
+      expeRate[N] = counts[N][i] / float(instance['nbSim'][N]*simDuration*p['nbCh']) * 1000
+      if antagInjectionSite == 'none':
+        FRR = FRRNormal[N]
+      elif N == antagInjectionSite:
+        FRR = FRRAnt[N][antag]
+      else:
+        FRR = None
+      if FRR == None:
+        print '* '+N+' - Rate: '+str(expeRate[N])+' Hz'
+      else:
+        strTestPassed = 'NO!'
+        if expeRate[N] <= FRR[1] and expeRate[N] >= FRR[0]:
+          # if the measured rate is within acceptable values
+          strTestPassed = 'OK'
+          score += 1
+        print '* '+N+' - Rate: '+str(expeRate[N])+' Hz -> '+strTestPassed+' ('+str(FRR[0])+' , '+str(FRR[1])+')'
+      frstr += '%f , ' %(expeRate[N])
+    instance['expeRate'] = expeRate
+    scores.append([score, 5 if antagInjectionSite == 'none' else 1])
+    lines.append(frstr+'\n')
+
+  if is_root():
+    # the rates are the same in all MPI processes, only one of them writes them
+    firingRatesFile=open(dataPath+'firingRates.csv','a')
+    firingRatesFile.writelines(lines)
+    firingRatesFile.close()
+
+  return scores
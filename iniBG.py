@@ -4,7 +4,7 @@
 import nstrand
 
 from LGneurons import *
-from modelParams import *
+from projections import *
 import nest.raster_plot
 import nest.voltage_trace
 import pylab as pl
@@ -12,11 +12,16 @@ import sys
 
 import csv
 
+# tests which change the rates of the inputs during the simulation, for a random part of the input neurons:
+# not compatible with replayInputs nor compactInputs
+rateChangingTests = ['testGPR01', 'testChannelBG']
 
 #------------------------------------------
 # Creates the populations of neurons necessary to simulate a BG circuit
+# The parameters are always passed explicitly (`params` dictionary, see baseParams.py), so that
+# the BG can be instantiated with many different parameterizations in the same process
 #------------------------------------------
-def createBG():
+def createBG(params):
   #==========================
   # Creation of neurons
   #-------------------------
@@ -69,267 +74,137 @@ def createBG():
   update_Ie('GPi')
 
   parrot = True # switch to False at your risks & perils...
+  if params['replayInputs']:
+    if params['whichTest'] in rateChangingTests:
+      raise ValueError(params['whichTest']+' changes the rates of the inputs: replayInputs (constant input rates only) can not be used')
+    # the input spike trains are drawn once per seed and replayed identically in each condition
+    replay = {'seed': params['nestSeed'], 'duration': 1000. + params['tSimu'], 'cachePath': params['replayCache']}
+  else:
+    replay = None
+  # one Poisson generator per population (or channel) feeding all its parrot neurons
+  shared = params['compactInputs']
+  if shared and params['whichTest'] in rateChangingTests:
+    raise ValueError(params['whichTest']+' activates a part of the input neurons: compactInputs (one Poisson generator per channel) can not be used')
   nbSim['CSN'] = params['nbCSN']
   if 'nbCues' in params.keys():
     # cue channels are present
     CSNchannels = params['nbCh']+params['nbCues']
   else:
     CSNchannels = params['nbCh']
-  create_pop('CSN', nbCh=CSNchannels, fake=True, parrot=parrot)
+  create_pop('CSN', nbCh=CSNchannels, fake=True, parrot=parrot, replay=replay, shared=shared)
 
   nbSim['PTN'] = params['nbPTN']
-  create_pop('PTN', fake=True, parrot=parrot)
+  create_pop('PTN', fake=True, parrot=parrot, replay=replay, shared=shared)
 
   nbSim['CMPf'] = params['nbCMPf']
-  create_pop('CMPf', fake=True, parrot=params['parrotCMPf']) # was: False
+  create_pop('CMPf', fake=True, parrot=params['parrotCMPf'], replay=replay, shared=shared) # was: False
 
   print "Number of simulated neurons:", nbSim
 
 #------------------------------------------
 # Connects the populations of a previously created multi-channel BG circuit
+# The projections are described by the table of `projections.py`, where antagonist
+# injections are receptor masks; all the weights and in-degrees are computed before
+# any connection is created
+# With params['connectOrder'] == 'grouped', the connections are created grouped by
+# target population and receptor instead of the historical order (which gives
+# different connection maps for the same seed)
+# With params['connectBackend'] == 'numpy', the connectivity is drawn with numpy
+# and created with one nest.Connect call per target population and receptor
+# With params['diffuseMode'] == 'concatenated', each diffuse projection is drawn at once
+# over all the channels instead of channel pair by channel pair
+# With params['slimSynapses'], only the AMPA synapses to be mirrored with NMDA ones are labelled
+# With params['homogeneousSynapses'], the weight of each projection and receptor is held by a synapse
+# model of its own instead of each synapse (see `homogeneous_model`)
 #------------------------------------------
-def connectBG(antagInjectionSite,antag):
-
-  # single or multi-channel?
-  if params['nbCh'] == 1:
-    connect_pop = lambda *args, **kwargs: connect(*args, RedundancyType=params['RedundancyType'], stochastic_delays=params['stochastic_delays'], **kwargs)
-  else:
-    def connect_pop(*args, **kwargs):
-      if 'source_channels' not in kwargs.keys():
-        # enforce the default
-        kwargs['source_channels'] = range(params['nbCh'])
-      return connectMC(*args, RedundancyType=params['RedundancyType'], stochastic_delays=params['stochastic_delays'], **kwargs)
+def connectBG(params, antagInjectionSite, antag):
 
   #-------------------------
   # connection of populations
   #-------------------------
   print '\nConnecting neurons\n================'
   print "**",antag,"antagonist injection in",antagInjectionSite,"**"
-  print '* MSN Inputs'
-  if 'nbCues' not in params.keys():
-    # usual case: CSN have as the same number of channels than the BG nuclei
-    CSN_MSN = connect_pop('ex','CSN','MSN', projType=params['cTypeCSNMSN'], redundancy=params['redundancyCSNMSN'], gain=params['GCSNMSN'])
-  else:
-    # special case: extra 'cue' channels that target MSN
-    CSN_MSN = connect_pop('ex','CSN','MSN', projType=params['cTypeCSNMSN'], redundancy=params['redundancyCSNMSN'], gain=Params['GCSNMSN']/2., source_channels=range(params['nbCh']))
-    connect_pop('ex','CSN','MSN', projType='diffuse', redundancy=params['redundancyCSNMSN'], gain=params['GCSNMSN']/2., source_channels=range(params['nbCh'], params['nbCh']+params['nbCues']))
-  PTN_MSN = connect_pop('ex','PTN','MSN', projType=params['cTypePTNMSN'], redundancy= params['redundancyPTNMSN'], gain=params['GPTNMSN'])
-  CMPf_MSN = connect_pop('ex','CMPf','MSN',projType=params['cTypeCMPfMSN'],redundancy= params['redundancyCMPfMSN'],gain=params['GCMPfMSN'])
-  connect_pop('in','MSN','MSN', projType=params['cTypeMSNMSN'], redundancy= params['redundancyMSNMSN'], gain=params['GMSNMSN'])
-  connect_pop('in','FSI','MSN', projType=params['cTypeFSIMSN'], redundancy= params['redundancyFSIMSN'], gain=params['GFSIMSN'])
-  # some parameterizations from LG14 have no STN->MSN or GPe->MSN synaptic contacts
-  if alpha['STN->MSN'] != 0:
-    print "alpha['STN->MSN']",alpha['STN->MSN']
-    connect_pop('ex','STN','MSN', projType=params['cTypeSTNMSN'], redundancy= params['redundancySTNMSN'], gain=params['GSTNMSN'])
-  if alpha['GPe->MSN'] != 0:
-    if params['splitGPe']:
-      print "alpha['Arky->MSN']",alpha['Arky->MSN']
-      connect_pop('in','Arky','MSN', projType=params['cTypeArkyMSN'], redundancy= params['redundancyArkyMSN'], gain=params['GArkyMSN'])
-    else:
-      print "alpha['GPe->MSN']",alpha['GPe->MSN']
-      connect_pop('in','GPe','MSN', projType=params['cTypeGPeMSN'], redundancy= params['redundancyGPeMSN'], gain=params['GGPeMSN'])
-
-  print '* FSI Inputs'
-  connect_pop('ex','CSN','FSI', projType=params['cTypeCSNFSI'], redundancy= params['redundancyCSNFSI'], gain=params['GCSNFSI'])
-  connect_pop('ex','PTN','FSI', projType=params['cTypePTNFSI'], redundancy= params['redundancyPTNFSI'], gain=params['GPTNFSI'])
-  if alpha['STN->FSI'] != 0:
-    connect_pop('ex','STN','FSI', projType=params['cTypeSTNFSI'],redundancy= params['redundancySTNFSI'],gain=params['GSTNFSI'])
-  if params['splitGPe']:
-    connect_pop('in','Arky','FSI', projType=params['cTypeArkyFSI'], redundancy= params['redundancyArkyFSI'], gain=params['GArkyFSI'])
-  else:
-    connect_pop('in','GPe','FSI', projType=params['cTypeGPeFSI'], redundancy= params['redundancyGPeFSI'], gain=params['GGPeFSI'])
-    
-  connect_pop('ex','CMPf','FSI',projType=params['cTypeCMPfFSI'],redundancy= params['redundancyCMPfFSI'],gain=params['GCMPfFSI'])
-  connect_pop('in','FSI','FSI', projType=params['cTypeFSIFSI'], redundancy= params['redundancyFSIFSI'], gain=params['GFSIFSI'])
 
-  print '* STN Inputs'
-  connect_pop('ex','PTN','STN', projType=params['cTypePTNSTN'], redundancy= params['redundancyPTNSTN'],  gain=params['GPTNSTN'])
-  connect_pop('ex','CMPf','STN',projType=params['cTypeCMPfSTN'],redundancy= params['redundancyCMPfSTN'], gain=params['GCMPfSTN'])
-  if params['splitGPe']:
-    connect_pop('in','Prot','STN', projType=params['cTypeProtSTN'], redundancy= params['redundancyProtSTN'],  gain=params['GProtSTN'])
-  else:
-    connect_pop('in','GPe','STN', projType=params['cTypeGPeSTN'], redundancy= params['redundancyGPeSTN'],  gain=params['GGPeSTN'])
-  
-  if params['splitGPe']:
-      print '* Arky Inputs'
-      if 'fakeArkyRecurrent' not in params.keys():
-        # usual case: Arky's recurrent collaterals are handled normally
-        Arky_recurrent_source = 'Arky'
+  # recurrent collaterals simulated with Poisson train spikes firing at the frequency given by params['fake<N>Recurrent']
+  for N in (['Arky','Prot'] if params['splitGPe'] else ['GPe']):
+    if recurrent_source(N, params) != N:
+      rate['Fake_'+N] = float(params['fake'+N+'Recurrent'])
+      for nucleus_dict in [nbSim, neuronCounts]:
+        nucleus_dict['Fake_'+N] = nucleus_dict[N]
+      for connection_dict in [P, alpha, p, tau]:
+        connection_dict['Fake_'+N+'->'+N] = connection_dict[N+'->'+N]
+      if params['nbCh'] == 1:
+        create('Fake_'+N, fake=True, parrot=True)
       else:
-        # here collaterals are simulated with Poisson train spikes firing at the frequency given by params['fakeArkyRecurrent']
-        rate['Fake_Arky'] = float(params['fakeArkyRecurrent'])
-        for nucleus_dict in [nbSim, neuronCounts]:
-          nucleus_dict['Fake_Arky'] = nucleus_dict['Arky']
-        for connection_dict in [P, alpha, p, tau]:
-          connection_dict['Fake_Arky->Arky'] = connection_dict['Arky->Arky']
-        if params['nbCh'] == 1:
-          create('Fake_Arky', fake=True, parrot=True)
-        else:
-          createMC('Fake_Arky', params['nbCh'], fake=True, parrot=True)
-        Arky_recurrent_source = 'Fake_Arky'
-      if antagInjectionSite == 'GPe':
-        if   antag == 'AMPA':
-          connect_pop('NMDA','CMPf','Arky',projType=params['cTypeCMPfArky'],redundancy= params['redundancyCMPfArky'],gain=params['GCMPfArky'])
-          connect_pop('NMDA','STN','Arky', projType=params['cTypeSTNArky'], redundancy= params['redundancySTNArky'], gain=params['GSTNArky'])
-          connect_pop('in','MSN','Arky',   projType=params['cTypeMSNArky'], redundancy= params['redundancyMSNArky'], gain=params['GMSNArky'])
-          connect_pop('in','Prot','Arky', projType=params['cTypeProtArky'], redundancy= params['redundancyProtArky'], gain=params['GProtArky'])
-          connect_pop('in', Arky_recurrent_source, 'Arky', projType=params['cTypeArkyArky'], redundancy= params['redundancyArkyArky'], gain=params['GArkyArky'])
-        elif antag == 'NMDA':
-          connect_pop('AMPA','CMPf','Arky',projType=params['cTypeCMPfArky'],redundancy= params['redundancyCMPfArky'],gain=params['GCMPfArky'])
-          connect_pop('AMPA','STN','Arky', projType=params['cTypeSTNArky'], redundancy= params['redundancySTNArky'], gain=params['GSTNArky'])
-          connect_pop('in','MSN','Arky',   projType=params['cTypeMSNArky'], redundancy= params['redundancyMSNArky'], gain=params['GMSNArky'])
-          connect_pop('in','Prot','Arky', projType=params['cTypeProtArky'], redundancy= params['redundancyProtArky'], gain=params['GProtArky'])
-          connect_pop('in', Arky_recurrent_source, 'Arky', projType=params['cTypeArkyArky'], redundancy= params['redundancyArkyArky'], gain=params['GArkyArky'])
-        elif antag == 'AMPA+GABAA':
-          connect_pop('NMDA','CMPf','Arky',projType=params['cTypeCMPfArky'],redundancy= params['redundancyCMPfArky'],gain=params['GCMPfArky'])
-          connect_pop('NMDA','STN','Arky', projType=params['cTypeSTNArky'], redundancy= params['redundancySTNArky'], gain=params['GSTNArky'])
-        elif antag == 'GABAA':
-          connect_pop('ex','CMPf','Arky',projType=params['cTypeCMPfArky'],redundancy= params['redundancyCMPfArky'],gain=params['GCMPfArky'])
-          connect_pop('ex','STN','Arky', projType=params['cTypeSTNArky'], redundancy= params['redundancySTNArky'], gain=params['GSTNArky'])
-        else:
-          print antagInjectionSite,": unknown antagonist experiment:",antag
-      else:
-        connect_pop('ex','CMPf','Arky',projType=params['cTypeCMPfArky'],redundancy= params['redundancyCMPfArky'],gain=params['GCMPfArky'])
-        connect_pop('ex','STN','Arky', projType=params['cTypeSTNArky'], redundancy= params['redundancySTNArky'], gain=params['GSTNArky'])
-        connect_pop('in','MSN','Arky', projType=params['cTypeMSNArky'], redundancy= params['redundancyMSNArky'], gain=params['GMSNArky'])
-        connect_pop('in','Prot','Arky', projType=params['cTypeProtArky'], redundancy= params['redundancyProtArky'], gain=params['GProtArky'])
-        connect_pop('in', Arky_recurrent_source, 'Arky', projType=params['cTypeArkyArky'], redundancy= params['redundancyArkyArky'], gain=params['GArkyArky'])
-        
-      print '* Prot Inputs'
-      if 'fakeProtRecurrent' not in params.keys():
-        # usual case: Prot's recurrent collaterals are handled normally
-        Prot_recurrent_source = 'Prot'
-      else:
-        # here collaterals are simulated with Poisson train spikes firing at the frequency given by params['fakeProtRecurrent']
-        rate['Fake_Prot'] = float(params['fakeProtRecurrent'])
-        for nucleus_dict in [nbSim, neuronCounts]:
-          nucleus_dict['Fake_Prot'] = nucleus_dict['Prot']
-        for connection_dict in [P, alpha, p, tau]:
-          connection_dict['Fake_Prot->Prot'] = connection_dict['Prot->Prot']
-        if params['nbCh'] == 1:
-          create('Fake_Prot', fake=True, parrot=True)
-        else:
-          createMC('Fake_Prot', params['nbCh'], fake=True, parrot=True)
-        Prot_recurrent_source = 'Fake_Prot'
-      if antagInjectionSite == 'GPe':
-        if   antag == 'AMPA':
-          connect_pop('NMDA','CMPf','Prot',projType=params['cTypeCMPfProt'],redundancy= params['redundancyCMPfProt'],gain=params['GCMPfProt'])
-          connect_pop('NMDA','STN','Prot', projType=params['cTypeSTNProt'], redundancy= params['redundancySTNProt'], gain=params['GSTNProt'])
-          connect_pop('in','MSN','Prot',   projType=params['cTypeMSNProt'], redundancy= params['redundancyMSNProt'], gain=params['GMSNProt'])
-          connect_pop('in','Arky','Prot',   projType=params['cTypeArkyProt'], redundancy= params['redundancyArkyProt'], gain=params['GArkyProt'])
-          connect_pop('in', Prot_recurrent_source, 'Prot', projType=params['cTypeProtProt'], redundancy= params['redundancyProtProt'], gain=params['GProtProt'])
-        elif antag == 'NMDA':
-          connect_pop('AMPA','CMPf','Prot',projType=params['cTypeCMPfProt'],redundancy= params['redundancyCMPfProt'],gain=params['GCMPfProt'])
-          connect_pop('AMPA','STN','Prot', projType=params['cTypeSTNProt'], redundancy= params['redundancySTNProt'], gain=params['GSTNProt'])
-          connect_pop('in','MSN','Prot',   projType=params['cTypeMSNProt'], redundancy= params['redundancyMSNProt'], gain=params['GMSNProt'])
-          connect_pop('in','Arky','Prot',   projType=params['cTypeArkyProt'], redundancy= params['redundancyArkyProt'], gain=params['GArkyProt'])
-          connect_pop('in', Prot_recurrent_source, 'Prot', projType=params['cTypeProtProt'], redundancy= params['redundancyProtProt'], gain=params['GProtProt'])
-        elif antag == 'AMPA+GABAA':
-          connect_pop('NMDA','CMPf','Prot',projType=params['cTypeCMPfProt'],redundancy= params['redundancyCMPfProt'],gain=params['GCMPfProt'])
-          connect_pop('NMDA','STN','Prot', projType=params['cTypeSTNProt'], redundancy= params['redundancySTNProt'], gain=params['GSTNProt'])
-        elif antag == 'GABAA':
-          connect_pop('ex','CMPf','Prot',projType=params['cTypeCMPfProt'],redundancy= params['redundancyCMPfProt'],gain=params['GCMPfProt'])
-          connect_pop('ex','STN','Prot', projType=params['cTypeSTNProt'], redundancy= params['redundancySTNProt'], gain=params['GSTNProt'])
-        else:
-          print antagInjectionSite,": unknown antagonist experiment:",antag
-      else:
-        connect_pop('ex','CMPf','Prot',projType=params['cTypeCMPfProt'],redundancy= params['redundancyCMPfProt'],gain=params['GCMPfProt'])
-        connect_pop('ex','STN','Prot', projType=params['cTypeSTNProt'], redundancy= params['redundancySTNProt'], gain=params['GSTNProt'])
-        connect_pop('in','MSN','Prot', projType=params['cTypeMSNProt'], redundancy= params['redundancyMSNProt'], gain=params['GMSNProt'])
-        connect_pop('in','Arky','Prot',   projType=params['cTypeArkyProt'], redundancy= params['redundancyArkyProt'], gain=params['GArkyProt'])
-        connect_pop('in', Prot_recurrent_source, 'Prot', projType=params['cTypeProtProt'], redundancy= params['redundancyProtProt'], gain=params['GProtProt'])
-        
-  else:
-      print '* GPe Inputs'
-      if 'fakeGPeRecurrent' not in params.keys():
-        # usual case: GPe's recurrent collaterals are handled normally
-        GPe_recurrent_source = 'GPe'
-      else:
-        # here collaterals are simulated with Poisson train spikes firing at the frequency given by params['fakeGPeRecurrent']
-        rate['Fake_GPe'] = float(params['fakeGPeRecurrent'])
-        for nucleus_dict in [nbSim, neuronCounts]:
-          nucleus_dict['Fake_GPe'] = nucleus_dict['GPe']
-        for connection_dict in [P, alpha, p, tau]:
-          connection_dict['Fake_GPe->GPe'] = connection_dict['GPe->GPe']
-        if params['nbCh'] == 1:
-          create('Fake_GPe', fake=True, parrot=True)
-        else:
-          createMC('Fake_GPe', params['nbCh'], fake=True, parrot=True)
-        GPe_recurrent_source = 'Fake_GPe'
-      if antagInjectionSite == 'GPe':
-        if   antag == 'AMPA':
-          connect_pop('NMDA','CMPf','GPe',projType=params['cTypeCMPfGPe'],redundancy= params['redundancyCMPfGPe'],gain=params['GCMPfGPe'])
-          connect_pop('NMDA','STN','GPe', projType=params['cTypeSTNGPe'], redundancy= params['redundancySTNGPe'], gain=params['GSTNGPe'])
-          connect_pop('in','MSN','GPe',   projType=params['cTypeMSNGPe'], redundancy= params['redundancyMSNGPe'], gain=params['GMSNGPe'])
-          connect_pop('in', GPe_recurrent_source, 'GPe', projType=params['cTypeGPeGPe'], redundancy= params['redundancyGPeGPe'], gain=params['GGPeGPe'])
-        elif antag == 'NMDA':
-          connect_pop('AMPA','CMPf','GPe',projType=params['cTypeCMPfGPe'],redundancy= params['redundancyCMPfGPe'],gain=params['GCMPfGPe'])
-          connect_pop('AMPA','STN','GPe', projType=params['cTypeSTNGPe'], redundancy= params['redundancySTNGPe'], gain=params['GSTNGPe'])
-          connect_pop('in','MSN','GPe',   projType=params['cTypeMSNGPe'], redundancy= params['redundancyMSNGPe'], gain=params['GMSNGPe'])
-          connect_pop('in', GPe_recurrent_source, 'GPe', projType=params['cTypeGPeGPe'], redundancy= params['redundancyGPeGPe'], gain=params['GGPeGPe'])
-        elif antag == 'AMPA+GABAA':
-          connect_pop('NMDA','CMPf','GPe',projType=params['cTypeCMPfGPe'],redundancy= params['redundancyCMPfGPe'],gain=params['GCMPfGPe'])
-          connect_pop('NMDA','STN','GPe', projType=params['cTypeSTNGPe'], redundancy= params['redundancySTNGPe'], gain=params['GSTNGPe'])
-        elif antag == 'GABAA':
-          connect_pop('ex','CMPf','GPe',projType=params['cTypeCMPfGPe'],redundancy= params['redundancyCMPfGPe'],gain=params['GCMPfGPe'])
-          connect_pop('ex','STN','GPe', projType=params['cTypeSTNGPe'], redundancy= params['redundancySTNGPe'], gain=params['GSTNGPe'])
-        else:
-          print antagInjectionSite,": unknown antagonist experiment:",antag
-      else:
-        connect_pop('ex','CMPf','GPe',projType=params['cTypeCMPfGPe'],redundancy= params['redundancyCMPfGPe'],gain=params['GCMPfGPe'])
-        connect_pop('ex','STN','GPe', projType=params['cTypeSTNGPe'], redundancy= params['redundancySTNGPe'], gain=params['GSTNGPe'])
-        connect_pop('in','MSN','GPe', projType=params['cTypeMSNGPe'], redundancy= params['redundancyMSNGPe'], gain=params['GMSNGPe'])
-        connect_pop('in', GPe_recurrent_source, 'GPe', projType=params['cTypeGPeGPe'], redundancy= params['redundancyGPeGPe'], gain=params['GGPeGPe'])
-
-  print '* GPi Inputs'
-  if antagInjectionSite =='GPi':
-    if   antag == 'AMPA+NMDA+GABAA':
-      pass
-    elif antag == 'NMDA':
-      connect_pop('in','MSN','GPi',   projType=params['cTypeMSNGPi'], redundancy= params['redundancyMSNGPi'], gain=params['GMSNGPi'])
-      connect_pop('AMPA','STN','GPi', projType=params['cTypeSTNGPi'], redundancy= params['redundancySTNGPi'], gain=params['GSTNGPi'])
-      if params['splitGPe']:
-        connect_pop('in','Prot','GPi',   projType=params['cTypeProtGPi'], redundancy= params['redundancyProtGPi'], gain=params['GProtGPi'])
-      else:
-        connect_pop('in','GPe','GPi',   projType=params['cTypeGPeGPi'], redundancy= params['redundancyGPeGPi'], gain=params['GGPeGPi'])
-      connect_pop('AMPA','CMPf','GPi',projType=params['cTypeCMPfGPi'],redundancy= params['redundancyCMPfGPi'],gain=params['GCMPfGPi'])
-    elif antag == 'NMDA+AMPA':
-      connect_pop('in','MSN','GPi', projType=params['cTypeMSNGPi'],redundancy= params['redundancyMSNGPi'], gain=params['GMSNGPi'])
-      if params['splitGPe']:
-        connect_pop('in','Prot','GPi',   projType=params['cTypeProtGPi'], redundancy= params['redundancyProtGPi'], gain=params['GProtGPi'])
-      else:
-        connect_pop('in','GPe','GPi',   projType=params['cTypeGPeGPi'], redundancy= params['redundancyGPeGPi'], gain=params['GGPeGPi'])
-    elif antag == 'AMPA':
-      connect_pop('in','MSN','GPi',   projType=params['cTypeMSNGPi'], redundancy= params['redundancyMSNGPi'], gain=params['GMSNGPi'])
-      connect_pop('NMDA','STN','GPi', projType=params['cTypeSTNGPi'], redundancy= params['redundancySTNGPi'], gain=params['GSTNGPi'])
-      if params['splitGPe']:
-        connect_pop('in','Prot','GPi',   projType=params['cTypeProtGPi'], redundancy= params['redundancyProtGPi'], gain=params['GProtGPi'])
-      else:
-        connect_pop('in','GPe','GPi',   projType=params['cTypeGPeGPi'], redundancy= params['redundancyGPeGPi'], gain=params['GGPeGPi'])
-      connect_pop('NMDA','CMPf','GPi',projType=params['cTypeCMPfGPi'],redundancy= params['redundancyCMPfGPi'],gain=params['GCMPfGPi'])
-    elif antag == 'GABAA':
-      connect_pop('ex','STN','GPi', projType=params['cTypeSTNGPi'], redundancy= params['redundancySTNGPi'], gain=params['GSTNGPi'])
-      connect_pop('ex','CMPf','GPi',projType=params['cTypeCMPfGPi'],redundancy= params['redundancyCMPfGPi'],gain=params['GCMPfGPi'])
+        createMC('Fake_'+N, params['nbCh'], fake=True, parrot=True)
+
+  table = apply_mask(projection_table(params, alpha), antagonist_mask(antagInjectionSite, antag, params))
+
+  conns = []
+  for row in table:
+    # single or multi-channel?
+    if params['nbCh'] == 1:
+      source_channels = None
+    elif row['source_channels'] == None:
+      # enforce the default
+      source_channels = range(params['nbCh'])
     else:
-      print antagInjectionSite,": unknown antagonist experiment:",antag
+      source_channels = row['source_channels']
+    conn = prepare_connection(row['type'], row['src'], row['tgt'], row['redundancy'], params['RedundancyType'], gain=row['gain'], projType=row['projType'], source_channels=source_channels)
+    if conn != None:
+      conn['name'] = row['name']
+      conns.append(conn)
+
+  if params['connectOrder'] == 'grouped':
+    conns = grouped_order(conns)
+
+  if params['connectBackend'] in ['numpy', 'numpyVP']:
+    # connectivity drawn with numpy, one nest.Connect call per target population and receptor
+    # with 'numpyVP', each virtual process draws the inputs of its own targets with its own random generator
+    wire_connections_bulk(conns, stochastic_delays=params['stochastic_delays'], diffuseMode=params['diffuseMode'], perVP=(params['connectBackend'] == 'numpyVP'), slim=params['slimSynapses'], homogeneous=params['homogeneousSynapses'])
   else:
-    connect_pop('in','MSN','GPi', projType=params['cTypeMSNGPi'], redundancy= params['redundancyMSNGPi'], gain=params['GMSNGPi'])
-    connect_pop('ex','STN','GPi', projType=params['cTypeSTNGPi'], redundancy= params['redundancySTNGPi'], gain=params['GSTNGPi'])
-    if params['splitGPe']:
-      connect_pop('in','Prot','GPi',   projType=params['cTypeProtGPi'], redundancy= params['redundancyProtGPi'], gain=params['GProtGPi'])
-    else:
-      connect_pop('in','GPe','GPi',   projType=params['cTypeGPeGPi'], redundancy= params['redundancyGPeGPi'], gain=params['GGPeGPi'])
-    connect_pop('ex','CMPf','GPi',projType=params['cTypeCMPfGPi'],redundancy= params['redundancyCMPfGPi'],gain=params['GCMPfGPi'])
-
-  base_weights = {'CSN_MSN': CSN_MSN, 'PTN_MSN': PTN_MSN, 'CMPf_MSN': CMPf_MSN}
+    target = None
+    for conn in conns:
+      if conn['tgt'] != target:
+        target = conn['tgt']
+        print '* '+target+' Inputs'
+      wire_connection(conn, stochastic_delays=params['stochastic_delays'], diffuseMode=params['diffuseMode'], slim=params['slimSynapses'], homogeneous=params['homogeneousSynapses'])
+
+  base_weights = {'CSN_MSN': None, 'PTN_MSN': None, 'CMPf_MSN': None}
+  for conn in conns:
+    if conn['name'] in base_weights and base_weights[conn['name']] == None:
+      base_weights[conn['name']] = conn['W']
 
   return base_weights
 
+#------------------------------------------
+# GIDs of all the neurons of population N (over all its channels)
+#------------------------------------------
+def population_gids(params, N):
+  if params['nbCh'] == 1:
+    return list(Pop[N])
+  return [gid for channel in Pop[N] for gid in channel]
+
 #------------------------------------------
 # Re-weight a specific connection, characterized by a source, a target, and a receptor
 # Returns the previous value of that connection (useful for 'reactivating' after a deactivation experiment)
+# With MPI, each process alters (and returns) the weights of its local connections only
+# With params['homogeneousSynapses'], the weights of the synapse models of the projection are changed instead
+# of those of each synapse (in the multi-channel case as well), and the previous weights are returned as
+# a dictionary {synapse model: weight}
 #------------------------------------------
-def alter_connection(src, tgt, tgt_receptor, altered_weight):
+def alter_connection(params, src, tgt, tgt_receptor, altered_weight):
+  if params['homogeneousSynapses']:
+    models = [m for r in ['AMPA','NMDA','GABA'] for m in HomogeneousModels.get((src, tgt, r), [])]
+    if len(models) == 0:
+      return None
+    previous_weights = dict((m, nest.GetDefaults(m)['weight']) for m in models)
+    for m in HomogeneousModels.get((src, tgt, {'GABAA': 'GABA'}.get(tgt_receptor, tgt_receptor)), []):
+      if isinstance(altered_weight, dict):
+        nest.SetDefaults(m, {'weight': float(altered_weight[m])})
+      else:
+        nest.SetDefaults(m, {'weight': float(altered_weight)})
+    return previous_weights
   if params['nbCh'] != 1:
     raise NotImplementedError('Altering connection is implemented only in the one-channel case')
   recTypeEquiv = {'AMPA':1,'NMDA':2,'GABA':3, 'GABAA':3} # adds 'GABAA'
@@ -353,7 +228,7 @@ def alter_connection(src, tgt, tgt_receptor, altered_weight):
 #------------------------------------------
 # gets the nuclei involved in deactivation experiments in GPe/GPi
 #------------------------------------------
-def get_afferents(a):
+def get_afferents(params, a):
   if params['splitGPe']:
     GABA_afferents = ['MSN', 'Arky', 'Prot'] # afferents with gabaergic connections
   else:
@@ -373,12 +248,12 @@ def get_afferents(a):
 #------------------------------------------
 # deactivate connections based on antagonist experiment
 #------------------------------------------
-def deactivate(site, a):
+def deactivate(params, site, a):
   ww = {}
-  for src in get_afferents(a):
+  for src in get_afferents(params, a):
     ww[src] = None
     for rec in a.split('+'):
-      w = alter_connection(src, site, rec, 0)
+      w = alter_connection(params, src, site, rec, 0)
       if ww[src] == None:
         ww[src] = w # keep the original weights only once
   return ww
@@ -386,33 +261,16 @@ def deactivate(site, a):
 #------------------------------------------
 # reactivate connections based on antagonist experiment
 #------------------------------------------
-def reactivate(site, a, ww):
-  for src in get_afferents(a):
+def reactivate(params, site, a, ww):
+  for src in get_afferents(params, a):
     for rec in a.split('+'):
-      alter_connection(src, site, rec, ww[src])
+      alter_connection(params, src, site, rec, ww[src])
 
 #------------------------------------------
-# Instantiate the BG network according to the `params` dictionnary
-# For now, this instantiation respects the hardcoded antagonist injection sites
-# In the future, these will be handled by changing the network weights
+# Checks that all the parameters needed to build the BG have been defined
 #------------------------------------------
-def instantiate_BG(params={}, antagInjectionSite='none', antag=''):
-  nest.ResetKernel()
-  dataPath='log/'
-  if 'nbcpu' in params:
-    nest.SetKernelStatus({'local_num_threads': params['nbcpu']})
-
-  nstrand.set_seed(params['nestSeed'], params['pythonSeed']) # sets the seed for the BG construction
-
-  nest.SetKernelStatus({"data_path": dataPath})
-  #nest.SetKernelStatus({"resolution": 0.005}) # simulates with a higher precision
-  initNeurons()
-
-  print '/!\ Using the following LG14 parameterization',params['LG14modelID']
-  loadLG14params(params['LG14modelID'])
-  loadThetaFromCustomparams(params)
-
-  # We check that all the necessary parameters have been defined. They should be in the modelParams.py file.
+def check_params(params):
+  # We check that all the necessary parameters have been defined (see baseParams.py).
   # If one of them misses, we exit the program.
   if params['splitGPe']:
     necessaryParams=['nbCh','nbMSN','nbFSI','nbSTN','nbGPe','nbArky','nbProt','nbGPi','nbCSN','nbPTN','nbCMPf',
@@ -448,12 +306,41 @@ def instantiate_BG(params={}, antagInjectionSite='none', antag=''):
     if np not in params:
       raise KeyError('Missing parameter: '+np)
 
+#------------------------------------------
+# Instantiate the BG network according to the `params` dictionnary
+# For now, this instantiation respects the hardcoded antagonist injection sites
+# In the future, these will be handled by changing the network weights
+#------------------------------------------
+def instantiate_BG(params={}, antagInjectionSite='none', antag=''):
+  nest.ResetKernel()
+  del Replayed[:] # spike generators of a previous kernel are gone
+  HomogeneousModels.clear() # and so are the synapse models copied by `homogeneous_model`
+  Pop.clear()               # and the populations of a previous instantiation
+  Fake.clear()
+  WarmState.clear()         # with their warm-start state
+  dataPath='log/'
+  if 'nbcpu' in params:
+    nest.SetKernelStatus({'local_num_threads': params['nbcpu']})
+
+  nstrand.set_seed(params['nestSeed'], params['pythonSeed']) # sets the seed for the BG construction
+
+  nest.SetKernelStatus({"data_path": dataPath})
+  #nest.SetKernelStatus({"resolution": 0.005}) # simulates with a higher precision
+  initNeurons()
+
+  print '/!\ Using the following LG14 parameterization',params['LG14modelID']
+  loadLG14params(params['LG14modelID'])
+  loadThetaFromCustomparams(params)
+
+  check_params(params)
+
   #------------------------
   # creation and connection of the neural populations
   #------------------------
 
-  createBG()
-  return connectBG(antagInjectionSite,antag)
+  NUCLEI[:] = get_nuclei(params) # for the scripts still using the module-level list
+  createBG(params)
+  return connectBG(params, antagInjectionSite, antag)
 
 
 
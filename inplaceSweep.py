@@ -0,0 +1,127 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+##
+## inplaceSweep.py
+##
+## Sweep over the parameters that do not change the structure of the network (see projections.inplace_param):
+## input currents Ie<N>, gains G<src><tgt> and thresholds THETA_<N>.
+## The BG is built once with `params`, then each point of params['sweepPoints'] (a list of dictionaries
+## {parameter: value}, as written by run.py --inplace) is applied in place on the existing network:
+## I_e and V_th with SetStatus on the neurons, and the weights of the projections whose gain changed.
+## Each point is tested as by testPlausibility.py (checkAvgFR, and checkDeactivations in the single-channel case),
+## and its rates and score are appended to sweep_scores.csv
+
+from testPlausibility import *
+
+#------------------------------------------
+# Weights of all the projections of the current BG (at rest), for the parameters `params`
+# Returns a dictionary {(src, tgt, receptor): weight}
+#------------------------------------------
+def projection_weights(params):
+  weights = {}
+  for row in projection_table(params, alpha):
+    if params['nbCh'] == 1:
+      source_channels = None
+    elif row['source_channels'] == None:
+      source_channels = range(params['nbCh'])
+    else:
+      source_channels = row['source_channels']
+    conn = prepare_connection(row['type'], row['src'], row['tgt'], row['redundancy'], params['RedundancyType'], gain=row['gain'], projType=row['projType'], source_channels=source_channels)
+    if conn == None:
+      continue
+    for r in conn['lRecType']:
+      if weights.get((row['src'], row['tgt'], r), conn['W'][r]) != conn['W'][r]:
+        raise NotImplementedError('Projections '+row['src']+' -> '+row['tgt']+' with different weights can not be changed in place')
+      weights[(row['src'], row['tgt'], r)] = conn['W'][r]
+  return weights
+
+#------------------------------------------
+# Sets the weights {(src, tgt, receptor): weight} of all the synapses of these projections
+#------------------------------------------
+def set_weights(params, weights):
+  if params['homogeneousSynapses']:
+    for (src, tgt, r), w in weights.iteritems():
+      for m in HomogeneousModels.get((src, tgt, r), []):
+        nest.SetDefaults(m, {'weight': float(w)})
+    return
+  for src, tgt in set((src, tgt) for src, tgt, r in weights.keys()):
+    conns = nest.GetConnections(source=population_gids(params, src), target=population_gids(params, tgt))
+    if len(conns) == 0:
+      continue
+    receptors = nest.GetStatus(conns, keys='receptor')
+    for r in ['AMPA','NMDA','GABA']:
+      if (src, tgt, r) in weights:
+        selected = [conns[i] for i in range(len(conns)) if receptors[i] == recType[r]]
+        nest.SetStatus(selected, {'weight': float(weights[(src, tgt, r)])})
+
+#------------------------------------------
+# Firing thresholds of the nuclei: THETA_<N> if defined, otherwise the LG14 value (see loadLG14params)
+#------------------------------------------
+def thresholds(params):
+  LG14Solutions = loadLG14store()
+  theta = {}
+  for N in get_nuclei(params):
+    if 'THETA_'+N in params.keys():
+      theta[N] = round(float(params['THETA_'+N]), 2)
+    else:
+      theta[N] = round(float(LG14Solutions[params['LG14modelID']][LG14column('THETA', N)]),1)
+  return theta
+
+#------------------------------------------
+# Applies the sweep point `point` on the BG built with `params`
+# weights: current weights of the projections (see `projection_weights`), updated
+# Returns the parameters of the point
+#------------------------------------------
+def apply_point(params, point, weights):
+  pointParams = dict(params)
+  pointParams.update(point)
+  theta = thresholds(pointParams)
+  for N in get_nuclei(pointParams):
+    BGparams[N]['V_th'] = theta[N]
+    nest.SetStatus(population_gids(pointParams, N), {'V_th': theta[N], 'I_e': float(pointParams['Ie'+N])})
+  # only the projections whose weights change are updated
+  newWeights = projection_weights(pointParams)
+  changed = dict((k, w) for k, w in newWeights.iteritems() if weights.get(k) != w)
+  set_weights(pointParams, changed)
+  weights.update(changed)
+  return pointParams
+
+#-----------------------------------------------------------------------
+def main():
+  nest.set_verbosity("M_WARNING")
+
+  points = params['sweepPoints'] if 'sweepPoints' in params.keys() else [{}]
+  for point in points:
+    for k in point.keys():
+      if not inplace_param(k):
+        raise KeyError('`'+k+'` changes the structure of the network and can not be swept in place')
+  keys = sorted(set(k for point in points for k in point.keys()))
+
+  instantiate_BG(params, antagInjectionSite='none', antag='')
+  weights = projection_weights(params)
+
+  for i, point in enumerate(points):
+    print '\n### Sweep point',i+1,'/',len(points),':',point,'###'
+    pointParams = apply_point(params, point, weights)
+    score = np.zeros((2))
+    score += checkAvgFR(params=pointParams,antagInjectionSite='none',antag='')
+    # deactivation tests in place only: in the multi-channel case they re-create the BG
+    if score[0] < score[1]:
+      print("Activities at rest do not match: skipping deactivation tests")
+    elif pointParams['nbCh'] == 1:
+      score += checkDeactivations(pointParams)
+
+    print "* Score of point",i,":",score[0],'/',score[1]
+    if not is_root():
+      continue # the results are the same in all MPI processes
+    # the file is restarted with the first point, so that a relaunched run does not append to the lines of the previous one
+    with open('sweep_scores.csv', 'wb' if i == 0 else 'ab') as csv_file:
+      writer = csv.writer(csv_file)
+      if i == 0:
+        writer.writerow(keys + ['sim_score', 'max_score'] + [N+'_Rate' for N in get_nuclei(pointParams)])
+      writer.writerow([pointParams[k] for k in keys] + [score[0], score[1]] + [restFR[N] for N in get_nuclei(pointParams)])
+
+#---------------------------
+if __name__ == '__main__':
+  main()
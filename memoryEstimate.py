@@ -0,0 +1,150 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+##
+## memoryEstimate.py
+##
+## Dry-run estimation of the size of a BG network before it is built:
+## number of nodes and synapses of each population and projection, computed from
+## the `params` dictionary with the same in-degree computations as the simulation,
+## and the memory predicted for the nest kernel.
+## Does not depend on nest, so that run.py can check a configuration before queuing it.
+
+from LG14 import *
+from projections import *
+from math import ceil
+
+# memory used by each type of node and synapse, in bytes
+# orders of magnitude for NEST 2.10/2.12, including the growth of the connection vectors
+bytesPerNode = {'iaf_psc_alpha_multisynapse': 1500.,
+                'parrot_neuron':               500.,
+                'poisson_generator':           500.,
+                'spike_generator':             800.,
+               }
+bytesPerSynapse = {'static_synapse':       48.,
+                   'static_synapse_lbl':   56.,
+                   'static_synapse_hom_w': 40.,
+                  }
+bytesPerSpike = 8. # spike times stored by the spike generators replaying the inputs
+replayRate = 20.   # Hz, upper bound of the input rates, to size the replayed spike trains
+
+baseMB = 300.      # python, numpy and the nest kernel, before any node is created
+threadMB = 20.     # per-thread structures of the nest kernel
+
+#-------------------------------------------------------------------------------
+# Number of simulated neurons per channel and number of channels of each population
+#-------------------------------------------------------------------------------
+def population_sizes(params):
+  nuclei = get_nuclei(params)
+  sizes = {}
+  for N in nuclei + ['CSN','PTN','CMPf']:
+    sizes[N] = (params['nb'+N], params['nbCh'])
+  if 'nbCues' in params.keys():
+    sizes['CSN'] = (params['nbCSN'], params['nbCh']+params['nbCues'])
+  for N in (['Arky','Prot'] if params['splitGPe'] else ['GPe']):
+    if recurrent_source(N, params) != N:
+      sizes['Fake_'+N] = sizes[N]
+  return nuclei, sizes
+
+#-------------------------------------------------------------------------------
+# Nodes created for the populations (see `createBG`), by model
+#-------------------------------------------------------------------------------
+def count_nodes(params):
+  nuclei, sizes = population_sizes(params)
+  nodes = {'iaf_psc_alpha_multisynapse': 0., 'parrot_neuron': 0., 'poisson_generator': 0., 'spike_generator': 0.}
+  synapses = 0.   # poisson_generator -> parrot_neuron connections
+  spikes = 0.     # spike times held by the replaying spike generators
+  for N, (nb, nbCh) in sizes.iteritems():
+    if N in nuclei:
+      nodes['iaf_psc_alpha_multisynapse'] += nb * nbCh
+    elif params['replayInputs'] and not N.startswith('Fake_'):
+      nodes['spike_generator'] += nb * nbCh
+      spikes += nb * nbCh * replayRate * (1000. + params['tSimu']) / 1000.
+    elif N == 'CMPf' and not params['parrotCMPf']:
+      nodes['poisson_generator'] += nb * nbCh
+    else:
+      shared = params['compactInputs'] and not N.startswith('Fake_')
+      nodes['poisson_generator'] += nbCh if shared else nb * nbCh
+      nodes['parrot_neuron'] += nb * nbCh
+      synapses += nb * nbCh
+  return nodes, synapses, spikes
+
+#-------------------------------------------------------------------------------
+# Expected number of synapses of each projection (see `connectBG` and `connection_blocks`)
+# The unmasked table is used: antagonist experiments only remove connections
+# Returns a list of (name, type, number of synapses)
+#-------------------------------------------------------------------------------
+def count_synapses(params):
+  nuclei, sizes = population_sizes(params)
+  counts = []
+  for row in projection_table(params, alpha):
+    src = row['src'].replace('Fake_','') # the fake recurrent sources share the LG14 data of their nucleus
+    nbSrc, nbSrcCh = sizes[row['src']]
+    nbTgt = sizes[row['tgt']][0]
+    if params['nbCh'] == 1:
+      nbChannels = None
+    elif row['source_channels'] == None:
+      nbChannels = nbSrcCh
+    else:
+      nbChannels = len(row['source_channels'])
+    inDegree = get_indegree(src, row['tgt'], row['redundancy'], params['RedundancyType'], nbSrc, projType=row['projType'], nbSrcChannels=nbChannels)
+    if inDegree == 0.:
+      continue
+    if nbChannels == None:
+      nb = inDegree * nbTgt
+    else:
+      # the in-degree is shared among the source channels, and the projection is made of nbChannels
+      # focused blocks, or of nbChannels x nbTgtCh diffuse blocks with inDegree / nbTgtCh each
+      nb = inDegree * (float(nbChannels) / nbSrcCh) * nbTgt * nbChannels
+    counts.append((row['name'], row['type'], nb * len(receptors[row['type']])))
+  return counts
+
+#-------------------------------------------------------------------------------
+# Estimates the size of the network and the memory needed, for the LG14 parameterization params['LG14modelID']
+# nbProcs: number of MPI processes sharing the network
+# nbThreads: number of threads of each process (default: params['nbcpu'])
+# nbInstances: number of BG instances built in the same kernel (see ensembleBG.py)
+# Returns a dictionary with the numbers of nodes and synapses, the synapses of each projection
+# and the memory (MB) needed by each process
+#-------------------------------------------------------------------------------
+def estimate(params, nbProcs=1, nbThreads=None, nbInstances=1):
+  loadLG14alpha(params['LG14modelID'])
+  if nbThreads == None:
+    nbThreads = max(1, params['nbcpu'])
+  nodes, inputSynapses, spikes = count_nodes(params)
+  projections = count_synapses(params)
+  nbSynapses = sum(nb for name, type, nb in projections)
+  if params['homogeneousSynapses']:
+    labelled = 0.
+  elif not params['slimSynapses']:
+    labelled = nbSynapses
+  elif params['connectBackend'] == 'nest':
+    # only the AMPA synapses mirrored with NMDA ones keep their label
+    labelled = sum(nb / 2. for name, type, nb in projections if type == 'ex')
+  else:
+    labelled = 0.
+
+  nodeBytes = sum(bytesPerNode[model] * nb for model, nb in nodes.iteritems())
+  synapseBytes = bytesPerSynapse['static_synapse'] * inputSynapses + bytesPerSynapse['static_synapse_lbl'] * labelled
+  if params['homogeneousSynapses']:
+    synapseBytes += bytesPerSynapse['static_synapse_hom_w'] * nbSynapses
+  else:
+    synapseBytes += bytesPerSynapse['static_synapse'] * (nbSynapses - labelled)
+  # nodes and synapses are distributed over the MPI processes (the synapses live with their targets)
+  MB = baseMB + threadMB * nbThreads + nbInstances * (nodeBytes + synapseBytes + bytesPerSpike * spikes) / nbProcs / 1024.**2
+
+  return {'nodes': nbInstances * sum(nodes.values()), 'nodesPerModel': dict((model, nbInstances * nb) for model, nb in nodes.iteritems()),
+          'synapses': nbInstances * (nbSynapses + inputSynapses), 'projections': [(name, type, nbInstances * nb) for name, type, nb in projections],
+          'MB': MB}
+
+#-------------------------------------------------------------------------------
+# Prints the estimate of a network
+#-------------------------------------------------------------------------------
+def print_estimate(est):
+  print '* Estimated network size:'
+  for model, nb in sorted(est['nodesPerModel'].iteritems()):
+    if nb > 0:
+      print '  ',model+':',int(nb)
+  for name, type, nb in est['projections']:
+    print '  ',name,'('+type+'):',int(round(nb)),'synapses'
+  print '   total:',int(est['nodes']),'nodes,',int(round(est['synapses'])),'synapses,',int(ceil(est['MB'])),'MB per process'
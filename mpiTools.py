@@ -0,0 +1,69 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+##
+## mpiTools.py
+##
+## Helpers to run the BG model on several MPI processes (e.g. `mpirun -np 4 python testPlausibility.py`)
+## Each MPI process only holds the neurons of its own virtual processes, with their incoming connections:
+## - spike detectors only record the spikes of the local neurons, so counts are summed over processes
+## - GetConnections only returns local connections: alter_connection and mass_mirror act on them,
+##   which is consistent because a connection and its NMDA twin are stored with the same target neuron
+## - summary files are written by process 0 only
+## mpi4py is only needed when running on several processes
+
+import nest
+import numpy as np
+
+try:
+  from mpi4py import MPI
+except ImportError:
+  MPI = None
+
+#-------------------------------------------------------------------------------
+# True for the MPI process in charge of writing the results
+#-------------------------------------------------------------------------------
+def is_root():
+  return nest.Rank() == 0
+
+def check_mpi():
+  if nest.NumProcesses() > 1 and MPI == None:
+    raise ImportError('mpi4py is needed to gather the results of '+str(nest.NumProcesses())+' MPI processes')
+
+#-------------------------------------------------------------------------------
+# Sum of `value` over all MPI processes
+#-------------------------------------------------------------------------------
+def allreduce_sum(value):
+  if nest.NumProcesses() == 1:
+    return value
+  check_mpi()
+  return MPI.COMM_WORLD.allreduce(value, op=MPI.SUM)
+
+#-------------------------------------------------------------------------------
+# Concatenation of the arrays of all MPI processes
+#-------------------------------------------------------------------------------
+def allgather_concat(array):
+  if nest.NumProcesses() == 1:
+    return np.asarray(array)
+  check_mpi()
+  return np.concatenate([np.asarray(a) for a in MPI.COMM_WORLD.allgather(np.asarray(array))])
+
+#-------------------------------------------------------------------------------
+# Number of spikes recorded by a spike detector, over all MPI processes
+#-------------------------------------------------------------------------------
+def count_events(detector):
+  return allreduce_sum(nest.GetStatus(detector, 'n_events')[0])
+
+#-------------------------------------------------------------------------------
+# Field `key` ('times' or 'senders') of the events recorded in memory by a spike detector, over all MPI processes
+#-------------------------------------------------------------------------------
+def gather_events(detector, key):
+  return allgather_concat(nest.GetStatus(detector, keys='events')[0][key])
+
+#-------------------------------------------------------------------------------
+# Waits for all MPI processes (e.g. before reading files written by the other processes)
+#-------------------------------------------------------------------------------
+def barrier():
+  if nest.NumProcesses() > 1:
+    check_mpi()
+    MPI.COMM_WORLD.Barrier()
@@ -1,28 +1,52 @@
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 
 from scipy.interpolate import spline
 
-r = np.arange(0, 1.125, 0.125)
+#-------------------------------------------------------------------------------
+# Loads a tuning matrix written by testGPR01.checkGeorgopoulosSweep
+# (rows: preferred channel of the trial ; columns: recorded channel)
+# Returns the rest rate, the min and max CSN rates, and the tuning curve averaged
+# over trials after alignment on the preferred channel, closed on itself
+#-------------------------------------------------------------------------------
+def loadTuning(fileName):
+  header = open(fileName).readline()[1:].split()
+  info = dict([h.split('=') for h in header])
+  tuning = np.loadtxt(fileName, delimiter=',', ndmin=2)
+  aligned = np.array([np.roll(tuning[trial], -trial) for trial in range(tuning.shape[0])])
+  curve = aligned.mean(axis=0)
+  CSNFR = [float(f) for f in info['CSNFR'].split(',')]
+  return float(info['rest']), CSNFR[0], CSNFR[1], np.append(curve, curve[0])
+
+if len(sys.argv) >= 2:
+  # e.g. python polarPlot.py log/tuning_GPi.csv
+  rest, minCSN, maxCSN, GPi = loadTuning(sys.argv[1])
+  nbCh = len(GPi) - 1
+  restGPi = rest * np.ones((nbCh+1))
+else:
+  nbCh = 8
+  minCSN = 2.
+  #maxCSN = 10.
+  maxCSN = 4.
+  #restGPi = 72. * np.ones((9))
+  #GPi = np.array([3.500000 , 14.142857 , 55.071429 , 80.285714 , 84.857143 , 84.000000 , 48.714286 , 12.500000, 3.5 ])
+  restGPi = 71.8 * np.ones((9))
+  GPi = np.array([0.0, 1.07, 32.4, 81.2, 89.7, 79.1, 32.4, 0.0, 0.0])
+
+r = np.arange(0, nbCh+1) / float(nbCh)
 theta = 2 * np.pi *r
 
 #print theta
 
-#maxCSN = 10.
-maxCSN = 4.
-restCtx = 2. * np.ones((9))
-activityLevels = np.ones((9))
-for i in range(9):
-  activityLevels[i] = 2 * np.pi / 8 * i
-activityLevels = 2. + (maxCSN-2.) * ( (np.cos(activityLevels)+1)/2.)
+restCtx = minCSN * np.ones((nbCh+1))
+activityLevels = np.ones((nbCh+1))
+for i in range(nbCh+1):
+  activityLevels[i] = 2 * np.pi / nbCh * i
+activityLevels = minCSN + (maxCSN-minCSN) * ( (np.cos(activityLevels)+1)/2.)
 
 #print activityLevels
 
-#restGPi = 72. * np.ones((9))
-#GPi = np.array([3.500000 , 14.142857 , 55.071429 , 80.285714 , 84.857143 , 84.000000 , 48.714286 , 12.500000, 3.5 ])
-restGPi = 71.8 * np.ones((9))
-GPi = np.array([0.0, 1.07, 32.4, 81.2, 89.7, 79.1, 32.4, 0.0, 0.0])
-
 # attemps to smooth the graph:
 thetanew = np.linspace(0,2*np.pi,100)
 ALSmooth = spline(theta, activityLevels, thetanew)
@@ -0,0 +1,178 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+##
+## projections.py
+##
+## Declarative description of the projections of the BG model
+## Each projection is a row {'type', 'src', 'tgt', 'projType', 'redundancy', 'gain', 'source_channels', 'name'}
+## derived from the cType*/redundancy*/G* keys of the `params` dictionary.
+## Antagonist injections are receptor masks applied over the same table.
+## This module does not depend on nest: the rows are created by iniBG.connectBG
+
+import re
+
+# receptors of each connection type, and connection type for each set of receptors
+receptors = {'ex': ['AMPA','NMDA'], 'AMPA': ['AMPA'], 'NMDA': ['NMDA'], 'in': ['GABAA']}
+connectionType = {('AMPA','NMDA'): 'ex', ('AMPA',): 'AMPA', ('NMDA',): 'NMDA', ('GABAA',): 'in'}
+
+# antagonist experiments known for each injection site
+antagonists = {'GPe': ['AMPA','NMDA','AMPA+GABAA','GABAA'],
+               'GPi': ['AMPA+NMDA+GABAA','NMDA','NMDA+AMPA','AMPA','GABAA'],
+              }
+
+#------------------------------------------
+# One projection of the table
+# key: suffix of the cType/redundancy/G parameters (default: src+tgt)
+# extra keyword arguments override the row values (e.g. gain, projType, source_channels)
+#------------------------------------------
+def projection(type, src, tgt, params, key=None, **kwargs):
+  if key == None:
+    key = src+tgt
+  row = {'type': type, 'src': src, 'tgt': tgt,
+         'projType': params['cType'+key], 'redundancy': params['redundancy'+key], 'gain': params['G'+key],
+         'source_channels': None, 'name': src+'_'+tgt}
+  row.update(kwargs)
+  return row
+
+#------------------------------------------
+# Simulated nuclei of the BG model (without the inputs)
+#------------------------------------------
+def get_nuclei(params):
+  if params['splitGPe']:
+    return ['MSN','FSI','STN','Arky','Prot','GPi']
+  return ['MSN','FSI','STN','GPe','GPi']
+
+#------------------------------------------
+# Parameters that can be changed on a network already built (see inplaceSweep.py): the input
+# currents Ie<N>, the gains G<src><tgt> and the thresholds THETA_<N>; all the others change its structure
+#------------------------------------------
+inplaceParamPattern = re.compile('^(Ie|THETA_)(MSN|FSI|STN|GPe|Arky|Prot|GPi)$|^G(CSN|PTN|CMPf|MSN|FSI|STN|GPe|Arky|Prot|GPi)(MSN|FSI|STN|GPe|Arky|Prot|GPi)$')
+
+def inplace_param(key):
+  return inplaceParamPattern.match(key) != None
+
+#------------------------------------------
+# Source of the recurrent collaterals of a GPe nucleus: the nucleus itself, or
+# Poisson spike trains ('Fake_'+N) when params['fake'+N+'Recurrent'] is defined
+#------------------------------------------
+def recurrent_source(N, params):
+  if 'fake'+N+'Recurrent' in params.keys():
+    return 'Fake_'+N
+  return N
+
+#------------------------------------------
+# Builds the table of all the projections of the BG model, in the historical order of connectBG
+# alpha: LG14 alpha dictionary (some parameterizations have no STN->MSN, GPe->MSN or STN->FSI contacts),
+#        or None to include these projections anyway
+#------------------------------------------
+def projection_table(params, alpha):
+  table = []
+  add = lambda *args, **kwargs: table.append(projection(*args, params=params, **kwargs))
+
+  # MSN inputs
+  if 'nbCues' not in params.keys():
+    # usual case: CSN have as the same number of channels than the BG nuclei
+    add('ex','CSN','MSN')
+  else:
+    # special case: extra 'cue' channels that target MSN
+    add('ex','CSN','MSN', gain=params['GCSNMSN']/2., source_channels=range(params['nbCh']))
+    add('ex','CSN','MSN', gain=params['GCSNMSN']/2., projType='diffuse', source_channels=range(params['nbCh'], params['nbCh']+params['nbCues']), name='cues_MSN')
+  add('ex','PTN','MSN')
+  add('ex','CMPf','MSN')
+  add('in','MSN','MSN')
+  add('in','FSI','MSN')
+  if alpha == None or alpha['STN->MSN'] != 0:
+    add('ex','STN','MSN')
+  if alpha == None or alpha['GPe->MSN'] != 0:
+    add('in','Arky' if params['splitGPe'] else 'GPe','MSN')
+
+  # FSI inputs
+  add('ex','CSN','FSI')
+  add('ex','PTN','FSI')
+  if alpha == None or alpha['STN->FSI'] != 0:
+    add('ex','STN','FSI')
+  add('in','Arky' if params['splitGPe'] else 'GPe','FSI')
+  add('ex','CMPf','FSI')
+  add('in','FSI','FSI')
+
+  # STN inputs
+  add('ex','PTN','STN')
+  add('ex','CMPf','STN')
+  add('in','Prot' if params['splitGPe'] else 'GPe','STN')
+
+  # GPe inputs
+  if params['splitGPe']:
+    add('ex','CMPf','Arky')
+    add('ex','STN','Arky')
+    add('in','MSN','Arky')
+    add('in','Prot','Arky')
+    add('in',recurrent_source('Arky', params),'Arky', key='ArkyArky')
+    add('ex','CMPf','Prot')
+    add('ex','STN','Prot')
+    add('in','MSN','Prot')
+    add('in','Arky','Prot')
+    add('in',recurrent_source('Prot', params),'Prot', key='ProtProt')
+  else:
+    add('ex','CMPf','GPe')
+    add('ex','STN','GPe')
+    add('in','MSN','GPe')
+    add('in',recurrent_source('GPe', params),'GPe', key='GPeGPe')
+
+  # GPi inputs
+  add('in','MSN','GPi')
+  add('ex','STN','GPi')
+  add('in','Prot' if params['splitGPe'] else 'GPe','GPi')
+  add('ex','CMPf','GPi')
+
+  return table
+
+#------------------------------------------
+# Receptors blocked in each target nucleus by an antagonist injection
+# Returns a dictionary {target: list of blocked receptors}
+# An unknown experiment blocks all the inputs of the injection site, an unknown injection site is an error
+#------------------------------------------
+def antagonist_mask(antagInjectionSite, antag, params):
+  if antagInjectionSite == 'none':
+    return {}
+  if antagInjectionSite not in antagonists:
+    raise KeyError('Unknown antagonist injection site: '+antagInjectionSite)
+  if antagInjectionSite == 'GPe' and params['splitGPe']:
+    targets = ['Arky','Prot']
+  else:
+    targets = [antagInjectionSite]
+  if antag in antagonists.get(antagInjectionSite, []):
+    blocked = antag.split('+')
+  else:
+    print antagInjectionSite,": unknown antagonist experiment:",antag
+    blocked = ['AMPA','NMDA','GABAA']
+  return dict((tgt, blocked) for tgt in targets)
+
+#------------------------------------------
+# Applies a receptor mask to the table: the blocked receptors are removed from
+# the projections they target, and projections without any receptor left are dropped
+#------------------------------------------
+def apply_mask(table, mask):
+  masked = []
+  for row in table:
+    if row['tgt'] not in mask:
+      masked.append(row)
+      continue
+    remaining = tuple(r for r in receptors[row['type']] if r not in mask[row['tgt']])
+    if len(remaining) > 0:
+      newRow = dict(row)
+      newRow['type'] = connectionType[remaining]
+      masked.append(newRow)
+  return masked
+
+#------------------------------------------
+# Reorders the table by target population, then by receptor
+# (AMPA-bearing connections first, then NMDA-only, then GABAA), keeping the table order otherwise
+#------------------------------------------
+def grouped_order(table):
+  targets = []
+  for row in table:
+    if row['tgt'] not in targets:
+      targets.append(row['tgt'])
+  rank = {'ex': 0, 'AMPA': 0, 'NMDA': 1, 'in': 2}
+  return sorted(table, key=lambda row: (targets.index(row['tgt']), rank[row['type']]))
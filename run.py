@@ -25,6 +25,24 @@ import string
 # load base and custom parameterizations
 import importlib
 import numpy as np
+import itertools
+
+# estimate the memory needed by the runs
+import memoryEstimate
+import math
+
+# parameters that can be swept on a network already built
+from projections import inplace_param
+
+# space-filling designs over parameter ranges
+import samplingDesigns
+
+# firing rate ranges at rest, to rank the runs having the same score
+from LG14 import FRRNormal
+import csv
+
+# results of the runs already simulated
+import runCache
 
 # write run parameterization
 import json
@@ -34,6 +52,9 @@ import os.path
 import os
 import datetime
 
+# numerical parameters in which the network size is not monotonic: all their values are estimated (see JobDispatcher.corners)
+nonMonotonicParams = ['LG14modelID']
+
 
 class JobDispatcher:
 
@@ -47,6 +68,13 @@ class JobDispatcher:
     self.storeGDF = cmd_args.gdf
     self.splitGPe = cmd_args.splitGPe
     self.mock = cmd_args.mock
+    self.estimate = cmd_args.estimate
+    self.inplace = cmd_args.inplace
+    self.sweepPoints = None # with --inplace, points swept by each run, see inplaceExplo()
+    self.halving = cmd_args.halving
+    self.candidates = None # with --halving, parameterizations collected by recParamExplo instead of being run, see halvingExplo()
+    self.launched = {} # directories of the runs launched, by hash of their canonical parameters (see runCache.py)
+    self.memPerCpu = 2000 # MB, updated by check_memory()
     self.tag = cmd_args.tag
     self.sim_counter = self.last_sim = 0
     self.get_git_info()
@@ -87,7 +115,7 @@ class JobDispatcher:
 
   def load_cmdline_config(self, cmd_args):
     # Loads the options from the commandline, overriding all previous parameterizations
-    self.params.update({k: v for k, v in vars(cmd_args).items() if k in ['LG14modelID', 'whichTest', 'nbcpu', 'nbCh', 'email', 'nestSeed', 'pythonSeed', 'splitGPe'] if v != None})
+    self.params.update({k: v for k, v in vars(cmd_args).items() if k in ['LG14modelID', 'whichTest', 'nbcpu', 'nbnodes', 'nbCh', 'email', 'nestSeed', 'pythonSeed', 'splitGPe'] if v != None})
 
   def create_workspace(self, IDstring):
     # Initialize the experiment-specific directory named with IDstring and populate it with the required files
@@ -128,6 +156,23 @@ class JobDispatcher:
       IDstring = 'array_'+self.timeString
     if self.tag != '':
       IDstring += '_'+self.tag
+    if self.sweepPoints != None:
+      params = dict(params, sweepPoints=self.sweepPoints)
+    # runs identical to a previous one (same canonical parameters) are not simulated again
+    if self.platform != 'SangoArray':
+      key = runCache.param_hash(params)
+      if key in self.launched:
+        print('Identical to '+self.launched[key]+': not launched')
+        return self.launched[key]
+      self.launched[key] = IDstring
+      if self.params['runCache'] != None and runCache.lookup(self.params['runCache'], params) != None:
+        print('Create subdirectory: '+IDstring)
+        os.makedirs(IDstring)
+        # the parameters are written as well, so that the directory looks like the one of a completed run
+        self.write_modelParams(IDstring, params, path=IDstring+'/modelParams.py')
+        runCache.fetch(self.params['runCache'], params, IDstring)
+        print('Results fetched from the cache '+self.params['runCache']+': not launched')
+        return IDstring
     # The first 3 steps initialize the directory and populate it with the configurations files
     # Due to limitations of Sango filesystem, when platform == 'SangoArray', we postpone the creation of directories until the job is actually run
     if self.platform != 'SangoArray':
@@ -141,8 +186,11 @@ class JobDispatcher:
       ###################
       # LOCAL EXECUTION #
       ###################
-      # just launch the script
-      command = 'python '+params['whichTest']+'.py'
+      # just launch the script, with MPI if several processes are requested
+      if int(params['nbnodes']) > 1:
+        command = 'mpirun -np '+str(params['nbnodes'])+' python '+params['whichTest']+'.py'
+      else:
+        command = 'python '+params['whichTest']+'.py'
     elif self.platform == 'Sango':
       ###########################
       # SANGO CLUSTER EXECUTION #
@@ -151,7 +199,7 @@ class JobDispatcher:
       # #SBATCH --mem-per-cpu=1G changed for #SBATCH --mem-per-cpu=200M
       slurmOptions = ['#SBATCH --time='+params['durationH']+':'+params['durationMin']+':00 \n',
                       '#SBATCH --partition=compute \n',
-                      '#SBATCH --mem-per-cpu=2000M \n',
+                      '#SBATCH --mem-per-cpu='+str(self.memPerCpu)+'M \n',
                       '#SBATCH --ntasks=1 \n',
                       '#SBATCH --cpus-per-task='+str(params['nbcpu'])+' \n',
                       '#SBATCH --job-name=sBCBG_'+IDstring+'\n',
@@ -170,7 +218,12 @@ class JobDispatcher:
       script.writelines(slurmOptions)
       script.writelines(moduleUse)
       script.writelines(moduleLoad)
-      script.writelines('time srun python '+params['whichTest']+'.py \n')
+      if self.params['runCache'] != None:
+        # the results are fetched from the cache if an identical run completed meanwhile, and stored there otherwise
+        script.writelines('python runCache.py fetch '+self.params['runCache']+' || time srun python '+params['whichTest']+'.py \n')
+        script.writelines('python runCache.py store '+self.params['runCache']+' \n')
+      else:
+        script.writelines('time srun python '+params['whichTest']+'.py \n')
       script.close()
       # execute the script file
       command = 'sbatch go.slurm'
@@ -198,6 +251,11 @@ class JobDispatcher:
           pf = open(IDstring+'/'+p+'.txt','w')
           pf.writelines('\n'.join(varied_params[p])+'\n')
           pf.close()
+        if self.design:
+          # with a sampling design, each run decodes its own parameterization from its number (see samplingDesigns.design_point)
+          pf = open(IDstring+'/designParams.py','w')
+          pf.writelines('design = '+repr(self.params)+'\n')
+          pf.close()
         self.write_modelParams(IDstring, self.params, path=IDstring+'/baseModelParams.py')
         #---
         # write the firestarter file
@@ -205,7 +263,19 @@ class JobDispatcher:
         os.system('cp sango_firestarter.sh ' + IDstring + '/firestarter.sh')
         for f in self.files_to_transfer:
           os.system('echo "cp \$xpbase/../' + f + ' \$(pwd)/" >> ' + IDstring + '/firestarter.sh')
-        os.system('echo "python ' + params['whichTest'] + '.py" >> ' + IDstring + '/firestarter.sh')
+        if self.design:
+          firestarter = open(IDstring+'/firestarter.sh','a')
+          firestarter.writelines(['cp $xpbase/designParams.py $(pwd)/\n',
+                                  'echo "from samplingDesigns import design_point" >> modelParams.py\n',
+                                  'echo "from designParams import design" >> modelParams.py\n',
+                                  'echo "params = design_point(design, $xpnumber)" >> modelParams.py\n'])
+          firestarter.close()
+        if self.params['runCache'] != None:
+          # each run of the array looks for its results in the cache before being simulated
+          os.system('echo "python runCache.py fetch ' + self.params['runCache'] + ' || python ' + params['whichTest'] + '.py" >> ' + IDstring + '/firestarter.sh')
+          os.system('echo "python runCache.py store ' + self.params['runCache'] + '" >> ' + IDstring + '/firestarter.sh')
+        else:
+          os.system('echo "python ' + params['whichTest'] + '.py" >> ' + IDstring + '/firestarter.sh')
         os.system('echo "cp params_score.csv \$dir/" >> ' + IDstring + '/firestarter.sh')
         os.system('echo "rm -rf /scratch/\`basename \$tempdir\`" >> ' + IDstring + '/firestarter.sh')
         #os.system('echo "find \$(pwd)/* ! -name \'params_score.csv\' -exec rm -rf {} +" >> ' + IDstring + '/firestarter.sh')
@@ -215,7 +285,7 @@ class JobDispatcher:
         sango_header = '#!/bin/bash\n\n'
         slurmOptions = ['#SBATCH --time='+params['durationH']+':00:00 \n',
                         '#SBATCH --partition=compute \n',
-                        '#SBATCH --mem-per-cpu=2000M \n',
+                        '#SBATCH --mem-per-cpu='+str(self.memPerCpu)+'M \n',
                         '#SBATCH --ntasks='+str(array_size)+' \n',
                         '#SBATCH --cpus-per-task='+str(params['nbcpu'])+' \n',
                         '#SBATCH --job-name=sBCBG_'+IDstring+'\n',
@@ -244,7 +314,7 @@ class JobDispatcher:
         script.writelines('    (>&2 echo "XP NAME: $XPNAME") \n')
         script.writelines('    (>&2 echo "XP DIR: $XPDIR") \n')
         script.writelines('    PROCESS_STARTED=$(($PROCESS_STARTED+1)) \n')
-        script.writelines('    srun -c1 --mem-per-cpu=2000M --exclusive --ntasks 1 --chdir $XPDIR ../../../firestarter.sh & \n')
+        script.writelines('    srun -c'+str(params['nbcpu'])+' --mem-per-cpu='+str(self.memPerCpu)+'M --exclusive --ntasks 1 --chdir $XPDIR ../../../firestarter.sh & \n')
         script.writelines('  fi \n')
         script.writelines('done \n')
         script.writelines('wait \n')
@@ -310,17 +380,86 @@ class JobDispatcher:
       # execute the script file
       command = 'pjsub ./my_job.sh'
     # starting/queuing the simulation
-    if command != '':
-      if self.mock == False:
-        # not a mock simulation and not an intermediate SangoArray step
-        print('Executing: '+ command)
-        os.system(command)
-        print('done.')
-      else:
-        print('Mock simulation / Command not executed: '+command)
+    if self.execute(command) and self.platform == 'Local' and self.params['runCache'] != None:
+      # local runs are over when os.system returns
+      runCache.store(self.params['runCache'], params, '.')
     if self.platform != 'SangoArray':
       # need to backtrack one directory unless on SangoArray
       os.chdir('..')
+    return IDstring
+
+  def execute(self, command):
+    # Starts or queues a simulation, unless this is a mock simulation or an intermediate SangoArray step (empty command)
+    # Returns True if the command was executed
+    if command == '':
+      return False
+    if self.mock == False:
+      print('Executing: '+ command)
+      os.system(command)
+      print('done.')
+      return True
+    print('Mock simulation / Command not executed: '+command)
+    return False
+
+  def runParams(self, runDir):
+    # Parameters of a previous run, from its modelParams.py
+    variables = {}
+    exec(open(runDir+'/modelParams.py').read(), variables)
+    return variables['params']
+
+  def resumeRuns(self, prefix):
+    # With --resume on the Local, Sango or K platforms: relaunches, in their own directory, the runs of the
+    # exploration <prefix>_xp* (prefix: date, as in the directory names) which did not write their score
+    dirs = sorted(d for d in os.listdir('.') if d.startswith(prefix+'_xp') and os.path.isdir(d))
+    failed = [d for d in dirs if not runCache.completed(self.runParams(d), d)]
+    print(str(len(dirs)-len(failed))+' runs completed, '+str(len(failed))+' to relaunch')
+    resumeFile = open('resume_'+self.timeString+'.txt','w')
+    resumeFile.writelines([d+'\n' for d in failed])
+    resumeFile.close()
+    for d in failed:
+      params = self.runParams(d)
+      os.chdir(d)
+      if self.platform == 'Local':
+        if int(params['nbnodes']) > 1:
+          self.execute('mpirun -np '+str(params['nbnodes'])+' python '+params['whichTest']+'.py')
+        else:
+          self.execute('python '+params['whichTest']+'.py')
+      elif self.platform == 'Sango':
+        self.execute('sbatch go.slurm')
+      elif self.platform == 'K':
+        self.execute('pjsub ./my_job.sh')
+      os.chdir('..')
+
+  def resumeArray(self, IDstring):
+    # With --resume on the SangoArray platform: relaunches the runs of the array IDstring which did not copy back
+    # their params_score.csv. Their numbers are written in resume_<date>.lst (not .txt: sango_firestarter.sh reads the
+    # values of the varied parameters from the .txt files of the array directory), and a copy of the slurm array file
+    # iterates over this compacted list instead of the full range: each run still finds its parameters from the
+    # name of its directory (see sango_firestarter.sh)
+    IDstring = IDstring.rstrip('/')
+    indices = []
+    for root, subdirs, files in os.walk(IDstring):
+      levels = os.path.relpath(root, IDstring).split(os.sep)
+      if len(levels) == 3 and all(len(l) == 3 and l.isdigit() for l in levels) and 'params_score.csv' not in files:
+        indices.append(int(''.join(levels)))
+    indices.sort()
+    print(str(len(indices))+' runs to relaunch in '+IDstring)
+    if len(indices) == 0:
+      return
+    resumeName = 'resume_'+self.timeString
+    resumeFile = open(IDstring+'/'+resumeName+'.lst','w')
+    resumeFile.writelines([str(i)+'\n' for i in indices])
+    resumeFile.close()
+    name = os.path.basename(IDstring)
+    lines = open(IDstring+'/'+name+'.slurm').readlines()
+    array_size = int([l for l in lines if l.startswith('#SBATCH --ntasks=')][0].split('=')[1])
+    for i, l in enumerate(lines):
+      if l.startswith('for subtask in'):
+        lines[i] = 'for subtask in `sed -n "$(($SLURM_ARRAY_TASK_ID*'+str(array_size)+'+1)),$((($SLURM_ARRAY_TASK_ID+1)*'+str(array_size)+'))p" '+resumeName+'.lst` \n'
+    script = open(IDstring+'/'+resumeName+'.slurm','w')
+    script.writelines(lines)
+    script.close()
+    self.execute('cd '+IDstring+' && sbatch --array=0-'+str((len(indices)-1)/array_size)+'%200 '+resumeName+'.slurm')
 
   def recParamExplo(self, pdict):
     # Performs the recursive exploration of parameters values
@@ -335,13 +474,119 @@ class JobDispatcher:
         calldict[paramK]=v
         self.recParamExplo(calldict)
     except:
+      if self.candidates != None:
+        self.candidates.append(dict(pdict)) # recParamExplo goes on modifying pdict
+        return
       self.launchOneParameterizedRun(self.sim_counter, pdict)
       self.sim_counter += 1
 
+  def inplaceExplo(self, pdict):
+    # With --inplace, one run per combination of the parameters that change the structure of the network,
+    # each run sweeping over all the combinations of the other varied parameters (Ie, G, THETA) on
+    # a single network (see inplaceSweep.py)
+    swept = dict((k, v) for k, v in pdict.items() if isinstance(v, list) and inplace_param(k))
+    keys = sorted(swept.keys())
+    self.sweepPoints = [dict(zip(keys, values)) for values in itertools.product(*[swept[k] for k in keys])]
+    structural = pdict.copy()
+    for k in keys:
+      structural[k] = swept[k][0] # the network is built with the first point
+    structural['whichTest'] = 'inplaceSweep'
+    print('Sweeping in place over '+str(len(self.sweepPoints))+' points of '+', '.join(keys)+' in each run')
+    self.recParamExplo(structural)
+
+  def runScore(self, IDstring):
+    # Score written by the run in its directory (score.txt), or None if the run did not complete
+    try:
+      return float(open(IDstring+'/score.txt').read())
+    except (IOError, ValueError):
+      return None
+
+  def runRung(self, name, candidates, **fidelity):
+    # Runs all the candidates of a rung of --halving, one after the other, with the parameters `fidelity` overridden
+    # Returns the list of (candidate, score, directory) of the candidates, with the candidates unmodified
+    print('\n### Rung '+name+': '+str(len(candidates))+' runs ###')
+    results = []
+    for pdict in candidates:
+      IDstring = self.launchOneParameterizedRun(self.sim_counter, dict(pdict, **fidelity))
+      self.sim_counter += 1
+      score = self.runScore(IDstring)
+      if score == None:
+        print('No score found in '+IDstring+': the candidate will not be promoted')
+      results.append((pdict, score, IDstring))
+    return results
+
+  def restDistance(self, IDstring):
+    # Distance of the rates at rest of a run (<N>_Rate in params_score.csv) to the middle of their FRRNormal range,
+    # summed over the nuclei in widths of the ranges, or infinity if the run wrote no rates
+    try:
+      rates = dict((row[0][:-len('_Rate')], float(row[1])) for row in csv.reader(open(IDstring+'/params_score.csv')) if len(row) == 2 and row[0].endswith('_Rate'))
+    except (IOError, ValueError):
+      return float('inf')
+    distances = [abs(r - (FRRNormal[N][0] + FRRNormal[N][1]) / 2.) / (FRRNormal[N][1] - FRRNormal[N][0]) for N, r in rates.items() if N in FRRNormal]
+    return sum(distances) if len(distances) > 0 else float('inf')
+
+  def promoted(self, results):
+    # Best fraction params['halvingFraction'] of the results of a rung (at least one candidate), among those having a score
+    # The candidates with the same score are ranked by the distance of their rates at rest to the middle of FRRNormal
+    results = sorted([r for r in results if r[1] != None], key=lambda r: (-r[1], self.restDistance(r[2])))
+    return results[:int(math.ceil(len(results) * self.params['halvingFraction']))]
+
+  def halvingExplo(self, pdict):
+    # With --halving, multi-fidelity exploration by successive halving of the parameterizations:
+    # 1. all of them are scored at rest only (testPlausibility with restOnly), with tSimu = halvingTSimu
+    # 2. the best fraction halvingFraction is scored with their tSimu and the deactivation tests
+    # 3. the best fraction of these is run again with halvingSeeds other nestSeed & pythonSeed, and ranked by mean score
+    # The runs are started one after the other, as each rung needs the scores of the previous one (Local platform only)
+    # The scores of all the rungs are written in halving_<date>.csv
+    if self.design:
+      candidates = [samplingDesigns.design_point(pdict, i) for i in range(samplingDesigns.design_size(pdict))]
+    else:
+      self.candidates = []
+      self.recParamExplo(pdict)
+      candidates, self.candidates = self.candidates, None
+    varied = sorted(k for k, v in pdict.items() if isinstance(v, (list, tuple)) and k not in ['nestSeed', 'pythonSeed'])
+    nbSeeds = self.params['halvingSeeds']
+    summary = []
+
+    rest = self.runRung('rest', candidates, tSimu=pdict['halvingTSimu'], restOnly=True)
+    summary += [('rest', IDstring, score, c) for c, score, IDstring in rest]
+
+    full = self.runRung('full', [c for c, score, IDstring in self.promoted(rest)], restOnly=False)
+    summary += [('full', IDstring, score, c) for c, score, IDstring in full]
+
+    survivors = self.promoted(full)
+    seeds = self.runRung('seeds', [dict(c, nestSeed=c['nestSeed']+i, pythonSeed=c['pythonSeed']+i) for c, score, IDstring in survivors for i in range(1, nbSeeds+1)], restOnly=False)
+    summary += [('seeds', IDstring, score, c) for c, score, IDstring in seeds]
+
+    print('\n### Final ranking (mean score over '+str(nbSeeds+1)+' seeds) ###')
+    ranking = []
+    for j, (c, score, IDstring) in enumerate(survivors):
+      scores = [score] + [s for d, s, ID in seeds[j*nbSeeds:(j+1)*nbSeeds] if s != None]
+      ranking.append((np.mean(scores), IDstring, c))
+    for meanScore, IDstring, c in sorted(ranking, key=lambda r: r[0], reverse=True):
+      print('* '+IDstring+': '+str(meanScore)+' - '+', '.join(k+'='+str(c[k]) for k in varied))
+
+    with open('halving_'+self.timeString+'.csv', 'w') as f:
+      f.write(','.join(['rung', 'directory', 'sim_score'] + varied + ['nestSeed', 'pythonSeed'])+'\n')
+      for rung, IDstring, score, c in summary:
+        f.write(','.join([rung, IDstring, str(score)] + [str(c[k]) for k in varied] + [str(c['nestSeed']), str(c['pythonSeed'])])+'\n')
+
+  def designExplo(self, pdict):
+    # With samplingDesign 'lhs' or 'sobol', the parameters given as ranges (min, max) are sampled with nbSamples points,
+    # crossed with the values of the list-valued parameters: run i is decoded from its number by samplingDesigns.design_point
+    print('Sampling '+', '.join(samplingDesigns.ranged_params(pdict))+' with a '+pdict['samplingDesign']+' design: '+str(samplingDesigns.design_size(pdict))+' runs')
+    for i in range(samplingDesigns.design_size(pdict)):
+      self.launchOneParameterizedRun(self.sim_counter, samplingDesigns.design_point(pdict, i))
+      self.sim_counter += 1
+
   def variedParams(self):
     # fetches the parameters to be varied (those expressed in list)
     # and computes the total number of simulations
     varied = {}
+    if self.design:
+      # the runs decode their parameters themselves
+      self.last_sim = samplingDesigns.design_size(self.params) - 1
+      return varied
     self.last_sim = 1 # also computes the last simulation offset
     for param_key in self.params.keys():
       param_vals = self.params[param_key]
@@ -356,19 +601,107 @@ class JobDispatcher:
     if self.params['nbcpu'] < 0:
       self.params['nbcpu'] = multiprocessing.cpu_count()
       print('Using guessed number of CPUs: '+str(self.params['nbcpu']))
+    # the runs use the cache from their own directory
+    if self.params['runCache'] != None:
+      self.params['runCache'] = os.path.abspath(self.params['runCache'])
+
+  def corners(self):
+    # Parameterizations at the corners of the explored domain: the network size is monotonic in each
+    # numerical parameter, so that the largest network is one of them (non-numerical values are all kept)
+    # The parameters of nonMonotonicParams (e.g. LG14modelID, which selects unrelated parameterizations)
+    # are not: all their values are kept
+    values = []
+    for k, v in self.params.items():
+      if isinstance(v, tuple) and k in nonMonotonicParams:
+        values.append([(k, x) for x in range(v[0], v[1]+1)]) # integer range of a sampling design
+      elif isinstance(v, tuple):
+        values.append([(k, v[0]), (k, v[1])]) # range of a sampling design
+      elif not isinstance(v, list):
+        values.append([(k, v)])
+      elif k not in nonMonotonicParams and all(isinstance(x, (int, float)) and not isinstance(x, bool) for x in v):
+        values.append([(k, min(v)), (k, max(v))])
+      else:
+        values.append([(k, x) for x in v])
+    return [dict(c) for c in itertools.product(*values)]
+
+  def check_memory(self):
+    # Estimates the memory needed by the largest network of the exploration, before anything is queued:
+    # raises the number of cpus if the memory per cpu would be too large (Sango), sets the memory to request,
+    # and refuses the configurations that won't fit
+    worst = None
+    for params in self.corners():
+      nbInstances = params['ensembleSize'] if params['whichTest'] == 'testEnsemble' else 1
+      est = memoryEstimate.estimate(params, nbProcs=int(params['nbnodes']), nbInstances=nbInstances)
+      est['nbProcs'] = int(params['nbnodes'])
+      if worst == None or est['MB'] * est['nbProcs'] > worst['MB'] * worst['nbProcs']:
+        worst = est
+    memoryEstimate.print_estimate(worst)
+    needed = worst['MB'] * self.params['memMargin']
+    if self.platform == 'Local':
+      # all the MPI processes run on this machine
+      available = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / 1024.**2
+      if needed * worst['nbProcs'] > available:
+        raise SystemExit('Refusing to run: '+str(int(needed * worst['nbProcs']))+' MB needed, '+str(int(available))+' MB available on this machine')
+    elif self.platform in ['Sango', 'SangoArray']:
+      # each run (also those of an array) is given nbcpu cpus, see --cpus-per-task in the slurm files
+      nbcpu = max(self.params['nbcpu']) if isinstance(self.params['nbcpu'], list) else self.params['nbcpu']
+      nbcpuNeeded = int(math.ceil(needed / self.params['memPerCpuMax']))
+      if nbcpuNeeded > self.params['nbcpuMax']:
+        raise SystemExit('Refusing to run: '+str(int(needed))+' MB needed, more than '+str(self.params['nbcpuMax'])+' cpus with '+str(self.params['memPerCpuMax'])+' MB each')
+      if nbcpuNeeded > nbcpu:
+        if isinstance(self.params['nbcpu'], list):
+          raise SystemExit('Refusing to run: '+str(int(needed))+' MB needed, at least '+str(nbcpuNeeded)+' cpus should be used')
+        print('Using '+str(nbcpuNeeded)+' CPUs instead of '+str(nbcpu)+' to fit in memory')
+        self.params['nbcpu'] = nbcpu = nbcpuNeeded
+      self.memPerCpu = int(math.ceil(needed / nbcpu / 100.)) * 100
+      if self.memPerCpu > self.params['memPerCpuMax']:
+        raise SystemExit('Refusing to run: '+str(self.memPerCpu)+' MB needed per cpu, more than '+str(self.params['memPerCpuMax'])+' MB')
+      print('Requesting '+str(self.memPerCpu)+' MB per cpu')
 
   def dispatch(self):
     # Loads the configurations and launch the runs
+    if self.cmd_args.resume != None:
+      # the runs of a previous exploration keep their own parameters
+      if self.platform == 'SangoArray':
+        self.resumeArray(self.cmd_args.resume)
+      else:
+        self.resumeRuns(self.cmd_args.resume)
+      return
     self.load_base_config()
     if self.cmd_args.custom != None:
       self.load_custom_config(self.cmd_args.custom)
     self.load_cmdline_config(self.cmd_args)
     # replace values to be set at runtime (for now, only used when "nbcpu=-1")
     self.expandValues()
+    # estimate the memory needed, and adapt the resources requested (or stop if the runs won't fit)
+    self.check_memory()
+    if self.estimate:
+      return
     # initialize the file list to transfer
-    self.files_to_transfer = ['LGneurons.py', 'iniBG.py', self.params['whichTest']+'.py', 'nstrand.py', 'solutions_simple_unique.csv', '__init__.py']
+    self.files_to_transfer = ['LGneurons.py', 'LG14.py', 'iniBG.py', self.params['whichTest']+'.py', 'nstrand.py', 'projections.py', 'mpiTools.py', 'spikeIO.py', 'spikePlot.py', 'ensembleBG.py', 'solutions_simple_unique.csv', '__init__.py']
+    self.design = self.params['samplingDesign'] != 'grid'
+    if self.design:
+      self.files_to_transfer += ['samplingDesigns.py']
+    if self.params['runCache'] != None:
+      self.files_to_transfer += ['runCache.py']
     # performs the recurrent exploration of parameterizations to run
-    self.recParamExplo(self.params)
+    if self.inplace:
+      if self.platform == 'SangoArray':
+        raise SystemExit('--inplace is not available with SangoArray')
+      if self.design:
+        raise SystemExit('--inplace sweeps the cartesian product of the listed values: it can not be used with a sampling design')
+      self.files_to_transfer += ['inplaceSweep.py', 'testPlausibility.py']
+      self.inplaceExplo(self.params)
+    elif self.halving:
+      if self.platform != 'Local':
+        raise SystemExit('--halving needs the scores of each rung before starting the next one: only available with the Local platform')
+      if self.params['whichTest'] != 'testPlausibility':
+        raise SystemExit('--halving promotes the candidates with the scores of testPlausibility')
+      self.halvingExplo(self.params)
+    elif self.design:
+      self.designExplo(self.params)
+    else:
+      self.recParamExplo(self.params)
 
 
 
@@ -381,8 +714,9 @@ def main():
     Optional = parser.add_argument_group('optional arguments')
     Optional.add_argument('--custom', type=str, help='Provide a custom file to initialize parameters - without the .py extension', default=None)
     Optional.add_argument('--LG14modelID', type=int, help='Which LG14 parameterization to use?', default=None)
-    Optional.add_argument('--whichTest', type=str, help='Which test to run?', choices=['testPlausibility', 'testGPR01', 'testPauses', 'testChannelBG'], default=None)
+    Optional.add_argument('--whichTest', type=str, help='Which test to run?', choices=['testPlausibility', 'testGPR01', 'testPauses', 'testChannelBG', 'testEnsemble'], default=None)
     Optional.add_argument('--nbcpu', type=int, help='Number of CPU to use (-1 to guess)', default=None)
+    Optional.add_argument('--nbnodes', type=str, help='Number of MPI processes (nodes on K, mpirun with --platform=Local)', default=None)
     Optional.add_argument('--nbCh', type=int, help='Number of Basal Ganglia channels to simulate', default=None)
     Optional.add_argument('--interactive', action="store_true", help='Set to enable the display of debug plots', default=False)
     Optional.add_argument('--gdf', action="store_true", help='Set to store spike rasters (gdf files) of the simulation', default=False)
@@ -392,6 +726,10 @@ def main():
     Optional.add_argument('--nestSeed', type=int, help='Nest seed (affects the Poisson spike train generator)', default=None)
     Optional.add_argument('--pythonSeed', type=int, help='Python seed (affects connection map)', default=None)
     Optional.add_argument('--mock', action="store_true", help='Does not start the simulation, only writes experiment-specific directories', default=False)
+    Optional.add_argument('--estimate', action="store_true", help='Only prints the estimated network size and memory needed', default=False)
+    Optional.add_argument('--inplace', action="store_true", help='Build one network per structural parameterization, and sweep the varied Ie, G and THETA parameters on it (inplaceSweep.py)', default=False)
+    Optional.add_argument('--resume', type=str, help='Relaunch only the runs of a previous exploration that did not complete: its array directory with SangoArray, or the date prefix of its run directories otherwise', default=None)
+    Optional.add_argument('--halving', action="store_true", help='Successive halving: all parameterizations are run short and at rest only, the best ones with the deactivation tests, and the survivors with several seeds (Local platform, testPlausibility)', default=False)
     
     cmd_args = parser.parse_args()
     
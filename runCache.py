@@ -0,0 +1,155 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+##
+## runCache.py
+##
+## Content-addressed cache of the results of the runs, shared by successive explorations:
+## a run is identified by the sha1 of its canonical parameters, i.e. its `params` dictionary without the
+## parameters that have no effect on its results (see `inactive_params`), with all the numbers as floats
+## The results of a run (see resultFiles) are stored in <cache>/<sha1>/, with the canonical parameters
+## The code of the model is not part of the key: the cache has to be emptied when the model changes
+## This module does not depend on nest
+##
+## usage, in the directory of a run (containing its modelParams.py):
+##   python runCache.py fetch <cache>: copies the cached results of the run here (exit status 1 if there are none)
+##   python runCache.py store <cache>: stores the results of the run in the cache
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+# parameters used by run.py only, or by other scripts than the simulations
+unusedParams = ['email', 'durationH', 'durationMin', 'memPerCpuMax', 'nbcpuMax', 'memMargin',
+                'halvingTSimu', 'halvingFraction', 'halvingSeeds', 'samplingDesign', 'nbSamples', 'samplingSeed',
+                'calibrationPoints', 'calibrationMaxIter', 'runCache']
+
+# parameters used by a single test (whichTest)
+testParams = {'restOnly': 'testPlausibility', 'ensembleSize': 'testEnsemble', 'GeorgopoulosSweep': 'testGPR01', 'sweepPoints': 'inplaceSweep'}
+
+# parameters of the two parts of the GPe, only used with splitGPe
+splitGPePattern = re.compile('Arky|Prot')
+
+# results of a run, relative to its directory
+resultFiles = ['score.txt', 'params_score.csv', 'ensemble_scores.csv', 'sweep_scores.csv', 'log/firingRates.csv', 'log/OutSummary.txt']
+
+#------------------------------------------
+# Parameters of `params` that have no effect on the results of the run
+#------------------------------------------
+def inactive_params(params):
+  inactive = [k for k in params.keys() if k in unusedParams]
+  inactive += [k for k, test in testParams.items() if k in params and params.get('whichTest') != test]
+  if not params.get('splitGPe', False):
+    inactive += [k for k in params.keys() if splitGPePattern.search(k)]
+  if params.get('nbCh', 1) == 1:
+    # the projection types only matter between channels
+    inactive += [k for k in params.keys() if k.startswith('cType')] + ['diffuseMode']
+  if not params.get('replayInputs', False):
+    inactive += ['replayCache']
+  if not params.get('warmStart', False):
+    inactive += ['warmStartOffset']
+  return inactive
+
+#------------------------------------------
+# Canonical form of a value: numbers as floats (3 and 3.0 are the same parameter)
+#------------------------------------------
+def canonical_value(v):
+  if isinstance(v, bool) or v == None:
+    return v
+  if isinstance(v, (int, long, float)):
+    return float(v)
+  if isinstance(v, (list, tuple)):
+    return [canonical_value(x) for x in v]
+  if isinstance(v, dict):
+    return dict((k, canonical_value(x)) for k, x in v.items())
+  return v
+
+#------------------------------------------
+# Canonical parameters of a run, and their hash
+#------------------------------------------
+def canonical_params(params):
+  inactive = inactive_params(params)
+  return dict((k, canonical_value(v)) for k, v in params.items() if k not in inactive)
+
+def param_hash(params):
+  return hashlib.sha1(json.dumps(canonical_params(params), sort_keys=True)).hexdigest()
+
+#------------------------------------------
+# True if the run with parameters `params`, in the directory `runDir`, completed: it wrote its score
+# (for inplaceSweep, the scores of all its points). Also used by run.py --resume
+#------------------------------------------
+def completed(params, runDir):
+  if params.get('whichTest') == 'inplaceSweep':
+    try:
+      return len(open(os.path.join(runDir, 'sweep_scores.csv')).readlines()) == len(params.get('sweepPoints', [{}])) + 1
+    except IOError:
+      return False
+  return os.path.isfile(os.path.join(runDir, 'score.txt'))
+
+#------------------------------------------
+# Directory of the cached results of the run with parameters `params`, or None if they are not cached
+#------------------------------------------
+def lookup(cachePath, params):
+  entry = os.path.join(cachePath, param_hash(params))
+  if os.path.isdir(entry):
+    return entry
+  return None
+
+#------------------------------------------
+# Copies the cached results of the run with parameters `params` in the directory `runDir`
+# Returns False if they are not cached
+#------------------------------------------
+def fetch(cachePath, params, runDir):
+  entry = lookup(cachePath, params)
+  if entry == None:
+    return False
+  for f in resultFiles:
+    if os.path.isfile(os.path.join(entry, f)):
+      if not os.path.isdir(os.path.dirname(os.path.join(runDir, f))):
+        os.makedirs(os.path.dirname(os.path.join(runDir, f)))
+      shutil.copy(os.path.join(entry, f), os.path.join(runDir, f))
+  return True
+
+#------------------------------------------
+# Stores the results of the run with parameters `params`, found in the directory `runDir`
+# Nothing is stored if the run did not complete (see `completed`) or if its results are already cached
+# The entry is written aside and renamed, so that concurrent runs never see it partially written
+#------------------------------------------
+def store(cachePath, params, runDir):
+  if not completed(params, runDir) or lookup(cachePath, params) != None:
+    return
+  if not os.path.isdir(cachePath):
+    os.makedirs(cachePath)
+  tmp = tempfile.mkdtemp(dir=cachePath)
+  for f in resultFiles:
+    if os.path.isfile(os.path.join(runDir, f)):
+      if not os.path.isdir(os.path.dirname(os.path.join(tmp, f))):
+        os.makedirs(os.path.dirname(os.path.join(tmp, f)))
+      shutil.copy(os.path.join(runDir, f), os.path.join(tmp, f))
+  with open(os.path.join(tmp, 'params.json'), 'w') as f:
+    json.dump(canonical_params(params), f, indent=4, sort_keys=True)
+  try:
+    os.rename(tmp, os.path.join(cachePath, param_hash(params)))
+  except OSError:
+    # stored meanwhile by an identical run
+    shutil.rmtree(tmp)
+
+#---------------------------
+def main():
+  from modelParams import params
+  if len(sys.argv) != 3 or sys.argv[1] not in ['fetch', 'store']:
+    raise SystemExit('usage: python runCache.py fetch|store <cache>')
+  if sys.argv[1] == 'fetch':
+    if not fetch(sys.argv[2], params, '.'):
+      sys.exit(1)
+    print('Results fetched from the cache '+sys.argv[2]+': the simulation is skipped')
+  else:
+    store(sys.argv[2], params, '.')
+
+#---------------------------
+if __name__ == '__main__':
+  main()
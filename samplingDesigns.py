@@ -0,0 +1,136 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+##
+## samplingDesigns.py
+##
+## Space-filling designs over the continuous ranges of parameters, as an alternative to the
+## cartesian products of list-valued parameters explored by run.py
+## A parameter whose value is a tuple (min, max) is sampled with params['nbSamples'] points of the
+## design params['samplingDesign']:
+##   'lhs':   latin hypercube (each range is cut in nbSamples strata, each stratum is sampled once)
+##   'sobol': Sobol sequence (direction numbers of Joe & Kuo, 2008), for up to 21 sampled parameters
+## Integer bounds give integer values (both bounds included), e.g. 'LG14modelID': (0, 14)
+## The list-valued parameters are still crossed with all the samples of the design
+## Each run is decoded from its index alone (`design_point`), so that the runs of an array job can
+## build their parameterization themselves. This module does not depend on nest
+
+import numpy as np
+
+# Sobol direction numbers of the dimensions 2 to 21, (s, a, m_1..m_s) of Joe & Kuo's new-joe-kuo-6.21201
+# the first dimension uses m_i = 1 for all i
+sobolDirections = [(1,  0, [1]),
+                   (2,  1, [1,3]),
+                   (3,  1, [1,3,1]),
+                   (3,  2, [1,1,1]),
+                   (4,  1, [1,1,3,3]),
+                   (4,  4, [1,3,5,13]),
+                   (5,  2, [1,1,5,5,17]),
+                   (5,  4, [1,1,5,5,5]),
+                   (5,  7, [1,1,7,11,19]),
+                   (5, 11, [1,1,5,1,1]),
+                   (5, 13, [1,1,1,3,11]),
+                   (5, 14, [1,3,5,5,31]),
+                   (6,  1, [1,3,3,9,7,49]),
+                   (6, 13, [1,1,1,15,21,21]),
+                   (6, 16, [1,3,1,13,27,49]),
+                   (6, 19, [1,1,1,15,7,5]),
+                   (6, 22, [1,3,1,15,13,25]),
+                   (6, 25, [1,1,5,5,19,61]),
+                   (7,  1, [1,3,7,11,23,15,103]),
+                   (7,  4, [1,3,7,13,13,15,69]),
+                  ]
+sobolBits = 30 # the sequence has 2**sobolBits points
+
+#------------------------------------------
+# Direction numbers V[d, i] of the first `dim` dimensions of the Sobol sequence, scaled by 2**sobolBits
+#------------------------------------------
+def sobol_directions(dim):
+  if dim > len(sobolDirections)+1:
+    raise ValueError('Sobol sequences are available for up to '+str(len(sobolDirections)+1)+' parameters')
+  V = np.zeros((dim, sobolBits), dtype=np.int64)
+  V[0] = [1 << (sobolBits-1-i) for i in range(sobolBits)]
+  for d in range(1, dim):
+    s, a, m = sobolDirections[d-1]
+    for i in range(sobolBits):
+      if i < s:
+        V[d,i] = m[i] << (sobolBits-1-i)
+      else:
+        v = V[d,i-s] ^ (V[d,i-s] >> s)
+        for k in range(1, s):
+          if (a >> (s-1-k)) & 1:
+            v ^= V[d,i-k]
+        V[d,i] = v
+  return V
+
+#------------------------------------------
+# Point `index` of the Sobol sequence in [0,1)^dim (Gray code order)
+# The first point of the sequence (the origin) is skipped
+#------------------------------------------
+def sobol_sample(index, dim):
+  gray = (index+1) ^ ((index+1) >> 1)
+  V = sobol_directions(dim)
+  x = np.zeros(dim, dtype=np.int64)
+  for i in range(sobolBits):
+    if (gray >> i) & 1:
+      x ^= V[:,i]
+  return x / float(1 << sobolBits)
+
+#------------------------------------------
+# Point `index` of a latin hypercube of `nbSamples` points in [0,1)^dim
+# The permutation of the strata of each dimension and the position of each point in its stratum
+# only depend on `seed`, so that each point can be drawn independently of the others
+#------------------------------------------
+def lhs_sample(index, dim, nbSamples, seed):
+  if index >= nbSamples:
+    raise IndexError('Sample '+str(index)+' of a latin hypercube of '+str(nbSamples)+' points')
+  jitter = np.random.RandomState([seed, index]).uniform(size=dim)
+  strata = [np.random.RandomState([seed, nbSamples, d]).permutation(nbSamples)[index] for d in range(dim)]
+  return (np.asarray(strata) + jitter) / float(nbSamples)
+
+#------------------------------------------
+# Parameters sampled by the design (tuple values), and parameters crossed with it (list values)
+#------------------------------------------
+def ranged_params(params):
+  return sorted(k for k, v in params.items() if isinstance(v, tuple))
+
+def listed_params(params):
+  return sorted(k for k, v in params.items() if isinstance(v, list))
+
+#------------------------------------------
+# Number of runs of the exploration of `params`
+#------------------------------------------
+def design_size(params):
+  size = int(np.prod([len(params[k]) for k in listed_params(params)]))
+  if len(ranged_params(params)) > 0:
+    size *= params['nbSamples']
+  return size
+
+#------------------------------------------
+# Parameterization of run `index` of the exploration of `params`: the list-valued parameters are
+# decoded as the digits of a mixed-radix number (fastest varying first), the ranges with the sample of the design
+#------------------------------------------
+def design_point(params, index):
+  ranged = ranged_params(params)
+  if len(ranged) > 0 and params['samplingDesign'] not in ['lhs', 'sobol']:
+    raise ValueError('The ranges of '+', '.join(ranged)+' need samplingDesign `lhs` or `sobol`, not `'+str(params['samplingDesign'])+'`')
+
+  point = dict(params)
+  sample = index
+  for k in listed_params(params):
+    sample, j = divmod(sample, len(params[k]))
+    point[k] = params[k][j]
+  if len(ranged) == 0:
+    return point
+
+  if params['samplingDesign'] == 'sobol':
+    u = sobol_sample(sample, len(ranged))
+  else:
+    u = lhs_sample(sample, len(ranged), params['nbSamples'], params['samplingSeed'])
+  for k, x in zip(ranged, u):
+    low, high = params[k]
+    if isinstance(low, int) and isinstance(high, int):
+      point[k] = int(low + np.floor(x * (high - low + 1)))
+    else:
+      point[k] = float(low + x * (high - low))
+  return point
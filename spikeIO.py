@@ -0,0 +1,114 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+##
+## spikeIO.py
+##
+## Loads the spikes recorded by nest spike detectors in .gdf files
+## - all the per-VP files `<label>-<gid>-<vp>.gdf` of a label are discovered automatically
+## - the files are parsed in parallel chunks
+## - the (gid, time) arrays are cached in a binary sidecar `<label>.spikes.npz`,
+##   which is reused as long as the .gdf files are not modified
+
+import os
+import re
+import numpy as np
+import multiprocessing
+
+chunkSize = 32 * 1024 * 1024 # bytes of text parsed by each worker at once
+
+#-------------------------------------------------------------------------------
+# Returns the sorted list of the .gdf files written for `label` in `directory`
+#-------------------------------------------------------------------------------
+def find_gdf(directory, label):
+  pattern = re.compile('^'+re.escape(label)+'-[0-9]+-[0-9]+\.gdf$')
+  return sorted(os.path.join(directory, f) for f in os.listdir(directory) if pattern.match(f))
+
+#-------------------------------------------------------------------------------
+# Splits a file in byte ranges of about `size` bytes, ending on line boundaries
+#-------------------------------------------------------------------------------
+def split_chunks(fileName, size=chunkSize):
+  total = os.path.getsize(fileName)
+  chunks = []
+  start = 0
+  with open(fileName, 'rb') as f:
+    while start < total:
+      f.seek(min(start + size, total))
+      f.readline() # moves to the end of the current line
+      stop = min(f.tell(), total)
+      chunks.append((fileName, start, stop))
+      start = stop
+  return chunks
+
+#-------------------------------------------------------------------------------
+# Parses a byte range of a .gdf file (one spike per line: gid, time)
+# Returns a (n, 2) array
+#-------------------------------------------------------------------------------
+def parse_chunk(chunk):
+  fileName, start, stop = chunk
+  with open(fileName, 'rb') as f:
+    f.seek(start)
+    text = f.read(stop - start)
+  return np.fromstring(text, sep=' ').reshape(-1, 2)
+
+#-------------------------------------------------------------------------------
+# Size and modification time of the files, used to check that a cache is up to date
+#-------------------------------------------------------------------------------
+def signature(fileList):
+  return np.array([repr((os.path.basename(f), os.path.getsize(f), os.path.getmtime(f))) for f in fileList])
+
+#-------------------------------------------------------------------------------
+# Loads the spikes recorded for `label` in `directory`
+# nbProcs: number of worker processes (default: number of CPUs, 1 to parse sequentially)
+# cache: whether the binary sidecar is used and written
+# Returns the arrays (gids, times), sorted by time (and by gid for simultaneous spikes)
+#-------------------------------------------------------------------------------
+def load_spikes(directory, label, nbProcs=None, cache=True):
+  fileList = find_gdf(directory, label)
+  if len(fileList) == 0:
+    print 'WARNING: load_spikes(): no .gdf file for label',label,'in',directory
+    return np.zeros(0, dtype=int), np.zeros(0)
+
+  sig = signature(fileList)
+  cacheName = os.path.join(directory, label+'.spikes.npz')
+  if cache and os.path.exists(cacheName):
+    cached = np.load(cacheName)
+    if np.array_equal(cached['signature'], sig):
+      return cached['gids'], cached['times']
+
+  chunks = []
+  for f in fileList:
+    chunks += split_chunks(f)
+  if nbProcs == None:
+    nbProcs = multiprocessing.cpu_count()
+  nbProcs = min(nbProcs, len(chunks))
+  if nbProcs > 1:
+    pool = multiprocessing.Pool(nbProcs)
+    parsed = pool.map(parse_chunk, chunks)
+    pool.close()
+    pool.join()
+  else:
+    parsed = map(parse_chunk, chunks)
+
+  data = np.concatenate([np.zeros((0, 2))] + list(parsed))
+  order = np.lexsort((data[:,0], data[:,1]))
+  gids = data[order,0].astype(int)
+  times = data[order,1]
+
+  if cache:
+    tmpName = cacheName[:-len('.npz')]+'.tmp.npz'
+    np.savez(tmpName, gids=gids, times=times, signature=sig)
+    os.rename(tmpName, cacheName) # a partially written cache is never read
+  return gids, times
+
+#-------------------------------------------------------------------------------
+# Splits the spikes by neuron
+# Returns a dictionary {gid: sorted array of spike times}
+#-------------------------------------------------------------------------------
+def spikes_by_gid(gids, times):
+  order = np.argsort(gids, kind='mergesort') # stable: times remain sorted for each gid
+  sortedGids = gids[order]
+  sortedTimes = times[order]
+  neurons, starts = np.unique(sortedGids, return_index=True)
+  stops = np.append(starts[1:], len(sortedGids))
+  return dict((g, sortedTimes[a:b]) for g, a, b in zip(neurons, starts, stops))
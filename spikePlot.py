@@ -0,0 +1,112 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+##
+## spikePlot.py
+##
+## Fast rendering of rasters and activity histograms for large populations
+## - the raster is binned with numpy into a (neuron x time) image, displayed with imshow
+## - the histogram (PSTH) is binned with numpy, and drawn as a single step curve
+## so that the drawing time does not depend on the number of spikes
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+#-------------------------------------------------------------------------------
+# Bins spikes into a (neuron x time) image of spike counts
+# gids, times: spike arrays, as returned by spikeIO.load_spikes
+# tRange, gidRange: (min, max) of the image, by default those of the spikes
+# timeBin: width of the time bins, in ms
+# maxRows: if there are more neurons, consecutive neurons are grouped in the same row
+# Returns the image and its extent [tmin, tmax, gidmin, gidmax]
+#-------------------------------------------------------------------------------
+def raster_image(gids, times, tRange=None, gidRange=None, timeBin=1., maxRows=1000):
+  gids = np.asarray(gids)
+  times = np.asarray(times)
+  if tRange == None:
+    tRange = (times.min(), times.max()) if len(times) > 0 else (0., 1.)
+  if gidRange == None:
+    gidRange = (gids.min(), gids.max()) if len(gids) > 0 else (0, 0)
+  nbCols = max(1, int(np.ceil((tRange[1] - tRange[0]) / timeBin)))
+  nbNeurons = int(gidRange[1] - gidRange[0] + 1)
+  perRow = int(np.ceil(nbNeurons / float(maxRows)))
+  nbRows = int(np.ceil(nbNeurons / float(perRow)))
+
+  keep = (times >= tRange[0]) & (times <= tRange[1]) & (gids >= gidRange[0]) & (gids <= gidRange[1])
+  cols = np.minimum(((times[keep] - tRange[0]) / timeBin).astype(int), nbCols - 1)
+  rows = ((gids[keep] - gidRange[0]) // perRow).astype(int)
+  image = np.bincount(rows * nbCols + cols, minlength=nbRows * nbCols).reshape(nbRows, nbCols)
+  return image, [tRange[0], tRange[0] + nbCols * timeBin, gidRange[0], gidRange[0] + nbRows * perRow]
+
+#-------------------------------------------------------------------------------
+# Peri-stimulus time histogram: population firing rate (Hz) in bins of `binSize` ms
+# Returns the left edges of the bins and the rates
+#-------------------------------------------------------------------------------
+def psth(times, nbNeurons, tRange=None, binSize=1.):
+  times = np.asarray(times)
+  if tRange == None:
+    tRange = (times.min(), times.max()) if len(times) > 0 else (0., 1.)
+  nbBins = max(1, int(np.ceil((tRange[1] - tRange[0]) / binSize)))
+  keep = (times >= tRange[0]) & (times <= tRange[1])
+  counts = np.bincount(np.minimum(((times[keep] - tRange[0]) / binSize).astype(int), nbBins - 1), minlength=nbBins)
+  return tRange[0] + binSize * np.arange(nbBins), 1000. * counts / (binSize * max(nbNeurons, 1))
+
+#-------------------------------------------------------------------------------
+# Draws pre-binned histogram values (one per left edge, bins of constant width) on `ax`
+#-------------------------------------------------------------------------------
+def draw_psth(ax, left, heights, color='black'):
+  left = np.asarray(left, dtype=float)
+  width = left[1] - left[0] if len(left) > 1 else 1.
+  edges = np.append(left, left[-1] + width)
+  values = np.append(heights, heights[-1])
+  ax.fill_between(edges, 0, values, step='post', color=color, linewidth=0)
+  ax.set_xlim(edges[0], edges[-1])
+
+#-------------------------------------------------------------------------------
+# Draws the raster image of the spikes on `ax`
+#-------------------------------------------------------------------------------
+def draw_raster(ax, gids, times, tRange=None, gidRange=None, timeBin=1., maxRows=1000):
+  image, extent = raster_image(gids, times, tRange, gidRange, timeBin, maxRows)
+  ax.imshow(image, aspect='auto', origin='lower', interpolation='nearest', cmap='gray_r', extent=extent, vmin=0, vmax=max(1, image.max()))
+  ax.set_ylabel('Neuron ID')
+
+#-------------------------------------------------------------------------------
+# Saves the raster of the spikes, with the PSTH below when hist is True
+#-------------------------------------------------------------------------------
+def save_raster(fileName, gids, times, title='', hist=True, tRange=None, gidRange=None, timeBin=1., binSize=5., maxRows=1000, figsize=(16,6), dpi=100):
+  if tRange == None and len(times) > 0:
+    tRange = (np.min(times), np.max(times))
+  fig = plt.figure(figsize=figsize)
+  if hist:
+    axRaster = fig.add_axes([0.1, 0.35, 0.85, 0.55])
+    axHist = fig.add_axes([0.1, 0.1, 0.85, 0.2], sharex=axRaster)
+  else:
+    axRaster = fig.add_axes([0.1, 0.1, 0.85, 0.8])
+  draw_raster(axRaster, gids, times, tRange, gidRange, timeBin, maxRows)
+  axRaster.set_title(title)
+  if hist:
+    nbNeurons = len(np.unique(gids)) if gidRange == None else gidRange[1] - gidRange[0] + 1
+    left, rates = psth(times, nbNeurons, tRange, binSize)
+    draw_psth(axHist, left, rates)
+    axHist.set_ylabel('Rate [Hz]')
+    axHist.set_xlabel('Time [ms]')
+    plt.setp(axRaster.get_xticklabels(), visible=False)
+  else:
+    axRaster.set_xlabel('Time [ms]')
+  fig.savefig(fileName, dpi=dpi)
+  plt.close(fig)
+
+#-------------------------------------------------------------------------------
+# Saves the PSTH of the spikes
+#-------------------------------------------------------------------------------
+def save_psth(fileName, times, nbNeurons, title='', tRange=None, binSize=5., figsize=(16,4), dpi=100):
+  fig = plt.figure(figsize=figsize)
+  ax = fig.add_subplot(111)
+  left, rates = psth(times, nbNeurons, tRange, binSize)
+  draw_psth(ax, left, rates)
+  ax.set_title(title)
+  ax.set_ylabel('Rate [Hz]')
+  ax.set_xlabel('Time [ms]')
+  ax.grid()
+  fig.savefig(fileName, dpi=dpi)
+  plt.close(fig)
@@ -5,6 +5,8 @@ import numpy
 import pylab
 import nest.raster_plot as raster
 from scipy import signal as sig
+from spikeIO import load_spikes
+from spikePlot import draw_psth
 
 #filePath = 'oksperiences_02_13-14_modelNo9_x10_PD/2017_2_14_15:5_00000/log/' # GSTN*1.8, GGPe*1.8
 filePath = '2017_3_23_14:26_00000/log/' # GSTN*1.8, GGPe*1.8
@@ -12,38 +14,15 @@ filePath = '2017_3_23_14:26_00000/log/' # GSTN*1.8, GGPe*1.8
 #filePath = '2017_2_14_11:20_00000/log/' # normal
 
 NUCLEI = ['MSN','FSI','STN','GPe','GPi']
-fileList = {}
-
-rootFID = 71625
-
-i = 0
-for N in NUCLEI:
-  fileList[N] = [N+'-'+str(rootFID+i)+'-0.gdf',N+'-'+str(rootFID+i)+'-1.gdf']
-  i += 1
-
-#fileList['GPe'] = ['GPe-71628-0.gdf','GPe-71628-1.gdf']
-#fileList['FSI'] = ['FSI-71627-0.gdf','STN-71627-1.gdf']
-#fileList['MSN'] = ['STN-71627-0.gdf','STN-71627-1.gdf']
-#fileList['GPi'] = ['STN-71627-0.gdf','STN-71627-1.gdf']
 
 #showFFT = True
 
 # read files & combine data :
 #----------------------------
-data = {}
 ts = {}
 gids = {}
 for N in NUCLEI:
-  data[N] = None
-  for f in fileList[N]:
-    newdata = numpy.loadtxt(filePath+f)
-    if data[N] is None:
-      data[N] = newdata
-    else:
-      data[N] = numpy.concatenate((data[N],newdata))
-
-  ts[N] = data[N][:,1] # complete time series of spiking events
-  gids[N] = data[N][:,0] # corresponding list of firing neuron ID
+  gids[N], ts[N] = load_spikes(filePath, N) # complete time series of spiking events, and corresponding list of firing neuron ID
 
 # prepare signal : histogram of spiking events
 #---------------------------------------------
@@ -62,7 +41,7 @@ for N in NUCLEI:
   nbNeurons = len(numpy.unique(gids[N]))
   heights = 1000 * signal[N] / (1.0 * nbNeurons)
   ax[N] = pylab.subplot(320+i)  
-  ax[N].bar(t_bins, heights, width=1.0, color="black")
+  draw_psth(ax[N], t_bins, heights)
   pylab.ylabel('Frequency [Hz]')
   pylab.xlabel('Time [sec]')
 
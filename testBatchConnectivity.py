@@ -0,0 +1,85 @@
+#!/apps/free/python/2.7.10/bin/python
+#-------------------------------------------------------------------------------
+# Checks LG14.batch_connectivity against the scalar in-degree and weight computations
+# (get_indegree and computeW, as used by prepare_connection), for all the LG14 parameterizations,
+# the three RedundancyType, single and multi-channel connexions, with random redundancy and gain
+# The batch results must be exactly the same, and the time taken by both is compared
+#
+# usage: python testBatchConnectivity.py [nbDraws]
+#   nbDraws: number of random redundancy & gain draws per LG14 parameterization (default: 10)
+#-------------------------------------------------------------------------------
+from LG14 import *
+from projections import *
+from baseParams import params
+import time
+import sys
+
+redundancyRange = {'inDegreeAbs': [1., 500.], 'outDegreeAbs': [0.5, 10.], 'outDegreeCons': [0., 1.]}
+
+#-------------------------------------------------------------------------------
+# In-degree and weights of the projections computed one by one, as in prepare_connection
+#-------------------------------------------------------------------------------
+def scalar_connectivity(table, redundancy, gain, RedundancyType, nbSim, nbCh, nbChannels):
+  inDegree = np.zeros(len(table))
+  W = dict((r, np.zeros(len(table))) for r in recType.keys())
+  for j, row in enumerate(table):
+    src = row['src'].replace('Fake_','')
+    totalChannels = nbChannels.get(row['src'], nbCh)
+    if nbCh == 1:
+      source_channels = None
+    elif row['source_channels'] == None:
+      source_channels = range(nbCh)
+    else:
+      source_channels = row['source_channels']
+    if source_channels == None:
+      d = get_indegree(src, row['tgt'], redundancy[j], RedundancyType, nbSim[row['src']])
+    else:
+      d = get_indegree(src, row['tgt'], redundancy[j], RedundancyType, nbSim[row['src']], projType=row['projType'], nbSrcChannels=len(source_channels))
+    if d == 0.:
+      continue
+    if source_channels != None:
+      d = d * (float(len(source_channels)) / float(totalChannels))
+    inDegree[j] = d
+    lRecType = ['GABA'] if row['type'] == 'in' else [r for r in ['AMPA','NMDA'] if r in receptors[row['type']]]
+    for r, w in computeW(lRecType, src, row['tgt'], d, gain[j]).iteritems():
+      W[r][j] = w
+  return inDegree, W
+
+#---------------------------
+def main():
+  nbDraws = int(sys.argv[1]) if len(sys.argv) >= 2 else 10
+  IDs = np.repeat(np.arange(len(loadLG14store())), nbDraws)
+  rng = np.random.RandomState(params['pythonSeed'])
+  nbSim = dict((N, params['nb'+N]) for N in ['MSN','FSI','STN','GPe','Arky','Prot','GPi','CSN','PTN','CMPf'])
+
+  mismatches = 0
+  for splitGPe in [False, True]:
+    for nbCh in [1, 4]:
+      for RedundancyType in ['inDegreeAbs', 'outDegreeAbs', 'outDegreeCons']:
+        testParams = dict(params, splitGPe=splitGPe, nbCh=nbCh, RedundancyType=RedundancyType)
+        table = projection_table(testParams, None)
+        redundancy = rng.uniform(redundancyRange[RedundancyType][0], redundancyRange[RedundancyType][1], size=(len(IDs), len(table)))
+        gain = rng.uniform(0.5, 2., size=(len(IDs), len(table)))
+
+        startTime = time.time()
+        inDegree, W = batch_connectivity(table, redundancy, gain, RedundancyType, nbSim, IDs=IDs, nbCh=nbCh)
+        batchTime = time.time() - startTime
+
+        startTime = time.time()
+        for b, ID in enumerate(IDs):
+          loadLG14alpha(ID)
+          refInDegree, refW = scalar_connectivity(table, redundancy[b], gain[b], RedundancyType, nbSim, nbCh, {})
+          ok = np.array_equal(refInDegree, inDegree[b]) and all(np.array_equal(refW[r], W[r][b]) for r in recType.keys())
+          if not ok:
+            mismatches += 1
+            print '/!\ mismatch for ID',ID,'splitGPe',splitGPe,'nbCh',nbCh,RedundancyType
+        scalarTime = time.time() - startTime
+
+        print '%-6s nbCh=%d %-14s %5d parameterizations x %2d projections: batch %.4f s, scalar %.4f s' % (splitGPe, nbCh, RedundancyType, len(IDs), len(table), batchTime, scalarTime)
+
+  print ''
+  print 'mismatches:', mismatches
+
+#---------------------------
+if __name__ == '__main__':
+  main()
@@ -20,6 +20,10 @@ def createBG_MC():
   #-------------------------
   print '\nCreating neurons\n================'
 
+  if params.get('replayInputs', False):
+    # the replayed spike trains have constant rates, there would be no Poisson generator to drive
+    raise ValueError('testChannelBG changes the rates of the inputs: replayInputs (constant input rates only) can not be used')
+
   nbSim['MSN'] = params['nbMSN']
   createMC('MSN',params['nbCh'])
 
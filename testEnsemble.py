@@ -0,0 +1,76 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+##
+## testEnsemble.py
+##
+## testPlausibility for an ensemble of params['ensembleSize'] BG instances simulated in a single
+## nest kernel (see ensembleBG.py), which differ by their seeds (successive values of nestSeed and pythonSeed
+## starting from params['nestSeed'] and params['pythonSeed']), i.e. by their connection maps: with the default
+## connectBackend 'nest', the connections are drawn by the kernel generators, seeded with nestSeed
+## Each instance is scored as by testPlausibility.py
+
+from ensembleBG import *
+
+#------------------------------------------
+# Parameters of the instances of the ensemble
+#------------------------------------------
+def ensemble_params(params, nbInstances):
+  paramsList = []
+  for i in range(nbInstances):
+    paramsList.append(dict(params, nestSeed=params['nestSeed']+i, pythonSeed=params['pythonSeed']+i))
+  return paramsList
+
+#-----------------------------------------------------------------------
+def main():
+  nest.set_verbosity("M_WARNING")
+
+  paramsList = ensemble_params(params, params['ensembleSize'])
+  instances = instantiate_ensemble(paramsList, antagInjectionSite='none', antag='')
+  scores = np.array(checkAvgFR_ensemble(instances, antagInjectionSite='none', antag=''), dtype=float)
+  restFR = [dict(instance['expeRate']) for instance in instances]
+
+  # deactivation tests, for all the instances at once (even those whose activities at rest do not match)
+  if paramsList[0]['splitGPe']:
+    GPeSites = ['Arky', 'Prot']
+  else:
+    GPeSites = ['GPe']
+  experiments = [('GPe', a) for a in ['AMPA','AMPA+GABAA','NMDA','GABAA']] + [('GPi', a) for a in ['AMPA+NMDA+GABAA','AMPA','NMDA+AMPA','NMDA','GABAA']]
+  for site, a in experiments:
+    if paramsList[0]['nbCh'] == 1:
+      # without re-wiring the BG: each instance is deactivated in turn
+      ww = []
+      for instance in instances:
+        select_instance(instance)
+        ww.append(dict((s, deactivate(instance['params'], s, a)) for s in (GPeSites if site == 'GPe' else ['GPi'])))
+      scores += checkAvgFR_ensemble(instances, antagInjectionSite=site, antag=a)
+      for instance, w in zip(instances, ww):
+        select_instance(instance)
+        for s in w.keys():
+          reactivate(instance['params'], s, a, w[s])
+    else:
+      # with re-creation of the entire ensemble every time
+      scores += checkAvgFR_ensemble(instantiate_ensemble(paramsList, antagInjectionSite=site, antag=a), antagInjectionSite=site, antag=a)
+
+  #-------------------------
+  print "******************"
+  for i, p in enumerate(paramsList):
+    print "* Score of instance",i,"(nestSeed",p['nestSeed'],", pythonSeed",p['pythonSeed'],"):",scores[i][0],'/',scores[i][1]
+  print "******************"
+
+  if not is_root():
+    return # the results are the same in all MPI processes
+  res = open('score.txt','w')
+  for i in range(len(paramsList)):
+    res.writelines(str(scores[i][0])+'\n')
+  res.close()
+
+  with open('ensemble_scores.csv', 'wb') as csv_file:
+    writer = csv.writer(csv_file)
+    writer.writerow(['LG14modelID', 'nestSeed', 'pythonSeed', 'sim_score', 'max_score'] + [N+'_Rate' for N in get_nuclei(params)])
+    for i, instance in enumerate(instances):
+      writer.writerow([instance['params']['LG14modelID'], instance['params']['nestSeed'], instance['params']['pythonSeed'], scores[i][0], scores[i][1]] + [restFR[i][N] for N in get_nuclei(params)])
+
+#---------------------------
+if __name__ == '__main__':
+  main()
@@ -81,8 +81,10 @@ def checkGurneyTest(showRasters=False,params={},CSNFR=[2.,10.], PActiveCSN=1., P
     for N in NUCLEI:
       frstr += N+' ('+str(i)+') , '
   frstr+='\n'
-  firingRatesFile=open(dataPath+'firingRates.csv','w')
-  firingRatesFile.writelines(frstr)
+  if is_root():
+    # the rates are the same in all MPI processes, only one of them writes them
+    firingRatesFile=open(dataPath+'firingRates.csv','w')
+    firingRatesFile.writelines(frstr)
 
   #----------------------------------
   # Loop over the 5 steps of the test
@@ -134,7 +136,7 @@ def checkGurneyTest(showRasters=False,params={},CSNFR=[2.,10.], PActiveCSN=1., P
       print '------ Channel',i,'-------'
       for N in NUCLEI:
         #strTestPassed = 'NO!'
-        expeRate[N][i,timeStep] = nest.GetStatus(spkDetect[i][N], 'n_events')[0] / float(nbSim[N]*simDuration) * 1000
+        expeRate[N][i,timeStep] = count_events(spkDetect[i][N]) / float(nbSim[N]*simDuration) * 1000
         print 't('+str(timeStep)+')',N,':',expeRate[N][i,timeStep],'Hz'
         frstr += '%f , ' %(expeRate[N][i,timeStep])
 
@@ -165,7 +167,8 @@ def checkGurneyTest(showRasters=False,params={},CSNFR=[2.,10.], PActiveCSN=1., P
 
     # write measured firing rates in csv file
     frstr+='\n'
-    firingRatesFile.writelines(frstr)
+    if is_root():
+      firingRatesFile.writelines(frstr)
 
     #-------------------------
     # Displays
@@ -192,7 +195,8 @@ def checkGurneyTest(showRasters=False,params={},CSNFR=[2.,10.], PActiveCSN=1., P
       nest.raster_plot.from_device(inspector[N],hist=True,title=N)
     nest.raster_plot.show()
 
-  firingRatesFile.close()
+  if is_root():
+    firingRatesFile.close()
 
   return score,5
 
@@ -281,8 +285,10 @@ def checkGeorgopoulosTest(showRasters=False,params={},CSNFR=[2.,10.], PActiveCSN
   for N in NUCLEI:
     frstr += N+', '
   frstr+='\n'
-  firingRatesFile=open(dataPath+'firingRates.csv','w')
-  firingRatesFile.writelines(frstr)
+  if is_root():
+    # the rates are the same in all MPI processes, only one of them writes them
+    firingRatesFile=open(dataPath+'firingRates.csv','w')
+    firingRatesFile.writelines(frstr)
 
   #-------------------------
   # measures
@@ -311,10 +317,11 @@ def checkGeorgopoulosTest(showRasters=False,params={},CSNFR=[2.,10.], PActiveCSN
 
   print '------ Rest Period ------'  
   frstr = 'rest, , , , ,' # only GPi is recorded at rest, and on all channels
-  GPiRestRate = nest.GetStatus(GPiRestSpkDetect, 'n_events')[0] / float(nbSim[N]*simDuration*params['nbCh']) * 1000
+  GPiRestRate = count_events(GPiRestSpkDetect) / float(nbSim[N]*simDuration*params['nbCh']) * 1000
   print "GPi rate at rest:",GPiRestRate;"Hz"
   frstr += '%f \n' %GPiRestRate
-  firingRatesFile.writelines(frstr)
+  if is_root():
+    firingRatesFile.writelines(frstr)
 
   for i in range(params['nbCh']):
     nest.SetStatus(ActPop['CSN'][i],{'rate':CSNrate[i]})
@@ -326,14 +333,16 @@ def checkGeorgopoulosTest(showRasters=False,params={},CSNFR=[2.,10.], PActiveCSN
     print '------ Channel',i,'------'
     frstr = str(i)+', '
     for N in NUCLEI:
-      expeRate[N][i] = nest.GetStatus(spkDetect[i][N], 'n_events')[0] / float(nbSim[N]*simDuration) * 1000
+      expeRate[N][i] = count_events(spkDetect[i][N]) / float(nbSim[N]*simDuration) * 1000
       print N,':',expeRate[N][i],'Hz'
       frstr += '%f , ' %(expeRate[N][i])
     frstr += '\n'
 
-    firingRatesFile.writelines(frstr)
+    if is_root():
+      firingRatesFile.writelines(frstr)
 
-  firingRatesFile.close()
+  if is_root():
+    firingRatesFile.close()
 
   #-------------------------
   # Displays
@@ -350,6 +359,109 @@ def checkGeorgopoulosTest(showRasters=False,params={},CSNFR=[2.,10.], PActiveCSN
 
   return contrast
 
+#-----------------------------------------------------------------------
+# Georgopoulos tuning sweep on a single instantiated network:
+# the preferred direction of the cosine-tuned CSN/PTN input is rotated over all
+# the channels, one trial per channel, with a washout period at baseline rates
+# between trials.
+# Writes one tuning matrix per nucleus in log/tuning_<N>.csv (rows: trials, i.e.
+# preferred channel ; columns: recorded channel), readable by polarPlot.py
+# Returns the tuning matrices, as a dictionary of (nbCh x nbCh) arrays
+#-----------------------------------------------------------------------
+def checkGeorgopoulosSweep(showRasters=False,params={},CSNFR=[2.,10.],PTNFR=[15.,35],washoutDuration=500.):
+
+  nest.ResetNetwork()
+  initNeurons()
+
+  dataPath='log/'
+  offsetDuration = 500. # transient after each change of the inputs, not recorded
+  simDuration = 1000. # ms
+  nbCh = params['nbCh']
+  simulationOffset = nest.GetKernelStatus('time')
+
+  #-------------------------
+  # cosine-tuned activity levels, with the preferred direction in channel 0
+  #-------------------------
+  activityLevels = (np.cos(2 * np.pi / nbCh * np.arange(nbCh))+1)/2.
+
+  # the rates are changed on the Poisson generators feeding the parrot neurons, when they exist
+  ActPop = {}
+  for N in ['CSN','PTN']:
+    ActPop[N] = Fake[N] if N in Fake else Pop[N]
+
+  def set_inputs(levels):
+    for i in range(nbCh):
+      nest.SetStatus(ActPop['CSN'][i],{'rate':CSNFR[0] + (CSNFR[1]-CSNFR[0]) * levels[i]})
+      nest.SetStatus(ActPop['PTN'][i],{'rate':PTNFR[0] + (PTNFR[1]-PTNFR[0]) * levels[i]})
+
+  #-------------------------
+  # one in-memory spike detector per nucleus, demultiplexed per channel afterwards
+  #-------------------------
+  spkDetect = {}
+  chanOf = {}
+  for N in NUCLEI:
+    spkDetect[N] = nest.Create("spike_detector", params={"withgid": True, "withtime": True, "label": 'tuning_'+N, "to_file": False})
+    for i in range(nbCh):
+      nest.Connect(Pop[N][i], spkDetect[N])
+    # first GID of each channel, to retrieve the channel of a spiking neuron
+    chanOf[N] = np.array([Pop[N][i][0] for i in range(nbCh)])
+
+  # recording windows: [start, stop) for the rest period, then for each trial
+  windows = []
+  t = simulationOffset
+
+  #-------------------------
+  # Simulation
+  #-------------------------
+  print '------ Rest Period ------'
+  set_inputs(np.zeros((nbCh)))
+  nest.Simulate(offsetDuration+simDuration)
+  windows.append([t+offsetDuration, t+offsetDuration+simDuration])
+  t += offsetDuration+simDuration
+
+  for trial in range(nbCh):
+    print '------ Trial',trial,'(preferred channel:',trial,') ------'
+    set_inputs(np.roll(activityLevels, trial))
+    nest.Simulate(offsetDuration+simDuration)
+    windows.append([t+offsetDuration, t+offsetDuration+simDuration])
+    t += offsetDuration+simDuration
+
+    # washout at baseline rates before the next trial
+    set_inputs(np.zeros((nbCh)))
+    nest.Simulate(washoutDuration)
+    t += washoutDuration
+
+  #-------------------------
+  # build the tuning matrices
+  #-------------------------
+  tuning = {}
+  restRate = {}
+  for N in NUCLEI:
+    events = {'senders': gather_events(spkDetect[N], 'senders'), 'times': gather_events(spkDetect[N], 'times')}
+    channels = np.searchsorted(chanOf[N], events['senders'], side='right') - 1
+    rates = np.zeros((nbCh+1, nbCh))
+    for w in range(len(windows)):
+      inWindow = (events['times'] >= windows[w][0]) & (events['times'] < windows[w][1])
+      rates[w] = np.bincount(channels[inWindow], minlength=nbCh) / float(nbSim[N]*simDuration) * 1000
+    restRate[N] = rates[0].mean()
+    tuning[N] = rates[1:]
+
+    if is_root():
+      np.savetxt(dataPath+'tuning_'+N+'.csv', tuning[N], fmt='%f', delimiter=' , ',
+                 header='rest='+str(restRate[N])+' CSNFR='+str(CSNFR[0])+','+str(CSNFR[1])+' PTNFR='+str(PTNFR[0])+','+str(PTNFR[1])+'\nrows: preferred channel of the trial ; columns: recorded channel (Hz)')
+    print N,'at rest:',restRate[N],'Hz'
+    print tuning[N]
+
+  #-------------------------
+  # Displays
+  #-------------------------
+  if showRasters and interactive:
+    for N in NUCLEI:
+      nest.raster_plot.from_device(spkDetect[N],hist=False,title=N)
+    nest.raster_plot.show()
+
+  return tuning
+
 #-----------------------------------------------------------------------
 def main():
   if len(sys.argv) >= 2:
@@ -408,9 +520,13 @@ def main():
   instantiate_BG(params, antagInjectionSite='none', antag='')
   score = np.zeros((2))
 
-  #proportion = 0.1
-  proportion = 0.5
-  score += checkGurneyTest(showRasters=True,params=params,PActiveCSN=proportion,PActivePTN=proportion,CSNFR=[2.,4.], PTNFR=[15.,15], CMPfFR=[4., 4.], transientCMPf=1.)
+  if params['GeorgopoulosSweep']:
+    # tuning curves Liénard-style, all preferred directions on the same network
+    checkGeorgopoulosSweep(params=params,CSNFR=[2.,4.], PTNFR=[15.,15])
+  else:
+    #proportion = 0.1
+    proportion = 0.5
+    score += checkGurneyTest(showRasters=True,params=params,PActiveCSN=proportion,PActivePTN=proportion,CSNFR=[2.,4.], PTNFR=[15.,15], CMPfFR=[4., 4.], transientCMPf=1.)
   #score += checkGeorgopoulosTest(params=params,PActiveCSN=proportion,PActivePTN=proportion)
   # Test Liénard-style:
  # score += checkGeorgopoulosTest(params=params,CSNFR=[2.,4.], PTNFR=[15.,15])
@@ -425,6 +541,8 @@ def main():
   #-------------------------
   # log the results in a file
   #-------------------------
+  if not is_root():
+    return # the results are the same in all MPI processes
   #res = open('log/OutSummary_'+timeStr+'.txt','a')
   res = open('log/OutSummary.txt','a')
   for k,v in params.iteritems():
@@ -0,0 +1,150 @@
+#!/apps/free/python/2.7.10/bin/python
+#-------------------------------------------------------------------------------
+# Validation of the compact input model (params['compactInputs'])
+#
+# The CSN, PTN and CMPf inputs of MSN, FSI and STN are simulated twice:
+# - with one Poisson generator per parrot neuron (reference, `create(fake=True, parrot=True)`)
+# - with a single Poisson generator shared by all the parrot neurons of a population
+# and the following statistics are compared:
+# - firing rate of the input neurons, and correlation between input neurons
+# - correlation between the summed inputs received by pairs of target neurons
+#   (this is the correlation that the parrot neurons are here to provide)
+# - firing rates of the target nuclei
+#-------------------------------------------------------------------------------
+from LGneurons import *
+import sys
+
+simDuration = 5000. # ms
+offsetDuration = 1000. # ms
+binSize = 5. # ms
+nbPairs = 500 # number of neuron pairs drawn to estimate the correlations
+
+inputs = ['CSN','PTN','CMPf']
+targets = {'MSN': ['CSN','PTN','CMPf'],
+           'FSI': ['CSN','PTN','CMPf'],
+           'STN': ['PTN','CMPf']}
+
+#-------------------------------------------------------------------------------
+# Builds the inputs and their targets, with or without shared Poisson generators
+#-------------------------------------------------------------------------------
+def buildInputs(shared):
+  nest.ResetKernel()
+  Pop.clear()
+  Fake.clear()
+  if 'nbcpu' in params:
+    nest.SetKernelStatus({'local_num_threads': params['nbcpu']})
+  nstrand.set_seed(params['nestSeed'], params['pythonSeed'])
+  initNeurons()
+  loadLG14params(params['LG14modelID'])
+
+  for N in targets:
+    nbSim[N] = params['nb'+N]
+    create(N)
+    nest.SetStatus(Pop[N],{"I_e":params['Ie'+N]})
+  for N in inputs:
+    nbSim[N] = params['nb'+N]
+    create(N, fake=True, parrot=True, shared=shared)
+
+  for N in targets:
+    for src in targets[N]:
+      connect('ex', src, N, redundancy=params['redundancy'+src+N], RedundancyType=params['RedundancyType'], gain=params['G'+src+N], stochastic_delays=params['stochastic_delays'])
+
+  detectors = {}
+  for N in inputs + targets.keys():
+    detectors[N] = nest.Create('spike_detector', params={'withgid': True, 'withtime': True, 'to_file': False, 'to_memory': True, 'start': offsetDuration})
+    nest.Connect(Pop[N], detectors[N])
+  return detectors
+
+#-------------------------------------------------------------------------------
+# Spike counts of the neurons of population N, in bins of `binSize` ms
+#-------------------------------------------------------------------------------
+def binnedCounts(N, detector):
+  events = nest.GetStatus(detector, keys='events')[0]
+  nbBins = int(simDuration / binSize)
+  idx = np.array(events['senders']) - Pop[N][0]
+  bins = np.minimum(((np.array(events['times']) - offsetDuration) / binSize).astype(int), nbBins-1)
+  return np.bincount(idx * nbBins + bins, minlength=len(Pop[N]) * nbBins).reshape(len(Pop[N]), nbBins).astype(float)
+
+#-------------------------------------------------------------------------------
+# Mean correlation coefficient between the rows i & j of `series`, for the given pairs
+#-------------------------------------------------------------------------------
+def meanCorrelation(series, pairs):
+  cc = []
+  for i, j in pairs:
+    if series[i].std() > 0 and series[j].std() > 0:
+      cc.append(np.corrcoef(series[i], series[j])[0,1])
+  return np.mean(cc) if len(cc) > 0 else 0.
+
+def randomPairs(n, rng):
+  pairs = []
+  while len(pairs) < nbPairs:
+    i, j = rng.randint(n, size=2)
+    if i != j:
+      pairs.append((i, j))
+  return pairs
+
+#-------------------------------------------------------------------------------
+# Simulates one input model and returns its statistics
+#-------------------------------------------------------------------------------
+def checkInputModel(shared):
+  print '\nInput model:', 'shared Poisson generators' if shared else 'one Poisson generator per parrot neuron'
+  print '=================================================================='
+  detectors = buildInputs(shared)
+  nbNodes = nest.GetKernelStatus('network_size')
+  nest.Simulate(simDuration + offsetDuration)
+
+  rng = rnd.RandomState(params['pythonSeed'])
+  stats = {'nodes': nbNodes}
+  counts = {}
+  for N in inputs:
+    counts[N] = binnedCounts(N, detectors[N])
+    stats[N+' rate'] = counts[N].sum() / len(Pop[N]) / (simDuration / 1000.)
+    stats[N+' cc'] = meanCorrelation(counts[N], randomPairs(len(Pop[N]), rng))
+
+  for N in targets:
+    # summed input received by the sampled target neurons, with the multiplicity of their connections
+    pairs = randomPairs(len(Pop[N]), rng)
+    sampled = np.unique(np.array(pairs))
+    row = dict((t, k) for k, t in enumerate(sampled))
+    summed = np.zeros((len(sampled), counts[inputs[0]].shape[1]))
+    for src in targets[N]:
+      conns = nest.GetConnections(source=Pop[src], target=tuple(Pop[N][t] for t in sampled))
+      status = np.array(nest.GetStatus(conns, keys=['source','target']))
+      srcIdx = status[:,0] - Pop[src][0]
+      tgtIdx = np.array([row[t] for t in status[:,1] - Pop[N][0]])
+      multiplicity = np.bincount(tgtIdx * len(Pop[src]) + srcIdx, minlength=len(sampled) * len(Pop[src])).reshape(len(sampled), len(Pop[src]))
+      summed += multiplicity.dot(counts[src])
+    stats[N+' input cc'] = meanCorrelation(summed, [(row[i], row[j]) for i, j in pairs])
+    stats[N+' rate'] = nest.GetStatus(detectors[N], keys='n_events')[0] / float(len(Pop[N])) / (simDuration / 1000.)
+
+  return stats
+
+#-------------------------------------------------------------------------------
+# Compares both input models; the rates should agree within `rateTolerance` (relative)
+# and the correlations within `ccTolerance` (absolute)
+#-------------------------------------------------------------------------------
+def main(rateTolerance=0.1, ccTolerance=0.02):
+  ref = checkInputModel(shared=False)
+  comp = checkInputModel(shared=True)
+
+  print '\n{:<16} {:>12} {:>12}'.format('', 'parrot', 'compact')
+  print '{:<16} {:>12} {:>12}'.format('nodes', ref['nodes'], comp['nodes'])
+  failed = []
+  for key in sorted(k for k in ref if k != 'nodes'):
+    if key.endswith('cc'):
+      ok = abs(ref[key] - comp[key]) <= ccTolerance
+    else:
+      ok = abs(ref[key] - comp[key]) <= rateTolerance * max(ref[key], 1.)
+    if not ok:
+      failed.append(key)
+    print '{:<16} {:>12.4f} {:>12.4f} {}'.format(key, ref[key], comp[key], '' if ok else '<- /!\\')
+
+  if len(failed) > 0:
+    print '\n/!\ The compact input model differs from the reference on:', ', '.join(failed)
+    return 1
+  print '\nThe compact input model is statistically equivalent to the reference'
+  return 0
+
+#---------------------------
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,67 @@
+#!/apps/free/python/2.7.10/bin/python
+#-------------------------------------------------------------------------------
+# Checks that the BG built and simulated on several MPI processes is the same as the one of a single process:
+# the spike counts of each nucleus and the numbers of connections towards each nucleus, summed over
+# the processes (each process only holds the connections of its local neurons), must be identical
+# The number of virtual processes is kept constant (nbVP), the threads of the single process being
+# replaced by MPI processes, so that nest draws the same random numbers in both cases
+#
+# usage: python testMPI.py                 (writes the reference counts of a single process in mpiReference.csv)
+#        mpirun -np 2 python testMPI.py    (compares the counts of 2 processes with the reference)
+#-------------------------------------------------------------------------------
+from iniBG import *
+
+nbVP = 2 # virtual processes, shared by the threads of the MPI processes
+referenceFile = 'mpiReference.csv'
+
+#-------------------------------------------------------------------------------
+# Spike counts and numbers of incoming connections of each nucleus, over all MPI processes
+#-------------------------------------------------------------------------------
+def mpi_counts(params):
+  if nbVP % nest.NumProcesses() != 0:
+    raise ValueError(str(nbVP)+' virtual processes can not be shared by '+str(nest.NumProcesses())+' MPI processes')
+  params = dict(params, nbcpu=nbVP / nest.NumProcesses())
+  instantiate_BG(params, antagInjectionSite='none', antag='')
+
+  spkDetect = {}
+  for N in NUCLEI:
+    spkDetect[N] = nest.Create("spike_detector", params={"withgid": True, "withtime": True, "label": N, "to_file": False, "to_memory": True})
+    nest.Connect(population_gids(params, N), spkDetect[N])
+
+  nest.Simulate(params['tSimu'])
+
+  counts = {}
+  for N in NUCLEI:
+    counts[N+'_spikes'] = count_events(spkDetect[N])
+    counts[N+'_connections'] = allreduce_sum(len(nest.GetConnections(target=population_gids(params, N))))
+  return counts
+
+#---------------------------
+def main():
+  nest.set_verbosity("M_WARNING")
+  counts = mpi_counts(params)
+
+  if nest.NumProcesses() == 1:
+    with open(referenceFile, 'wb') as csv_file:
+      writer = csv.writer(csv_file)
+      for k in sorted(counts.keys()):
+        writer.writerow([k, counts[k]])
+    print 'Reference counts of a single process written in',referenceFile
+    return
+
+  if not is_root():
+    return # the counts are the same in all MPI processes
+  with open(referenceFile) as csv_file:
+    reference = dict((k, int(v)) for k, v in csv.reader(csv_file))
+  mismatches = 0
+  for k in sorted(counts.keys()):
+    ok = counts[k] == reference.get(k)
+    if not ok:
+      mismatches += 1
+    print '%-20s 1 process: %10s, %d processes: %10d %s' % (k, reference.get(k), nest.NumProcesses(), counts[k], '' if ok else '/!\ mismatch')
+  print ''
+  print 'mismatches:', mismatches
+
+#---------------------------
+if __name__ == '__main__':
+  main()
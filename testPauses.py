@@ -8,13 +8,14 @@
 ## Works both in single-channel and multi-channels cases
 
 from iniBG import *
-from modelParams import *
 import nest.raster_plot
 import os
 import numpy as np
 import sys
 import matplotlib.pyplot as plt
 import math
+from spikeIO import load_spikes, spikes_by_gid
+from spikePlot import save_raster, save_psth
 
 restFR = {} # this will be populated with firing rates of all nuclei, at rest
 oscilPow = {} # Oscillations power and frequency at rest
@@ -32,6 +33,7 @@ oscilFreq = {}
 def checkAvgFR(showRasters=False,params={},antagInjectionSite='none',antag='',logFileName=''):
   nest.ResetNetwork()
   initNeurons()
+  rewind_inputs() # common input spike trains across conditions, when they are replayed
 
   showPotential = False # Switch to True to graph neurons' membrane potentials - does not handle well restarted simulations
 
@@ -92,7 +94,7 @@ def checkAvgFR(showRasters=False,params={},antagInjectionSite='none',antag='',lo
     frstr += "none , "
     for N in NUCLEI:
       strTestPassed = 'NO!'
-      expeRate[N] = nest.GetStatus(spkDetect[N], 'n_events')[0] / float(nbSim[N]*simDuration*params['nbCh']) * 1000
+      expeRate[N] = count_events(spkDetect[N]) / float(nbSim[N]*simDuration*params['nbCh']) * 1000
       if expeRate[N] <= FRRNormal[N][1] and expeRate[N] >= FRRNormal[N][0]:
         # if the measured rate is within acceptable values
         strTestPassed = 'OK'
@@ -116,7 +118,7 @@ def checkAvgFR(showRasters=False,params={},antagInjectionSite='none',antag='',lo
       oscilPow[N] = -1.
       oscilFreq[N] = -1.
       try:
-        spikes_N = nest.GetStatus(spkDetect[N], keys="events")[0]['times'] # get the timing of all spikes
+        spikes_N = gather_events(spkDetect[N], 'times') # get the timing of all spikes
         data = np.bincount([int(i-offsetDuration-simulationOffset) for i in spikes_N], minlength=int(simDuration)) # discretize them in bins of 1ms
         ps = np.abs(np.fft.fft(data))**2
         time_step = 1 / 1000. # 1000 ms
@@ -133,7 +135,7 @@ def checkAvgFR(showRasters=False,params={},antagInjectionSite='none',antag='',lo
     validationStr = ""
     frstr += str(antag) + " , "
     for N in NUCLEI:
-      expeRate[N] = nest.GetStatus(spkDetect[N], 'n_events')[0] / float(nbSim[N]*simDuration*params['nbCh']) * 1000
+      expeRate[N] = count_events(spkDetect[N]) / float(nbSim[N]*simDuration*params['nbCh']) * 1000
       if N == antagInjectionSite:
         strTestPassed = 'NO!'
         if expeRate[N] <= FRRAnt[N][antag][1] and expeRate[N] >= FRRAnt[N][antag][0]:
@@ -164,19 +166,21 @@ def checkAvgFR(showRasters=False,params={},antagInjectionSite='none',antag='',lo
   text.append(s+'\n')
 
   frstr+='\n'
-  firingRatesFile=open(dataPath+'firingRates.csv','a')
-  firingRatesFile.writelines(frstr)
-  firingRatesFile.close()
-
-  #print "************************************** file writing",text
-  #res = open(dataPath+'OutSummary_'+logFileName+'.txt','a')
-  res = open(dataPath+'OutSummary.txt','a')
-  res.writelines(text)
-  res.close()
-
-  validationFile = open("validationArray.csv",'a')
-  validationFile.write(validationStr)
-  validationFile.close()
+  if is_root():
+    # the rates are the same in all MPI processes, only one of them writes them
+    firingRatesFile=open(dataPath+'firingRates.csv','a')
+    firingRatesFile.writelines(frstr)
+    firingRatesFile.close()
+
+    #print "************************************** file writing",text
+    #res = open(dataPath+'OutSummary_'+logFileName+'.txt','a')
+    res = open(dataPath+'OutSummary.txt','a')
+    res.writelines(text)
+    res.close()
+
+    validationFile = open("validationArray.csv",'a')
+    validationFile.write(validationStr)
+    validationFile.close()
   #-------------------------
   # Displays
   #-------------------------
@@ -208,24 +212,9 @@ def checkAvgFR(showRasters=False,params={},antagInjectionSite='none',antag='',lo
 #---------------------------- begining getSpikes ------------------------------
 # return an ordered dictionnary of the spikes occurences by neuron and in the time
 def getSpikes(Directory, Nuclei):
-    spikesDict = {}
-    spikesList = []
-    gdfList = os.listdir(Directory + '/NoeArchGdf')
-    
-    for f in gdfList:
-        if f.find(Nuclei) != -1 and f[-4:] == ".gdf" :
-            spikeData = open(Directory +'/NoeArchGdf/' + f)
-            for line in spikeData: # take the spike and put it in neuronRecording
-                spk = line.split('\t')
-                spk.pop()
-                spikesList.append(float(spk[1]))
-                if spk[0] in spikesDict:
-                    spikesDict[spk[0]].append(float(spk[1]))
-                else:
-                    spikesDict[spk[0]] = [float(spk[1])]
-        
-    for neuron in spikesDict:
-        spikesDict[neuron] = sorted(spikesDict[neuron])
+    gids, times = load_spikes(Directory + '/NoeArchGdf', Nuclei)
+    spikesDict = dict((str(neuron), spikes.tolist()) for neuron, spikes in spikes_by_gid(gids, times).iteritems())
+    spikesList = times.tolist()
     
     return spikesDict, spikesList
 #---------------------------- end getSpikes -----------------------------------
@@ -248,32 +237,23 @@ def getISIs(spikesDict):
 #--------------------------- begining rasterPlot ------------------------------
 # plot rasters figures in the directory /raster
 def rasterPlot(spikesDict, Nuclei, Directory):
-    rasterList = []
     
     if not os.path.exists(Directory + '/rasterPlot'):
         os.makedirs(Directory + '/rasterPlot')
 
-    for neuron in spikesDict:
-        rasterList.append(spikesDict[neuron])  
-    plt.figure(figsize=(40,15))
-    plt.eventplot(rasterList, linelengths = 0.8, linewidths = 0.6)
-    plt.title('Spike raster plot ' + Nuclei)
-    plt.grid()
-    plt.savefig(Directory + '/rasterPlot/' + 'RasterPlot_' + Nuclei + '.png')
+    gids = np.concatenate([[int(neuron)] * len(spikesDict[neuron]) for neuron in spikesDict] + [[]]).astype(int)
+    times = np.concatenate([spikesDict[neuron] for neuron in spikesDict] + [[]])
+    save_raster(Directory + '/rasterPlot/' + 'RasterPlot_' + Nuclei + '.png', gids, times, title='Spike raster plot ' + Nuclei, hist=False, figsize=(40,15))
 #----------------------------- end rasterPlot ---------------------------------
     
 #--------------------------- begining BarPlot ---------------------------------
 # plot the nuclei histogram of ISIs
-def activityHistPlot(spikesList, Nuclei, Directory):
+def activityHistPlot(spikesList, Nuclei, Directory, nbNeurons=1):
     
     if not os.path.exists(Directory + '/activityHistPlot'):
         os.makedirs(Directory + '/activityHistPlot')
 
-    plt.figure(figsize=(40,5))
-    plt.hist(spikesList, bins=200, normed=0.5)
-    plt.title('Histogram of the activity' + Nuclei)
-    plt.grid()
-    plt.savefig(Directory + '/activityHistPlot/'+ 'activityHistPlot_' + Nuclei + '.png')
+    save_psth(Directory + '/activityHistPlot/'+ 'activityHistPlot_' + Nuclei + '.png', spikesList, nbNeurons, title='Histogram of the activity' + Nuclei, binSize=10., figsize=(40,5))
 #----------------------------- end BarPlot ------------------------------------
     
 #--------------------------- begining BarPlot ---------------------------------
@@ -386,7 +366,7 @@ def gdfExploitation(Directory):
     for N in NUCLEI:
         a = getSpikes(Directory, N)
         spikesDict = a[0]
-        activityHistPlot(a[1], N, Directory)
+        activityHistPlot(a[1], N, Directory, nbNeurons=len(spikesDict))
         rasterPlot(spikesDict, N, Directory)
         
         if N == 'Arky' or N == 'Prot' or N == 'GPe':
@@ -484,6 +464,11 @@ def main():
   #mapTopology2D(show=True)
   score += checkAvgFR(params=params,antagInjectionSite='none',antag='',showRasters=True)
   
+  # the .gdf files of all MPI processes are complete once every process is done with the simulation
+  barrier()
+  if not is_root():
+    return
+
   Directory = os.getcwd()
   os.system('mkdir NoeArchGdf')  # save the .gdf files before antagonist desaster 
   if params['splitGPe']:
@@ -8,7 +8,6 @@
 ## Works both in single-channel and multi-channels cases
 
 from iniBG import *
-from modelParams import *
 
 restFR = {} # this will be populated with firing rates of all nuclei, at rest
 oscilPow = {} # Oscillations power and frequency at rest
@@ -26,6 +25,7 @@ oscilFreq = {}
 def checkAvgFR(showRasters=False,params={},antagInjectionSite='none',antag='',logFileName=''):
   nest.ResetNetwork()
   initNeurons()
+  rewind_inputs() # common input spike trains across conditions, when they are replayed
 
   showPotential = False # Switch to True to graph neurons' membrane potentials - does not handle well restarted simulations
 
@@ -36,8 +36,13 @@ def checkAvgFR(showRasters=False,params={},antagInjectionSite='none',antag='',lo
 
   simulationOffset = nest.GetKernelStatus('time')
   print('Simulation Offset: '+str(simulationOffset))
-  offsetDuration = 1000.
+  if params['warmStart'] and restore_state():
+    # starts from the state captured at the end of the stabilization of a previous condition
+    offsetDuration = params['warmStartOffset']
+  else:
+    offsetDuration = 1000.
   simDuration = params['tSimu'] # ms
+  nuclei = get_nuclei(params)
 
   # single or multi-channel?
   if params['nbCh'] == 1:
@@ -60,7 +65,7 @@ def checkAvgFR(showRasters=False,params={},antagInjectionSite='none',antag='',lo
   if antagInjectionSite != 'none':
     antagStr = antagInjectionSite+'_'+antag+'_'
 
-  for N in NUCLEI:
+  for N in nuclei:
     # 1000ms offset period for network stabilization
     spkDetect[N] = nest.Create("spike_detector", params={"withgid": True, "withtime": True, "label": antagStr+N, "to_file": storeGDF, 'start':offsetDuration+simulationOffset,'stop':offsetDuration+simDuration+simulationOffset})
     connect_detector(N)
@@ -72,7 +77,12 @@ def checkAvgFR(showRasters=False,params={},antagInjectionSite='none',antag='',lo
   #-------------------------
   # Simulation
   #-------------------------
-  nest.Simulate(simDuration+offsetDuration)
+  if params['warmStart'] and len(WarmState) == 0:
+    nest.Simulate(offsetDuration)
+    capture_state([gid for N in nuclei for gid in population_gids(params, N)])
+    nest.Simulate(simDuration)
+  else:
+    nest.Simulate(simDuration+offsetDuration)
 
   score = 0
 
@@ -84,9 +94,9 @@ def checkAvgFR(showRasters=False,params={},antagInjectionSite='none',antag='',lo
   if antagInjectionSite == 'none':
     validationStr = "\n#" + str(params['LG14modelID']) + " , "
     frstr += "none , "
-    for N in NUCLEI:
+    for N in nuclei:
       strTestPassed = 'NO!'
-      expeRate[N] = nest.GetStatus(spkDetect[N], 'n_events')[0] / float(nbSim[N]*simDuration*params['nbCh']) * 1000
+      expeRate[N] = count_events(spkDetect[N]) / float(nbSim[N]*simDuration*params['nbCh']) * 1000
       if expeRate[N] <= FRRNormal[N][1] and expeRate[N] >= FRRNormal[N][0]:
         # if the measured rate is within acceptable values
         strTestPassed = 'OK'
@@ -110,7 +120,7 @@ def checkAvgFR(showRasters=False,params={},antagInjectionSite='none',antag='',lo
       oscilPow[N] = -1.
       oscilFreq[N] = -1.
       try:
-        spikes_N = nest.GetStatus(spkDetect[N], keys="events")[0]['times'] # get the timing of all spikes
+        spikes_N = gather_events(spkDetect[N], 'times') # get the timing of all spikes
         data = np.bincount([int(i-offsetDuration-simulationOffset) for i in spikes_N], minlength=int(simDuration)) # discretize them in bins of 1ms
         ps = np.abs(np.fft.fft(data))**2
         time_step = 1 / 1000. # 1000 ms
@@ -126,8 +136,8 @@ def checkAvgFR(showRasters=False,params={},antagInjectionSite='none',antag='',lo
   else:
     validationStr = ""
     frstr += str(antag) + " , "
-    for N in NUCLEI:
-      expeRate[N] = nest.GetStatus(spkDetect[N], 'n_events')[0] / float(nbSim[N]*simDuration*params['nbCh']) * 1000
+    for N in nuclei:
+      expeRate[N] = count_events(spkDetect[N]) / float(nbSim[N]*simDuration*params['nbCh']) * 1000
       if N == antagInjectionSite:
         strTestPassed = 'NO!'
         if expeRate[N] <= FRRAnt[N][antag][1] and expeRate[N] >= FRRAnt[N][antag][0]:
@@ -158,32 +168,34 @@ def checkAvgFR(showRasters=False,params={},antagInjectionSite='none',antag='',lo
   text.append(s+'\n')
 
   frstr+='\n'
-  firingRatesFile=open(dataPath+'firingRates.csv','a')
-  firingRatesFile.writelines(frstr)
-  firingRatesFile.close()
-
-  #print "************************************** file writing",text
-  #res = open(dataPath+'OutSummary_'+logFileName+'.txt','a')
-  res = open(dataPath+'OutSummary.txt','a')
-  res.writelines(text)
-  res.close()
-
-  validationFile = open("validationArray.csv",'a')
-  validationFile.write(validationStr)
-  validationFile.close()
+  if is_root():
+    # the rates are the same in all MPI processes, only one of them writes them
+    firingRatesFile=open(dataPath+'firingRates.csv','a')
+    firingRatesFile.writelines(frstr)
+    firingRatesFile.close()
+
+    #print "************************************** file writing",text
+    #res = open(dataPath+'OutSummary_'+logFileName+'.txt','a')
+    res = open(dataPath+'OutSummary.txt','a')
+    res.writelines(text)
+    res.close()
+
+    validationFile = open("validationArray.csv",'a')
+    validationFile.write(validationStr)
+    validationFile.close()
   #-------------------------
   # Displays
   #-------------------------
   if showRasters and interactive:
     displayStr = ' ('+antagStr[:-1]+')' if (antagInjectionSite != 'none') else ''
-    for N in NUCLEI:
+    for N in nuclei:
       # histograms crash in the multi-channels case
       nest.raster_plot.from_device(spkDetect[N], hist=(params['nbCh'] == 1), title=N+displayStr)
 
     if showPotential:
       pl.figure()
       nsub = 231
-      for N in NUCLEI:
+      for N in nuclei:
         pl.subplot(nsub)
         nest.voltage_trace.from_device(multimeters[N],title=N+displayStr+' #0')
         disconnect_detector(N)
@@ -194,6 +206,59 @@ def checkAvgFR(showRasters=False,params={},antagInjectionSite='none',antag='',lo
   return score, 5 if antagInjectionSite == 'none' else 1
 
 
+#-----------------------------------------------------------------------
+# Deactivation tests (antagonist injections in the GPe and the GPi), scored by checkAvgFR
+# Returns [score obtained, maximal score]
+#-----------------------------------------------------------------------
+def checkDeactivations(params):
+  score = np.zeros((2))
+  if params['splitGPe']:
+    if params['nbCh'] == 1:
+      # The following implements the deactivation tests without re-wiring the BG (faster but implemented only in single-channel case)
+      for a in ['AMPA','AMPA+GABAA','NMDA','GABAA']:
+        wwA = deactivate(params, 'Arky', a)
+        wwP = deactivate(params, 'Prot', a)
+        score += checkAvgFR(params=params,antagInjectionSite='GPe',antag=a)
+        reactivate(params, 'Arky', a, wwA)
+        reactivate(params, 'Prot', a, wwP)
+
+      for a in ['AMPA+NMDA+GABAA','AMPA','NMDA+AMPA','NMDA','GABAA']:
+        ww = deactivate(params, 'GPi', a)
+        score += checkAvgFR(params=params,antagInjectionSite='GPi',antag=a)
+        reactivate(params, 'GPi', a, ww)
+    else:
+      # The following implements the deactivation tests with re-creation of the entire BG every time (slower but also implemented for multi-channels)
+      for a in ['AMPA','AMPA+GABAA','NMDA','GABAA']:
+        instantiate_BG(params, antagInjectionSite='GPe', antag=a)
+        score += checkAvgFR(params=params,antagInjectionSite='GPe',antag=a)
+
+      for a in ['AMPA+NMDA+GABAA','AMPA','NMDA+AMPA','NMDA','GABAA']:
+        instantiate_BG(params, antagInjectionSite='GPi', antag=a)
+        score += checkAvgFR(params=params,antagInjectionSite='GPi',antag=a)
+
+  else:
+    if params['nbCh'] == 1:
+      # The following implements the deactivation tests without re-wiring the BG (faster but implemented only in single-channel case)
+      for a in ['AMPA','AMPA+GABAA','NMDA','GABAA']:
+        ww = deactivate(params, 'GPe', a)
+        score += checkAvgFR(params=params,antagInjectionSite='GPe',antag=a)
+        reactivate(params, 'GPe', a, ww)
+
+      for a in ['AMPA+NMDA+GABAA','AMPA','NMDA+AMPA','NMDA','GABAA']:
+        ww = deactivate(params, 'GPi', a)
+        score += checkAvgFR(params=params,antagInjectionSite='GPi',antag=a)
+        reactivate(params, 'GPi', a, ww)
+    else:
+      # The following implements the deactivation tests with re-creation of the entire BG every time (slower but also implemented for multi-channels)
+      for a in ['AMPA','AMPA+GABAA','NMDA','GABAA']:
+        instantiate_BG(params, antagInjectionSite='GPe', antag=a)
+        score += checkAvgFR(params=params,antagInjectionSite='GPe',antag=a)
+
+      for a in ['AMPA+NMDA+GABAA','AMPA','NMDA+AMPA','NMDA','GABAA']:
+        instantiate_BG(params, antagInjectionSite='GPi', antag=a)
+        score += checkAvgFR(params=params,antagInjectionSite='GPi',antag=a)
+  return score
+
 #-----------------------------------------------------------------------
 def main():
   if len(sys.argv) >= 2:
@@ -257,52 +322,10 @@ def main():
   # don't bother with deactivation tests if activities at rest are not within plausible bounds
   if score[0] < score[1]:
     print("Activities at rest do not match: skipping deactivation tests")
+  elif params['restOnly']:
+    print("Activities at rest only (restOnly): skipping deactivation tests")
   else:
-    if params['splitGPe']:
-        if params['nbCh'] == 1:
-          # The following implements the deactivation tests without re-wiring the BG (faster but implemented only in single-channel case)
-          for a in ['AMPA','AMPA+GABAA','NMDA','GABAA']:
-            wwA = deactivate('Arky', a)
-            wwP = deactivate('Prot', a)
-            score += checkAvgFR(params=params,antagInjectionSite='GPe',antag=a)
-            reactivate('Arky', a, wwA)
-            reactivate('Prot', a, wwP)
-    
-          for a in ['AMPA+NMDA+GABAA','AMPA','NMDA+AMPA','NMDA','GABAA']:
-            ww = deactivate('GPi', a)
-            score += checkAvgFR(params=params,antagInjectionSite='GPi',antag=a)
-            reactivate('GPi', a, ww)
-        else:
-          # The following implements the deactivation tests with re-creation of the entire BG every time (slower but also implemented for multi-channels)
-          for a in ['AMPA','AMPA+GABAA','NMDA','GABAA']:
-            instantiate_BG(params, antagInjectionSite='GPe', antag=a)
-            score += checkAvgFR(params=params,antagInjectionSite='GPe',antag=a)
-    
-          for a in ['AMPA+NMDA+GABAA','AMPA','NMDA+AMPA','NMDA','GABAA']:
-            instantiate_BG(params, antagInjectionSite='GPi', antag=a)
-            score += checkAvgFR(params=params,antagInjectionSite='GPi',antag=a)
-        
-    else:
-        if params['nbCh'] == 1:
-          # The following implements the deactivation tests without re-wiring the BG (faster but implemented only in single-channel case)
-          for a in ['AMPA','AMPA+GABAA','NMDA','GABAA']:
-            ww = deactivate('GPe', a)
-            score += checkAvgFR(params=params,antagInjectionSite='GPe',antag=a)
-            reactivate('GPe', a, ww)
-    
-          for a in ['AMPA+NMDA+GABAA','AMPA','NMDA+AMPA','NMDA','GABAA']:
-            ww = deactivate('GPi', a)
-            score += checkAvgFR(params=params,antagInjectionSite='GPi',antag=a)
-            reactivate('GPi', a, ww)
-        else:
-          # The following implements the deactivation tests with re-creation of the entire BG every time (slower but also implemented for multi-channels)
-          for a in ['AMPA','AMPA+GABAA','NMDA','GABAA']:
-            instantiate_BG(params, antagInjectionSite='GPe', antag=a)
-            score += checkAvgFR(params=params,antagInjectionSite='GPe',antag=a)
-    
-          for a in ['AMPA+NMDA+GABAA','AMPA','NMDA+AMPA','NMDA','GABAA']:
-            instantiate_BG(params, antagInjectionSite='GPi', antag=a)
-            score += checkAvgFR(params=params,antagInjectionSite='GPi',antag=a)
+    score += checkDeactivations(params)
 
   #-------------------------
   print "******************"
@@ -312,6 +335,8 @@ def main():
   #-------------------------
   # log the results in a file
   #-------------------------
+  if not is_root():
+    return # the results are the same in all MPI processes
   res = open('log/OutSummary.txt','a')
   for k,v in params.iteritems():
     res.writelines(k+' , '+str(v)+'\n')
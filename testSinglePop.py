@@ -1,227 +1,136 @@
 #!/apps/free/python/2.7.10/bin/python
+#-------------------------------------------------------------------------------
+# Calibration of isolated nuclei: a nucleus is simulated alone, fed by Poisson inputs (fake populations)
+# The rate of the nucleus is measured for many values of its parameters at once: one replica population
+# is created per parameter point (I_e, V_th, gain of the inputs), all the replicas receiving the same
+# fake inputs, and the rate-vs-parameter curve is obtained with a single nest.Simulate call
+#
+# usage: python testSinglePop.py [nucleus [LG14modelID]]
+#   nucleus: STN, GPe, MSN, FSI or GPi (default: MSN)
+#   LG14modelID: if provided, the thresholds of this LG14 parameterization are used
+# The curve is written in singlePop_<nucleus>.csv
+#-------------------------------------------------------------------------------
 from LGneurons import *
-import nest.raster_plot
+import sys
+
+#-------------------------------------------------------------------------------
+# Setup of each tested nucleus:
+# nbSim: number of neurons of each replica, Ie & G: reference I_e and gain of the inputs,
+# inputs: list of (connection type, source, number of fake source neurons, inDegree)
+# a source with the name of the tested nucleus is the recurrent collateral of each replica
+# gains (optional): relative gain of the inputs of each source, multiplying G
+#-------------------------------------------------------------------------------
+singlePopSetup = {'STN': {'nbSim': 30., 'Ie': 0., 'G': 1.35,
+                          'inputs': [('ex','PTN',150,25), ('ex','CMPf',33,33), ('in','GPe',96,30)]},
+                  'GPe': {'nbSim': 30., 'Ie': 13., 'G': 1.3, # external current, necessary for tau_m=14 (not 20)
+                          'inputs': [('ex','CMPf',10,10), ('ex','STN',9,9), ('in','MSN',200,200), ('in','GPe',None,30)]},
+                  'MSN': {'nbSim': 50., 'Ie': 0., 'G': 3.9,
+                          'inputs': [('ex','CSN',200,100), ('ex','PTN',10,1), ('ex','CMPf',1,1), ('in','FSI',1,1)]},
+                  'FSI': {'nbSim': 50., 'Ie': 0., 'G': 1.1,
+                          'inputs': [('ex','CSN',200,50), ('ex','PTN',10,1), ('ex','STN',7,7), ('in','GPe',25,25), ('ex','CMPf',8,8)]},
+                  'GPi': {'nbSim': 50., 'Ie': 9., 'G': 1.3, # constant input current, so that even without excitatory inputs, we have activity
+                          'inputs': [('ex','STN',30,30), ('ex','CMPf',30,30), ('in','MSN',1000,50), ('in','GPe',88,10)]},
+                 }
+
+#-------------------------------------------------------------------------------
+# Parameter points of the cartesian product of the lists of values `Ie`, `V_th` & `G`
+# (None: the reference value of the nucleus is kept)
+#-------------------------------------------------------------------------------
+def grid(Ie=None, V_th=None, G=None):
+  points = [{}]
+  for k, values in [('Ie', Ie), ('V_th', V_th), ('G', G)]:
+    if values != None:
+      points = [dict(point, **{k: v}) for point in points for v in values]
+  return points
+
+#-------------------------------------------------------------------------------
+# Simulates one replica of nucleus N per parameter point of `points`, a list of dictionaries
+# {'Ie', 'V_th', 'G'} (missing values: reference values of the setup, and V_th of BGparams)
+# All the replicas receive the same fake inputs, drawn with their own in-degree & weights
+# setup: inputs of the nucleus, as in singlePopSetup (default: singlePopSetup[N])
+# simDuration: duration of the measure (ms), after offsetDuration ms of stabilization
+# Returns the list of the rates (Hz) of the replicas
+#-------------------------------------------------------------------------------
+def calibrate(N, points, simDuration=5000., offsetDuration=1000., setup=None):
+  if setup == None:
+    setup = singlePopSetup[N]
+  nest.ResetKernel()
+  nest.SetKernelStatus({'local_num_threads': params['nbcpu'], "overwrite_files":True})
+  initNeurons()
+  nstrand.set_seed(params['nestSeed'], params['pythonSeed'])
+  Pop.clear()
+  Fake.clear()
 
-testedNucleus = 'MSN'
-simDuration = 5000. # ms
-nest.SetKernelStatus({"overwrite_files":True})
-
-if testedNucleus == 'STN':
-#==========================
-  print 'Creating neurons\n================'
-  # creation of STN neurons
-  #-------------------------
-  nbSim['STN']=30.
-  create('STN')
-
-  # PTN
-  #-------------------------
-  nbSim['PTN'] = 150
-  create('PTN', fake=True)
-  #print '* PTN:',nbSim['PTN'],'Poisson generators with avg rate:',rate['PTN']
-  #Pop['PTN']  = nest.Create('poisson_generator',int(nbSim['PTN']))
-  #nest.SetStatus(Pop['PTN'],{'rate':rate['PTN']})
-
-  # CMPf
-  #-------------------------
-  nbSim['CMPf']=33
-  create('CMPf', fake=True)
-  #print '* CMPf:',nbSim['CMPf'],'Poisson generators with avg rate:',rate['CMPf']
-  #Pop['CMPf'] = nest.Create('poisson_generator',int(nbSim['CMPf']))
-  #nest.SetStatus(Pop['CMPf'],{'rate': rate['CMPf']})
-
-  # Fake GPe
-  #-------------------------
-  nbSim['GPe'] = 96
-  create('GPe', fake=True)
-  #print '* GPe:',nbSim['GPe'],'Poisson generators with avg rate:',rate['GPe']
-  #Pop['GPe'] = nest.Create('poisson_generator',int(nbSim['GPe']))
-  #nest.SetStatus(Pop['GPe'],{'rate':rate['GPe']})
-
-
-  # connection of populations
-  #-------------------------
-  print 'Connecting neurons\n================'
-  G = 1.35
-  connect('ex','PTN','STN', inDegree=25, gain=G)
-  connect('ex','CMPf','STN', inDegree=min(84,nbSim['CMPf']), gain=G)
-  connect('in','GPe','STN', inDegree= 30, gain=G)
-
-elif testedNucleus == 'GPe':
-#==========================
-  print 'Creating neurons\n================'
-  # creation of GPe neurons
-  #-------------------------
-  nbSim['GPe']=30.
-  create('GPe')
-  nest.SetStatus(Pop['GPe'],{"I_e":13.}) # external current, necessary for tau_m=14 (not 20)
-
-  # CMPf
-  #-------------------------
-  nbSim['CMPf']=int(nbSim['GPe']*0.34) # respects the approximate proportions
-  create('CMPf', fake=True)
-
-  # STN
-  #-------------------------
-  nbSim['STN']=int(nbSim['GPe']*0.3)
-  create('STN', fake=True)
-
-  # MSN
-  #-------------------------
-  nbSim['MSN']=200
-  create('MSN', fake=True)
-
-  print nbSim
-
-  # connection of populations
-  #---------------------------
-  print 'Connecting neurons\n================'
-
-  G = 1.3
-  connect('ex','CMPf','GPe', inDegree=min(32/2,nbSim['CMPf']), gain=G)
-  connect('ex','STN','GPe', inDegree=min(107/2,nbSim['STN']), gain=G)
-  connect('in','MSN','GPe', inDegree=min(14723/2,nbSim['MSN']), gain=G)
-  connect('in','GPe','GPe', inDegree=min(32,nbSim['GPe']), gain=G)
-
-elif testedNucleus == 'MSN':
-#==========================
-  print 'Creating neurons\n================'
-
-  # creation of MSN neurons
-  #-------------------------
-  nbSim['MSN']=50.
-  create('MSN')
-
-  # CSN
-  #-------------------------
-  nbSim['CSN'] = 200.
-  create('CSN',fake=True)
-
-  # PTN
-  #-------------------------
-  nbSim['PTN'] = 10.
-  create('PTN',fake=True)
-
-  # FSI
-  #-------------------------
-  nbSim['FSI'] = 1.
-  create('FSI',fake=True)
-
-  # CMPf
-  #-------------------------
-  nbSim['CMPf'] = 1.
-  create('CMPf',fake=True)
-
-  # connection of populations
-  #---------------------------
-  print 'Connecting neurons\n================'
-  G = 3.9
-  connect('ex','CSN','MSN',inDegree=100,gain=G)
-  connect('ex','PTN','MSN',inDegree=1,gain=G)
-  connect('ex','CMPf','MSN',inDegree=1,gain=G)
-  connect('in','FSI','MSN',inDegree=1,gain=G)
-
-elif testedNucleus == 'FSI':
-#===========================
   print 'Creating neurons\n================'
-
-  nbSim['FSI']=50.
-  create('FSI')
-  nbSim['STN']=7.
-  create('STN',fake=True)
-  nbSim['GPe']=25.
-  create('GPe',fake=True)
-  nbSim['CSN']=200
-  create('CSN',fake=True)
-  nbSim['PTN']=10.
-  create('PTN',fake=True)
-  nbSim['CMPf']=8.
-  create('CMPf',fake=True)
+  # fake inputs, shared by all the replicas
+  for type, src, nb, inDegree in setup['inputs']:
+    if src != N:
+      nbSim[src] = nb
+      create(src, fake=True)
+
+  # one replica of the tested nucleus per parameter point
+  nbSim[N] = setup['nbSim']
+  replicas = []
+  for point in points:
+    neuronParams = dict(BGparams[N], I_e=float(point.get('Ie', setup['Ie'])))
+    if 'V_th' in point:
+      neuronParams['V_th'] = float(point['V_th'])
+    replicas.append(nest.Create("iaf_psc_alpha_multisynapse", int(nbSim[N]), params=neuronParams))
+  print '*',len(points),'replicas of',N,'with',int(nbSim[N]),'neurons each'
 
   print 'Connecting neurons\n================'
-  G = 1.1
-  connect('ex','CSN','FSI',inDegree=50,gain=G)
-  connect('ex','PTN','FSI',inDegree=1,gain=G)
-  connect('ex','STN','FSI',inDegree=7,gain=G)
-  connect('in','GPe','FSI',inDegree=25,gain=G)
-  connect('ex','CMPf','FSI',inDegree=8,gain=G)
-
-elif testedNucleus == 'GPi':
-#===========================
-  print 'Creating neurons\n================'
-
-  nbSim['GPi']=50.
-  create('GPi')
-  # add a constant input current to the GPi so that event without excitatory inputs, we have activity
-  nest.SetStatus(Pop['GPi'],{"I_e":9.})
-  nbSim['MSN']=1000.
-  create('MSN',fake=True)
-  nbSim['STN']=30.
-  create('STN',fake=True)
-  nbSim['GPe']=88.
-  create('GPe',fake=True)
-  nbSim['CMPf']=30.
-  create('CMPf',fake=True)
-
-  print 'Connecting neurons\n================'
-  G = 1.3
-  connect('ex','STN','GPi',inDegree=30,gain=G)
-  connect('ex','CMPf','GPi',inDegree=30,gain=G)
-  connect('in','MSN','GPi',inDegree=50,gain=G)
-  connect('in','GPe','GPi',inDegree=10,gain=G)
-
-
-#-------------------------
-# measures
-#-------------------------
-
-#mSTN = nest.Create("multimeter")
-#nest.SetStatus(mSTN, {"withtime":True, "record_from":["V_m","currents"]})
-#nest.Connect(mSTN, Pop['STN'])
-  
-spkDetect = nest.Create("spike_detector", params={"withgid": True, "withtime": True, "label":testedNucleus, "to_file": True})
-nest.Connect(Pop[testedNucleus], spkDetect)
-
-#-------------------------
-# disconnection tests
-#-------------------------
-
-#GPeInConn = nest.GetConnections(target=Pop['GPe'])
-#GPeInConnSTN = nest.GetConnections(target=Pop['GPe'],source=Pop['STN'])
-#GPeInConnCMPf = nest.GetConnections(target=Pop['GPe'],source=Pop['CMPf'])
-#print "GPe Exitatory inputs disconnected"
-#print "NB CONNECT",len(GPeInConn),len(GPeInConnSTN)
-#print GPeInConnSTN
-#nest.SetStatus(GPeInConnSTN, {'weight':0.0}) # how to be specific to AMPA or NMDA ?
-#nest.SetStatus(GPeInConnCMPf, {'weight':0.0}) # how to be specific to AMPA, NMDA or GABA inputs ?                                                                
-#-------------------------
-# Simulation
-#-------------------------
-#nest.ResetKernel()
-#nest.SetKernelStatus({'local_num_threads': 2})
-nest.Simulate(simDuration)
-  
-print '\n Spike Detector n_events',nest.GetStatus(spkDetect, 'n_events')[0]
-expeRate = nest.GetStatus(spkDetect, 'n_events')[0] / float(nbSim[testedNucleus]*simDuration)
-print '\n ',testedNucleus,'Rate:',expeRate*1000,'Hz'
-
-# Displays
-#-------------------------
-
-#dmSTN = nest.GetStatus(mSTN)[0]
-#VmSTN = dmSTN["events"]["V_m"]
-#ImSTN = dmSTN["events"]["currents"]
-#tSTN = dmSTN["events"]["times"]
-'''  
-dSD = nest.GetStatus(spkDetect,keys="events")[0]
-evs = dSD["senders"]
-ts = dSD["times"]
-  
-pylab.figure(testedNucleus+' spikes')
-pylab.plot(ts, evs, ".")
-
-pylab.show()
-'''
-
-nest.raster_plot.from_device(spkDetect,hist=True,title=testedNucleus)
-nest.raster_plot.show()
+  for replica, point in zip(replicas, points):
+    Pop[N] = replica # the target of the connections below, and the source of the recurrent ones
+    for type, src, nb, inDegree in setup['inputs']:
+      lRecType = ['AMPA','NMDA'] if type == 'ex' else ['GABA']
+      W = computeW(lRecType, src, N, inDegree, point.get('G', setup['G']) * setup.get('gains', {}).get(src, 1.))
+      wire_connection({'type': type, 'src': src, 'tgt': N, 'projType': '', 'source_channels': None,
+                       'inDegree': inDegree, 'lRecType': lRecType, 'W': W, 'delay': tau[src+'->'+N]})
+
+  # a single detector for all the replicas, the spikes are sent back to their replica according to the GID of the sender
+  spkDetect = nest.Create("spike_detector", params={"withgid": True, "withtime": True, "label": N, "to_file": False, "to_memory": True, 'start': offsetDuration})
+  allGIDs = [gid for replica in replicas for gid in replica]
+  nest.Connect(allGIDs, spkDetect)
+
+  nest.Simulate(offsetDuration+simDuration)
+
+  first = min(allGIDs)
+  owner = np.zeros(max(allGIDs) - first + 1, dtype=int)
+  for i, replica in enumerate(replicas):
+    owner[np.asarray(replica) - first] = i
+  counts = np.bincount(owner[np.asarray(gather_events(spkDetect, 'senders'), dtype=int) - first], minlength=len(replicas))
+  return [counts[i] / float(nbSim[N]*simDuration) * 1000 for i in range(len(replicas))]
+
+#---------------------------
+def main():
+  nest.set_verbosity("M_WARNING")
+  testedNucleus = sys.argv[1] if len(sys.argv) >= 2 else 'MSN'
+  if len(sys.argv) >= 3:
+    loadLG14params(int(sys.argv[2]))
+
+  # I_e from 0 to twice the reference value (at least 20 pA), for the reference V_th & gain
+  points = grid(Ie=np.linspace(0., max(20., 2*singlePopSetup[testedNucleus]['Ie']), 21))
+  rates = calibrate(testedNucleus, points)
+
+  FRR = FRRNormal[testedNucleus]
+  for point, r in zip(points, rates):
+    print '*',testedNucleus,point,'- Rate:',r,'Hz',('-> OK' if FRR[0] <= r <= FRR[1] else '')
+
+  if not is_root():
+    return # the results are the same in all MPI processes
+  with open('singlePop_'+testedNucleus+'.csv', 'wb') as csv_file:
+    writer = csv.writer(csv_file)
+    writer.writerow(['Ie', 'V_th', 'G', testedNucleus+'_Rate'])
+    for point, r in zip(points, rates):
+      writer.writerow([point.get('Ie', singlePopSetup[testedNucleus]['Ie']), point.get('V_th', BGparams[testedNucleus]['V_th']), point.get('G', singlePopSetup[testedNucleus]['G']), r])
+
+  if interactive:
+    pylab.plot([point['Ie'] for point in points], rates, 'o-')
+    pylab.axhspan(FRR[0], FRR[1], alpha=0.2)
+    pylab.xlabel('I_e (pA)')
+    pylab.ylabel(testedNucleus+' rate (Hz)')
+    pylab.show()
+
+#---------------------------
+if __name__ == '__main__':
+  main()
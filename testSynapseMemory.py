@@ -0,0 +1,81 @@
+#!/apps/free/python/2.7.10/bin/python
+#-------------------------------------------------------------------------------
+# Memory benchmark of the synapse models (params['slimSynapses'] and params['homogeneousSynapses'])
+#
+# The whole BG network of modelParams.py is built (and not simulated) three times, each time in
+# a separate process:
+# - with labelled synapses (static_synapse_lbl) everywhere
+# - with the plain static_synapse wherever the label is not needed afterwards
+# - with one static_synapse_hom_w model per projection and receptor
+# and the memory taken by the network (resident memory after - before the construction)
+# is compared with the prediction of memoryEstimate.py
+#
+# usage: python testSynapseMemory.py [scale]
+#   scale: factor applied to the population sizes of modelParams.py (default: 1)
+#          with the default sizes (1/1000 of the BG), scale=1000 gives the whole macaque BG
+#-------------------------------------------------------------------------------
+from iniBG import *
+import memoryEstimate
+import subprocess
+import time
+
+#-------------------------------------------------------------------------------
+# Resident memory of this process, in MB
+#-------------------------------------------------------------------------------
+def residentMB():
+  with open('/proc/self/status') as f:
+    for line in f:
+      if line.startswith('VmRSS:'):
+        return float(line.split()[1]) / 1024.
+  return 0.
+
+#-------------------------------------------------------------------------------
+# Builds the network and prints the measures on a single line starting with 'RESULT'
+#-------------------------------------------------------------------------------
+def measure(mode, scale):
+  for N in ['MSN','FSI','STN','GPe','Arky','Prot','GPi','CSN','PTN','CMPf']:
+    params['nb'+N] = params['nb'+N] * scale
+  params['slimSynapses'] = (mode == 'slim')
+  params['homogeneousSynapses'] = (mode == 'homogeneous')
+  nest.set_verbosity("M_WARNING")
+
+  before = residentMB()
+  startTime = time.time()
+  instantiate_BG(params, antagInjectionSite='none', antag='')
+  buildTime = time.time() - startTime
+  after = residentMB()
+
+  est = memoryEstimate.estimate(params)
+  predicted = est['MB'] - memoryEstimate.baseMB - memoryEstimate.threadMB * max(1, params['nbcpu'])
+  print 'RESULT', nest.GetKernelStatus('num_connections'), after - before, predicted, buildTime
+
+#---------------------------
+def main():
+  scale = float(sys.argv[1]) if len(sys.argv) >= 2 else 1.
+
+  if len(sys.argv) >= 4 and sys.argv[2] == '--child':
+    measure(sys.argv[3], scale)
+    return
+
+  results = {}
+  modes = ['labelled', 'slim', 'homogeneous']
+  for mode in modes:
+    output = subprocess.check_output([sys.executable, sys.argv[0], str(scale), '--child', mode])
+    line = [l for l in output.splitlines() if l.startswith('RESULT')][-1]
+    results[mode] = [float(v) for v in line.split()[1:]]
+
+  print '\n********************************'
+  print '* Synapse memory, scale x'+str(scale)
+  print '********************************'
+  print '%-12s %14s %14s %14s %10s' % ('synapses', 'connections', 'measured (MB)', 'predicted (MB)', 'build (s)')
+  for mode in modes:
+    connections, measured, predicted, buildTime = results[mode]
+    print '%-12s %14d %14.1f %14.1f %10.1f' % (mode, connections, measured, predicted, buildTime)
+  print ''
+  for mode in modes[1:]:
+    saved = results['labelled'][1] - results[mode][1]
+    print mode,'synapses save',round(saved, 1),'MB ('+str(round(100. * saved / max(results['labelled'][1], 1e-9), 1))+'%), i.e.',round(saved * 1024.**2 / max(results[mode][0], 1), 1),'bytes per connection'
+
+#---------------------------
+if __name__ == '__main__':
+  main()
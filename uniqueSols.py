@@ -4,6 +4,7 @@
 # extract unique parameter solutions
 
 import numpy as np
+from LG14 import saveLG14store
 
 def unique_nested_arrays(ar):
   origin_shape = ar.shape
@@ -17,3 +18,5 @@ soltab = np.loadtxt(open("solutions_simple.csv","r"),delimiter=";",skiprows=1)
 unisols = unique_nested_arrays(soltab)
 header = open("solutions_simple.csv","r").readline()
 np.savetxt('solutions_simple_unique.csv',unisols,delimiter=' , ',header=header)
+# compiled table, loaded by LG14.loadLG14store
+saveLG14store([n.strip() for n in header.strip().split(';')], unisols, 'solutions_simple_unique.npy')